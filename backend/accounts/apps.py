@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "accounts"
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.models.signals import post_delete, post_save
+
+        from .authentication import user_changed
+        post_save.connect(
+            user_changed, sender=settings.AUTH_USER_MODEL, dispatch_uid='accounts.user_saved'
+        )
+        post_delete.connect(
+            user_changed, sender=settings.AUTH_USER_MODEL, dispatch_uid='accounts.user_deleted'
+        )
@@ -0,0 +1,187 @@
+"""
+JWT authentication that resolves the user from a cache.
+
+simplejwt's ``JWTAuthentication`` loads the user row on every
+authenticated request. ``CachedJWTAuthentication`` asks ``get_user()``
+instead. That looks in an in-process LRU of ``AUTH_USER_CACHE_SIZE``
+users, each trusted for ``AUTH_USER_CACHE_SECONDS``. Next comes the shared
+cache named by ``AUTH_USER_SHARED_CACHE``, if set, and then the database.
+The user checks run on the result as before: inactive users and revoked
+tokens are still rejected.
+
+Only safe methods read the caches. A write may save ``request.user``
+(djoser's ``PATCH /auth/users/me/`` does), and saving a copy that is up
+to ``AUTH_USER_CACHE_SECONDS`` old could undo a password change or a
+deactivation made since, so writes load the user from the database.
+The password hash is left out of the shared cache; a user read from it
+loads the password on first access, as a deferred field.
+
+Saving or deleting a user (a profile edit, deactivation, a password
+change) calls ``forget()``. That evicts the user from this process and
+from the shared cache, immediately and again after commit. Other
+processes drop their copy within ``AUTH_USER_CACHE_SECONDS``.
+``QuerySet.update()`` sends no signal, so call ``forget()`` after one.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+SHARED_KEY = 'accounts:user:{}'
+# Kept out of the shared cache
+SHARED_EXCLUDED = {'password'}
+
+_lock = threading.Lock()
+# user id -> (expiry on the monotonic clock, row), least recently used first
+_rows = OrderedDict()
+# Bumped by every forget(), so a lookup that raced one does not store its row
+_generation = 0
+
+
+def shared_cache():
+    alias = settings.AUTH_USER_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def _row(user):
+    return {field.attname: getattr(user, field.attname) for field in user._meta.concrete_fields}
+
+
+def _user(row):
+    """A model instance from a cached row, as if just loaded from the database."""
+    model = get_user_model()
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in row]
+    return model.from_db(DEFAULT_DB_ALIAS, names, [row[name] for name in names])
+
+
+def _local_get(user_id):
+    with _lock:
+        entry = _rows.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _rows[user_id]
+            return None
+        _rows.move_to_end(user_id)
+        return entry[1]
+
+
+def _local_set(user_id, row, generation):
+    with _lock:
+        if generation != _generation:
+            return
+        _rows[user_id] = (time.monotonic() + settings.AUTH_USER_CACHE_SECONDS, row)
+        _rows.move_to_end(user_id)
+        while len(_rows) > settings.AUTH_USER_CACHE_SIZE:
+            _rows.popitem(last=False)
+
+
+def get_user(user_id):
+    """
+    The user whose ``USER_ID_FIELD`` is ``user_id``, or ``None``. Each call
+    returns a new instance, so callers may change it freely.
+    """
+    # Token claims and model fields may disagree on int vs str
+    key = str(user_id)
+    row = _local_get(key)
+    if row is not None:
+        return _user(row)
+
+    generation = _generation
+    shared = shared_cache()
+    if shared is not None:
+        row = shared.get(SHARED_KEY.format(key))
+    if row is None:
+        user = load_user(user_id)
+        if user is None:
+            return None
+        row = _row(user)
+        if shared is not None and generation == _generation:
+            shared.set(
+                SHARED_KEY.format(key),
+                {name: value for name, value in row.items() if name not in SHARED_EXCLUDED},
+                settings.AUTH_USER_SHARED_CACHE_SECONDS
+            )
+    _local_set(key, row, generation)
+    return _user(row)
+
+
+def load_user(user_id):
+    """``get_user()`` straight from the database, skipping both caches."""
+    model = get_user_model()
+    try:
+        return model._default_manager.get(**{api_settings.USER_ID_FIELD: user_id})
+    except model.DoesNotExist:
+        return None
+
+
+def forget(user_id):
+    """Evict a user, now and when the current transaction commits."""
+    key = str(user_id)
+
+    def evict():
+        global _generation
+        with _lock:
+            _generation += 1
+            _rows.pop(key, None)
+        shared = shared_cache()
+        if shared is not None:
+            shared.delete(SHARED_KEY.format(key))
+    evict()
+    transaction.on_commit(evict)
+
+
+def clear():
+    """Empty this process's LRU (not the shared cache)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _rows.clear()
+
+
+def user_changed(sender, instance, **kwargs):
+    """``post_save``/``post_delete`` receiver; see ``AccountsConfig.ready()``."""
+    forget(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    use_cache = True
+
+    def authenticate(self, request):
+        # Writes may save request.user, so they must not get a stale copy
+        self.use_cache = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_user(user_id) if self.use_cache else load_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
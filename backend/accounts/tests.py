@@ -1,3 +1,145 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from . import authentication
+
+User = get_user_model()
+
+
+class CachedUserAuthenticationTests(APITestCase):
+    def setUp(self):
+        authentication.clear()
+        self.addCleanup(authentication.clear)
+        self.users = [
+            User.objects.create_user(
+                username=f'cached{i}',
+                email=f'cached{i}@example.com',
+                password='TestPass123!',
+                first_name='Cached',
+                last_name=f'User {i}'
+            )
+            for i in range(3)
+        ]
+        self.user = self.users[0]
+
+    def get(self, user, path='/auth/users/me/'):
+        """``GET`` ``path`` (the profile) as ``user``, a user or a token; ``(response, user queries)``."""
+        token = user if isinstance(user, AccessToken) else AccessToken.for_user(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, HTTP_AUTHORIZATION=f'JWT {token}')
+        users_table = f'FROM {connection.ops.quote_name(User._meta.db_table)}'
+        return response, sum(users_table in query['sql'] for query in queries)
+
+    def test_repeat_requests_skip_the_user_query(self):
+        """Test that only the first authenticated request loads the user"""
+        path = reverse('user-projects', args=[self.user.id])
+        self.assertEqual(self.get(self.user, path)[1], 1)
+        response, user_queries = self.get(self.user, path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries, 0)
+
+    def test_saves_and_deletes_evict_the_user(self):
+        """Test that profile changes, deactivation, password changes and deletion apply at once"""
+        self.get(self.user)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        response, user_queries = self.get(self.user)
+        self.assertEqual(response.data['first_name'], 'Renamed')
+        self.assertEqual(user_queries, 1)
+
+        self.user.set_password('NewPass123!')
+        self.user.save()
+        self.assertEqual(self.get(self.user)[1], 1)
+
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.get(self.user)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['detail'].code, 'user_inactive')
+
+        token = AccessToken.for_user(self.users[1])
+        self.get(token)
+        self.users[1].delete()
+        response, _ = self.get(token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['detail'].code, 'user_not_found')
+
+    def test_instances_are_not_shared(self):
+        """Test that each lookup returns its own copy of the cached user"""
+        first = authentication.get_user(self.user.id)
+        first.first_name = 'Changed in memory'
+        second = authentication.get_user(str(self.user.id))
+        self.assertIsNot(first, second)
+        self.assertEqual(second.first_name, 'Cached')
+        self.assertEqual(second.pk, self.user.pk)
+        self.assertFalse(second._state.adding)
+        self.assertIsNone(authentication.get_user(0))
+
+    @override_settings(AUTH_USER_CACHE_SIZE=2)
+    def test_least_recently_used_user_is_dropped(self):
+        """Test that the cache holds at most AUTH_USER_CACHE_SIZE users"""
+        first, second, third = self.users
+        for user in (first, second, first, third):
+            self.get(user)
+        self.assertEqual(self.get(first)[1], 0)
+        self.assertEqual(self.get(third)[1], 0)
+        self.assertEqual(self.get(second)[1], 1)
+
+    @override_settings(AUTH_USER_CACHE_SECONDS=0)
+    def test_entries_expire(self):
+        """Test that a user is reloaded once AUTH_USER_CACHE_SECONDS have passed"""
+        self.get(self.user)
+        self.assertEqual(self.get(self.user)[1], 1)
+
+    @override_settings(AUTH_USER_SHARED_CACHE='default')
+    def test_shared_tier(self):
+        """Test that another process's lookups are served from the shared cache until a save"""
+        shared = caches['default']
+        self.addCleanup(shared.delete, authentication.SHARED_KEY.format(self.user.id))
+        self.get(self.user)
+        authentication.clear()
+        self.assertEqual(self.get(self.user)[1], 0)
+
+        self.user.last_name = 'Saved'
+        self.user.save()
+        self.assertIsNone(shared.get(authentication.SHARED_KEY.format(self.user.id)))
+        authentication.clear()
+        response, user_queries = self.get(self.user)
+        self.assertEqual(response.data['last_name'], 'Saved')
+        self.assertEqual(user_queries, 1)
+
+    @override_settings(AUTH_USER_SHARED_CACHE='default')
+    def test_shared_tier_leaves_out_the_password(self):
+        """Test that the password hash is not written to the shared cache"""
+        shared = caches['default']
+        key = authentication.SHARED_KEY.format(self.user.id)
+        self.addCleanup(shared.delete, key)
+        self.get(self.user)
+        self.assertNotIn('password', shared.get(key))
+        self.assertEqual(shared.get(key)['email'], self.user.email)
+
+        authentication.clear()
+        user = authentication.get_user(self.user.id)
+        self.assertTrue(user.check_password('TestPass123!'))
+
+    def test_writes_load_the_user_from_the_database(self):
+        """Test that a profile update does not save a stale cached copy of the user"""
+        self.get(self.user)
+        # Changed by another process: no signal reaches this one's cache
+        User.objects.filter(pk=self.user.pk).update(first_name='Elsewhere')
+
+        token = AccessToken.for_user(self.user)
+        response = self.client.patch(
+            '/auth/users/me/', {'last_name': 'Patched'}, HTTP_AUTHORIZATION=f'JWT {token}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Elsewhere')
+        self.assertEqual(self.user.last_name, 'Patched')
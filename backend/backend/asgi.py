@@ -2,6 +2,8 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests served through it resolve against ``backend.asgi_urls``, which
+routes the public read endpoints to async views (see ``charities.async_read``).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +11,26 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
+
+class AsyncReadASGIHandler(ASGIHandler):
+    urlconf = "backend.asgi_urls"
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+
+def get_asgi_application():
+    # As django.core.asgi.get_asgi_application(), with the handler above
+    django.setup(set_prefix=False)
+    return AsyncReadASGIHandler()
+
+
 application = get_asgi_application()
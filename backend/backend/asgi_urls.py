@@ -0,0 +1,12 @@
+"""
+Root URLconf for ASGI requests: ``backend.urls`` with the charities API
+served by ``charities.async_urls``.
+"""
+from django.urls import include, path
+
+from . import urls
+
+urlpatterns = [
+    path('api/charities/', include('charities.async_urls')),
+    *urls.urlpatterns,
+]
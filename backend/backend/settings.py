@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
+import json
 import os
 
 load_dotenv()
@@ -36,11 +37,15 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split(',')
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "charities.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
 # Update Session settings
@@ -94,6 +99,16 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Users resolved for JWT requests (accounts.authentication): an in-process
+# LRU of AUTH_USER_CACHE_SIZE users, each kept AUTH_USER_CACHE_SECONDS --
+# how long another process may still accept a deactivated user. Set
+# AUTH_USER_SHARED_CACHE to a cache alias shared by all workers to add a
+# second tier behind it.
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '10000'))
+AUTH_USER_CACHE_SECONDS = float(os.getenv('AUTH_USER_CACHE_SECONDS', '10'))
+AUTH_USER_SHARED_CACHE = os.getenv('AUTH_USER_SHARED_CACHE') or None
+AUTH_USER_SHARED_CACHE_SECONDS = int(os.getenv('AUTH_USER_SHARED_CACHE_SECONDS', '300'))
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -111,6 +126,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "charities.timing.ServerTimingMiddleware",
+    "charities.metrics.MetricsMiddleware",
+    "charities.compression.CompressionMiddleware",
+    "charities.replicas.ReplicaMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -155,6 +174,39 @@ DATABASES = {
     }
 }
 
+# Read replicas (see charities.replicas): DB_REPLICAS is a JSON list with
+# one object per replica, of settings that differ from default's, e.g.
+# '[{"HOST": "db-replica-1"}, {"HOST": "db-replica-2"}]'.
+REPLICA_DATABASES = []
+for index, overrides in enumerate(json.loads(os.getenv('DB_REPLICAS', '[]')), start=1):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'], **overrides, 'TEST': {'MIRROR': 'default'}
+    }
+    REPLICA_DATABASES.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['charities.replicas.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write
+REPLICA_PIN_SECONDS = float(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": os.getenv('CACHE_LOCATION', 'charities'),
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+        },
+    }
+}
+
+# Anonymous project list/detail responses (charities.cache)
+PROJECT_CACHE_ALIAS = 'default'
+PROJECT_CACHE_TIMEOUT = 300
+
 
 # Djoser settings
 DJOSER = {
@@ -186,6 +238,54 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 
+# Email outbox worker (python manage.py send_queued_emails)
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30  # doubled after every failed attempt
+OUTBOX_RETRY_MAX_SECONDS = 3600
+OUTBOX_LEASE_SECONDS = 300  # claimed messages are retried after this if the worker dies
+
+# Number of shard rows donations to a project are spread over. 0 updates
+# CharityProject.amount_raised in place; with shards enabled, run
+# python manage.py rollup_amount_raised --loop to fold them back in.
+AMOUNT_RAISED_SHARDS = int(os.getenv('AMOUNT_RAISED_SHARDS', '0'))
+
+# Half-life of a donation's weight in the trending leaderboard
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '24'))
+
+# Projects that ended more than this many days ago are moved to the
+# archive tables by python manage.py archive_projects (see charities.archive)
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '365'))
+
+# Fraction of requests that get a Server-Timing header and a timing log
+# line (see charities.timing), e.g. 0.05 in production; 0 turns it off
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', '0'))
+
+# Bearer token required to scrape /metrics; empty closes it unless DEBUG. Set
+# PROMETHEUS_MULTIPROC_DIR to a shared empty directory for every process
+# (web workers and send_queued_emails) to report through one endpoint.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Responses smaller than this are sent uncompressed (see
+# charities.compression). Brotli is used when the brotli package is
+# installed; quality 0-11 trades CPU for size.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'charities.timing': {
+            'handlers': ['console'],
+            'level': os.getenv('TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
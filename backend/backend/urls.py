@@ -4,11 +4,14 @@ from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
 
+from charities.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.jwt')),
     path('api/charities/', include('charities.urls')),
+    path('metrics', metrics_view, name='metrics'),
     
     re_path(r'^.*', TemplateView.as_view(template_name='index.html'), name='index'),
 ]
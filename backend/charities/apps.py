@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class CharitiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'charities'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_save, pre_delete
+
+        from .models import creator_changed
+        from .timing import install_query_observer
+        connection_created.connect(install_query_observer, dispatch_uid='charities.query_observer')
+        post_save.connect(
+            creator_changed, sender=settings.AUTH_USER_MODEL, dispatch_uid='charities.creator_saved'
+        )
+        pre_delete.connect(
+            creator_changed, sender=settings.AUTH_USER_MODEL, dispatch_uid='charities.creator_deleted'
+        )
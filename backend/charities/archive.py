@@ -0,0 +1,159 @@
+"""
+Hot/cold split of ended projects and their donations.
+
+``archive_projects`` moves projects whose ``end_date`` is more than
+``ARCHIVE_AFTER_DAYS`` in the past, with their donations, from the hot
+tables into ``ArchivedProject``/``ArchivedDonation``. Each batch is one
+transaction of ``INSERT ... SELECT`` and a ``DELETE``, so an interrupted
+run leaves whole projects on one side or the other, and the next run
+carries on from what is still hot. Stats, rollup buckets and pending
+amount shards of an archived project are dropped with it; its pending
+shards are folded into ``amount_raised`` first.
+
+Everything that does not ask for archived data reads only the hot
+tables. ``?include_archived=true`` on the project list and detail, the
+user dashboards and the donation export reads the ``AnyProject`` and
+``AnyDonation`` views instead, which ``UNION ALL`` both sides. The
+full-text index only covers hot projects, so searches that include
+archived projects use ``icontains``.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import cache, search
+from .counters import rollup_amount_shards
+from .models import (
+    AnyDonation, AnyProject, ArchivedDonation, ArchivedProject, CharityProject, Donation
+)
+
+INCLUDE_PARAM = 'include_archived'
+
+PROJECT_COLUMNS = [
+    'id', 'title', 'description', 'goal_amount', 'amount_raised', 'start_date', 'end_date',
+    'location', 'latitude', 'longitude', 'created_at', 'updated_at', 'created_by_id',
+    'percent_funded',
+]
+DONATION_COLUMNS = ['id', 'user_id', 'project_id', 'amount', 'date', 'transaction_id']
+
+
+def includes_archived(request):
+    return request.query_params.get(INCLUDE_PARAM, '').lower() in ('1', 'true', 'yes')
+
+
+def projects(request):
+    """The project model ``request`` reads: hot only, or hot and archived."""
+    return AnyProject if includes_archived(request) else CharityProject
+
+
+def donations(request):
+    return AnyDonation if includes_archived(request) else Donation
+
+
+def cutoff(days=None, today=None):
+    """Projects that ended before this date are due for archiving."""
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    return (today or timezone.localdate()) - timedelta(days=days)
+
+
+def due(before):
+    return CharityProject.objects.filter(end_date__lt=before).order_by('id')
+
+
+@dataclass
+class ArchiveResult:
+    projects: int = 0
+    donations: int = 0
+    batches: int = 0
+
+
+def copy_rows(connection, source, target, columns, ids, key='id', extra=None):
+    """
+    ``INSERT INTO target ... SELECT ... FROM source`` the rows whose ``key``
+    is in ``ids``, with ``extra`` column values added. Returns the row count.
+    """
+    quote = connection.ops.quote_name
+    extra = extra or {}
+    selected = ', '.join(quote(column) for column in columns)
+    inserted = ', '.join(quote(column) for column in [*columns, *extra])
+    values = ''.join(', %s' for _ in extra)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(target)} ({inserted}) '
+            f'SELECT {selected}{values} FROM {quote(source)} '
+            f'WHERE {quote(key)} IN ({placeholders})',
+            [*extra.values(), *ids]
+        )
+        return cursor.rowcount
+
+
+def archive_batch(project_ids, before, using='default'):
+    """
+    Move ``project_ids`` that are still due, with their donations, in one
+    transaction. Returns ``(projects, donations)`` moved.
+    """
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        ids = list(
+            due(before).using(using).select_for_update()
+            .filter(pk__in=project_ids).values_list('id', flat=True)
+        )
+        if not ids:
+            return 0, 0
+        rollup_amount_shards(ids)
+
+        archived_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        projects = copy_rows(
+            connection, CharityProject._meta.db_table, ArchivedProject._meta.db_table,
+            PROJECT_COLUMNS, ids, extra={'archived_at': archived_at}
+        )
+        donations = copy_rows(
+            connection, Donation._meta.db_table, ArchivedDonation._meta.db_table,
+            DONATION_COLUMNS, ids, key='project_id'
+        )
+        # Cascades to the donations, stats, rollup buckets and shards
+        CharityProject.objects.using(using).filter(pk__in=ids).delete()
+        for project_id in ids:
+            search.unindex_project(project_id, using=using)
+            cache.bump_project(project_id)
+    return projects, donations
+
+
+def archive_projects(before, batch_size=100, limit=None, progress=None, using='default'):
+    """
+    Archive every project that ended before ``before``, ``batch_size``
+    projects per transaction, stopping after ``limit`` projects if given.
+    ``progress(result)`` is called after each batch.
+    """
+    result = ArchiveResult()
+    while limit is None or result.projects < limit:
+        size = batch_size if limit is None else min(batch_size, limit - result.projects)
+        ids = list(due(before).using(using).values_list('id', flat=True)[:size])
+        if not ids:
+            break
+        projects, donations = archive_batch(ids, before, using=using)
+        result.projects += projects
+        result.donations += donations
+        result.batches += 1
+        if progress:
+            progress(result)
+    return result
+
+
+class ArchiveReadMixin:
+    """
+    ``?include_archived=true`` makes ``list``, ``retrieve`` and ``export``
+    read hot and archived projects alike.
+    """
+    archive_actions = ('list', 'retrieve', 'export')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.archive_actions and includes_archived(self.request):
+            return AnyProject.objects.select_related('created_by')
+        return queryset
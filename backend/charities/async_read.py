@@ -0,0 +1,158 @@
+"""
+Async read path for the ASGI entry point.
+
+Under ASGI (``backend.asgi``), ``GET``/``HEAD`` requests for the project
+list and detail and the user dashboards are served by coroutine views.
+They run the same DRF objects as the sync views -- authentication,
+permissions, content negotiation, filter backends, the response cache,
+conditional GET, pagination, serializers and the exception handler -- but
+evaluate querysets with the async ORM, so a request waiting on the
+database does not hold a worker thread. Other methods, and requests that
+negotiate a non-JSON renderer (the browsable API), go to the sync view
+unchanged.
+
+Authenticators run synchronously, so a request carrying an
+``Authorization`` header pays one thread hop to load its user; anonymous
+requests stay on the event loop. Cache calls stay synchronous too: the
+default local-memory cache never blocks.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+from . import timing
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class AsyncReadMixin:
+    """
+    ``alist``/``aretrieve``: ``list``/``retrieve`` on the async ORM. Mixins
+    earlier in the MRO wrap these exactly as they wrap the sync actions.
+    """
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            # Same message as get_object_or_404(), which the sync view uses
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+
+def serves_json(view, request):
+    """Whether content negotiation picks a JSON renderer for ``request``."""
+    try:
+        renderer, _ = view.perform_content_negotiation(request)
+    except Exception:
+        # Let the sync view raise it, so the error response is identical
+        return False
+    return renderer.format == 'json'
+
+
+async def dispatch(view, handler, request, *args, **kwargs):
+    """
+    ``APIView.dispatch()`` with an async ``handler``; returns ``None`` when
+    the sync view should serve ``request`` instead.
+    """
+    view.args = args
+    view.kwargs = kwargs
+    request = view.initialize_request(request, *args, **kwargs)
+    view.request = request
+    view.headers = view.default_response_headers
+    view.format_kwarg = view.get_format_suffix(**kwargs)
+    if not serves_json(view, request):
+        return None
+
+    try:
+        if 'HTTP_AUTHORIZATION' in request.META:
+            await sync_to_async(view.initial)(request, *args, **kwargs)
+        else:
+            view.initial(request, *args, **kwargs)
+        response = await handler(request, *args, **kwargs)
+    except Exception as exc:
+        response = view.handle_exception(exc)
+    return render(view.finalize_response(request, response, *args, **kwargs))
+
+
+def render(response):
+    """
+    Render a DRF ``Response`` into a plain ``HttpResponse``. Handing Django
+    an unrendered response would make it render in a worker thread.
+    """
+    if not isinstance(response, Response):
+        return response
+    with timing.span('render'):
+        response.render()
+    rendered = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        rendered[header] = value
+    if hasattr(response, 'compression_cache_key'):
+        rendered.compression_cache_key = response.compression_cache_key
+    return rendered
+
+
+def viewset_view(sync_view):
+    """
+    The async twin of ``sync_view``, a viewset view from a router: ``GET``
+    and ``HEAD`` run the ``a``-prefixed coroutine of the mapped action
+    (``alist`` for ``list``), anything else runs ``sync_view``.
+    """
+    actions = dict(sync_view.actions)
+    actions.setdefault('head', actions['get'])
+
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            instance = sync_view.cls(**sync_view.initkwargs)
+            instance.action_map = actions
+            for method, action in actions.items():
+                setattr(instance, method, getattr(instance, action))
+            handler = getattr(instance, 'a' + actions[request.method.lower()])
+            response = await dispatch(instance, handler, request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+    return view
+
+
+def api_view(sync_view):
+    """
+    Decorate a coroutine as the async read path of ``sync_view``, a
+    function-based ``@api_view``. The coroutine receives the DRF request
+    after authentication and permission checks, like the sync function.
+    """
+    def decorator(handler):
+        @csrf_exempt
+        async def view(request, *args, **kwargs):
+            if request.method in READ_METHODS:
+                response = await dispatch(sync_view.cls(), handler, request, *args, **kwargs)
+                if response is not None:
+                    return response
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        return view
+    return decorator
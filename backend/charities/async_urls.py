@@ -0,0 +1,24 @@
+"""
+URLs for the ASGI entry point: the async read views first, then every
+route from ``charities.urls`` as a fallback. Detail routes only take
+numeric ids here; anything else falls through to the router, which
+answers it as before.
+"""
+from django.urls import include, path, re_path
+
+from . import views
+from .async_read import viewset_view
+from .urls import router
+
+router_views = {pattern.name: pattern.callback for pattern in router.urls}
+
+urlpatterns = [
+    re_path(r'^projects/$', viewset_view(router_views['charity-list']), name='charity-list'),
+    re_path(
+        r'^projects/(?P<pk>[0-9]+)/$', viewset_view(router_views['charity-detail']),
+        name='charity-detail'
+    ),
+    path('donations/user/<int:user_id>/', views.async_user_donations, name='user-donations'),
+    path('projects/user/<int:user_id>/', views.async_user_projects, name='user-projects'),
+    path('', include('charities.urls')),
+]
@@ -0,0 +1,120 @@
+"""
+Benchmark scenarios for the charities API, run with ``manage.py bench``.
+
+Each scenario module exposes ``add_arguments(parser)`` and
+``run(**options)``; ``run`` returns a JSON-serialisable dict of results.
+The command runs scenarios against a throwaway database so the real one
+is never touched.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SCENARIOS = {
+    'api': 'charities.bench.api',
+    'auth': 'charities.bench.auth',
+    'donations': 'charities.bench.donations',
+    'leaderboard': 'charities.bench.leaderboard',
+    'near': 'charities.bench.near',
+    'payload': 'charities.bench.payload',
+    'serialize': 'charities.bench.serialize',
+    'servers': 'charities.bench.servers',
+}
+
+
+def load_scenario(name):
+    return import_module(SCENARIOS[name])
+
+
+@contextmanager
+def scratch_database(alias=DEFAULT_DB_ALIAS):
+    """
+    Create an empty, migrated database for the duration of a benchmark.
+
+    SQLite gets a file database with IMMEDIATE transactions so that worker
+    threads share it and wait on the write lock instead of failing.
+    """
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    saved_test_name = settings_dict['TEST'].get('NAME')
+    saved_options = dict(settings_dict['OPTIONS'])
+    tmpdir = None
+
+    if connection.vendor == 'sqlite':
+        tmpdir = tempfile.mkdtemp(prefix='charities-bench-')
+        settings_dict['TEST']['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+        settings_dict['OPTIONS'].setdefault('transaction_mode', 'IMMEDIATE')
+        settings_dict['OPTIONS'].setdefault('timeout', 30)
+
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        settings_dict['TEST']['NAME'] = saved_test_name
+        settings_dict['OPTIONS'] = saved_options
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def run_threads(count, target):
+    """
+    Run ``target(index)`` on ``count`` threads and return the wall time.
+
+    Each thread closes its own database connections when it finishes.
+    """
+    def wrapper(index):
+        try:
+            target(index)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=wrapper, args=(i,)) for i in range(count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def git_revision():
+    """The checked-out commit, so results can be compared across commits."""
+    try:
+        output = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def percentiles(samples):
+    """
+    p50/p95/p99 and max of a list of durations in seconds, in milliseconds.
+    """
+    if not samples:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None}
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        'p50': pick(0.50),
+        'p95': pick(0.95),
+        'p99': pick(0.99),
+        'max': round(ordered[-1] * 1000, 3),
+    }
@@ -0,0 +1,233 @@
+"""
+Mixed API load: project list, search, detail, user_donations and donations.
+
+Seeds a dataset, then ``--workers`` threads send requests drawn from
+``--mix`` either through the Django test client (in process, no network)
+or over HTTP to a threaded WSGI server on a local port. Reports throughput
+and latency percentiles per endpoint.
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from charities import search, status
+from charities.models import CharityProject
+from charities.stats import rebuild_stats
+
+from . import percentiles, run_threads
+from .seed import WORDS, create_users, seed_donations, seed_projects
+
+ENDPOINTS = ('list', 'search', 'detail', 'user_donations', 'donate')
+DEFAULT_MIX = 'list=4,search=2,detail=3,user_donations=1,donate=1'
+
+
+def parse_mix(value):
+    """``'list=4,donate=1'`` -> ``{'list': 4, 'donate': 1}``."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; expected one of {', '.join(ENDPOINTS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--projects', type=int, default=5000)
+    parser.add_argument('--donations', type=int, default=50_000, help='Donations seeded up front')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per worker')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument(
+        '--driver', choices=['client', 'wsgi'], default='client',
+        help='Django test client in process, or HTTP to a local WSGI server'
+    )
+    parser.add_argument(
+        '--auth-reads', action='store_true',
+        help='Authenticate project reads too, bypassing the anonymous response cache'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+
+
+class ClientDriver:
+    """Requests through the Django test client; one per worker."""
+    def __init__(self):
+        self.client = APIClient()
+
+    def request(self, method, path, params=None, data=None, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'JWT {token}'} if token else {}
+        if method == 'GET':
+            response = self.client.get(path, params, **headers)
+        else:
+            response = self.client.post(path, data, format='json', **headers)
+        return response.status_code
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class WSGIServer:
+    """The project's WSGI application served on a random local port."""
+    def __init__(self):
+        self.httpd = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+        self.httpd.set_app(get_wsgi_application())
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+
+class WSGIDriver:
+    """Plain HTTP requests to a ``WSGIServer``, one connection per request."""
+    def __init__(self, port):
+        self.port = port
+
+    def request(self, method, path, params=None, data=None, token=None):
+        headers = {'Authorization': f'JWT {token}'} if token else {}
+        body = None
+        if params:
+            path = f'{path}?{urlencode(params)}'
+        if data is not None:
+            body = json.dumps(data)
+            headers['Content-Type'] = 'application/json'
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+
+def seed_dataset(users, projects, donations, seed=0, prefix='bench-api'):
+    """Seed accounts, projects and donations; return ``(accounts, project_ids, tokens)``."""
+    accounts = create_users(users, prefix=prefix)
+    seed_projects(projects, accounts, seed=seed)
+    project_ids = list(CharityProject.objects.values_list('id', flat=True))
+    seed_donations(donations, project_ids, accounts, seed=seed, prefix=prefix)
+    rebuild_stats()
+    search.rebuild_index()
+    tokens = [str(AccessToken.for_user(user)) for user in accounts]
+    return accounts, project_ids, tokens
+
+
+def open_project_ids():
+    """Projects that have not ended, so ``donate`` requests are accepted."""
+    return list(
+        CharityProject.objects.exclude(status.condition('ended')).values_list('id', flat=True)
+    )
+
+
+def request_for(name, rng, project_ids, user_id, token, auth_reads=False, open_ids=None):
+    """
+    ``(method, path, params, data, token)`` for one request to endpoint
+    ``name``. Donations go to ``open_ids`` (default ``project_ids``).
+    """
+    read_token = token if auth_reads else None
+    if name == 'list':
+        return 'GET', reverse('charity-list'), {'page_size': 20}, None, read_token
+    if name == 'search':
+        return 'GET', reverse('charity-list'), {'search': rng.choice(WORDS)}, None, read_token
+    if name == 'detail':
+        path = reverse('charity-detail', args=[rng.choice(project_ids)])
+        return 'GET', path, None, None, read_token
+    if name == 'user_donations':
+        return 'GET', reverse('user-donations', args=[user_id]), None, None, token
+    data = {'project': rng.choice(open_ids or project_ids), 'amount': '5.00'}
+    return 'POST', reverse('create-donation'), None, data, token
+
+
+def run(users=100, projects=5000, donations=50_000, workers=8, requests=200, mix=DEFAULT_MIX,
+        driver='client', auth_reads=False, seed=0, **options):
+    if isinstance(mix, str):
+        mix = parse_mix(mix)
+
+    start = time.perf_counter()
+    accounts, project_ids, tokens = seed_dataset(users, projects, donations, seed=seed)
+    open_ids = open_project_ids()
+    seed_time = time.perf_counter() - start
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def worker(index, port=None):
+        rng = random.Random(seed * 1000 + index)
+        client = WSGIDriver(port) if port else ClientDriver()
+        account = index % len(accounts)
+        user_id, token = accounts[account].id, tokens[account]
+        results = []
+        for _ in range(requests):
+            name = rng.choices(names, weights)[0]
+            request = request_for(
+                name, rng, project_ids, user_id, token, auth_reads, open_ids
+            )
+            started = time.perf_counter()
+            status = client.request(*request)
+            results.append((name, time.perf_counter() - started, status))
+        with lock:
+            for name, elapsed, status in results:
+                samples[name].append(elapsed)
+                if status >= 400:
+                    errors[name] += 1
+
+    # The test client and the local server both present non-production hosts
+    with override_settings(ALLOWED_HOSTS=['testserver', '127.0.0.1', 'localhost']):
+        if driver == 'wsgi':
+            with WSGIServer() as server:
+                wall_time = run_threads(workers, lambda index: worker(index, server.port))
+        else:
+            wall_time = run_threads(workers, worker)
+
+    endpoints = {}
+    for name in names:
+        count = len(samples[name])
+        endpoints[name] = {
+            'requests': count,
+            'errors': errors[name],
+            'throughput_rps': round(count / wall_time, 1) if wall_time else None,
+            'latency_ms': percentiles(samples[name]),
+        }
+    total = sum(len(values) for values in samples.values())
+    return {
+        'scenario': 'api',
+        'driver': driver,
+        'users': users,
+        'projects': projects,
+        'seeded_donations': donations,
+        'workers': workers,
+        'requests_per_worker': requests,
+        'mix': mix,
+        'auth_reads': auth_reads,
+        'seed_time_s': round(seed_time, 1),
+        'wall_time_s': round(wall_time, 3),
+        'throughput_rps': round(total / wall_time, 1) if wall_time else None,
+        'errors': sum(errors.values()),
+        'latency_ms': percentiles([s for values in samples.values() for s in values]),
+        'endpoints': endpoints,
+    }
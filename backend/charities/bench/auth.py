@@ -0,0 +1,107 @@
+"""
+Per-request cost of JWT authentication: loading the user vs the user cache.
+
+Seeds ``--users`` users and picks ``--requests`` of them at random, a
+quarter of them distinct, as in a burst of dashboard traffic. Reports,
+for each way of resolving the token's user:
+- ``authenticate()`` latency and database queries per call, with
+  simplejwt's ``JWTAuthentication``, and with ``CachedJWTAuthentication``
+  both cold (the user cache cleared before each call) and warm;
+- latency and queries of an authenticated ``GET`` of the user's projects
+  through the full stack, cold and warm.
+"""
+import random
+import time
+
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import authentication
+
+from . import percentiles
+from .seed import create_users
+
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def timed(calls, call, cold):
+    """Latency percentiles and mean queries of ``call(arg)`` over ``calls``."""
+    samples = []
+    queries = 0
+
+    # Not CaptureQueriesContext: each request through the client resets the query log
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        for arg in calls:
+            if cold:
+                authentication.clear()
+            start = time.perf_counter()
+            call(arg)
+            samples.append(time.perf_counter() - start)
+    return {
+        'latency_ms': percentiles(samples),
+        'queries_per_call': round(queries / len(calls), 2),
+    }
+
+
+def run(users=1000, requests=2000, seed=0, **options):
+    accounts = create_users(users, prefix='bench-auth')
+    rng = random.Random(seed)
+    active = rng.sample(accounts, max(1, min(len(accounts), requests // 4)))
+    picks = [rng.choice(active) for _ in range(requests)]
+    tokens = {user.id: f'JWT {AccessToken.for_user(user)}' for user in active}
+
+    factory = APIRequestFactory()
+    calls = [
+        Request(factory.get('/', HTTP_AUTHORIZATION=tokens[user.id])) for user in picks
+    ]
+
+    def authenticate(authenticator):
+        def call(request):
+            user, _ = authenticator.authenticate(request)
+            assert user.is_active
+        return call
+
+    authentication.clear()
+    authenticate_results = {
+        'uncached': timed(calls, authenticate(JWTAuthentication()), cold=False),
+        'cold': timed(calls, authenticate(authentication.CachedJWTAuthentication()), cold=True),
+        'warm': timed(calls, authenticate(authentication.CachedJWTAuthentication()), cold=False),
+    }
+
+    client = APIClient()
+
+    def get(user):
+        response = client.get(
+            reverse('user-projects', args=[user.id]), HTTP_AUTHORIZATION=tokens[user.id]
+        )
+        assert response.status_code == 200, response.status_code
+
+    authentication.clear()
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        request_results = {
+            'cold': timed(picks, get, cold=True),
+            'warm': timed(picks, get, cold=False),
+        }
+
+    return {
+        'scenario': 'auth',
+        'users': users,
+        'active_users': len(active),
+        'requests': requests,
+        'authenticate': authenticate_results,
+        'request': request_results,
+    }
@@ -0,0 +1,124 @@
+"""
+Concurrent donations against a single hot project.
+
+Every worker thread posts donations through ``create_donation`` for the
+same project. Afterwards the project's ``amount_raised`` must equal the
+sum of all accepted donations; anything else is a lost update.
+"""
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Sum
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from charities.counters import rollup_amount_shards
+from charities.models import CharityProject, Donation
+from charities.views import create_donation
+
+from . import percentiles, run_threads
+
+User = get_user_model()
+
+
+def add_arguments(parser):
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--donations', type=int, default=50, help='Donations per thread')
+    parser.add_argument('--amount', default='1.00')
+    parser.add_argument(
+        '--shards', type=int, default=None,
+        help='Override AMOUNT_RAISED_SHARDS for the run'
+    )
+    parser.add_argument(
+        '--lock-retries', type=int, default=0,
+        help='Resubmit a donation rejected because the database was locked'
+    )
+
+
+def is_lock_error(response):
+    # SQLite reports writer contention as an error instead of waiting when
+    # the database is an in-memory shared-cache one, as in the test suite.
+    # The donation was rolled back, so resubmitting it is safe.
+    return response.status_code == 400 and 'locked' in str(response.data.get('message', ''))
+
+
+def run(threads=8, donations=50, amount='1.00', shards=None, lock_retries=0, **options):
+    amount = Decimal(amount)
+    owner = User.objects.create_user(
+        username='bench-owner', email='bench-owner@example.com',
+        first_name='Bench', last_name='Owner', password='BenchPass123!'
+    )
+    donors = [
+        User.objects.create_user(
+            username=f'bench-donor-{i}', email=f'bench-donor-{i}@example.com',
+            first_name='Bench', last_name='Donor', password='BenchPass123!'
+        )
+        for i in range(threads)
+    ]
+    project = CharityProject.objects.create(
+        title='Hot project',
+        description='Benchmark project every donor gives to',
+        goal_amount=Decimal('99999999.99'),
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=30),
+        created_by=owner
+    )
+
+    factory = APIRequestFactory()
+    latencies = []
+    statuses = []
+    retries = []
+    lock = threading.Lock()
+
+    def worker(index):
+        donor = donors[index]
+        for _ in range(donations):
+            for attempt in range(lock_retries + 1):
+                request = factory.post(
+                    '/api/charities/donations/',
+                    {'project': project.id, 'amount': str(amount)},
+                    format='json'
+                )
+                force_authenticate(request, user=donor)
+                start = time.perf_counter()
+                response = create_donation(request)
+                elapsed = time.perf_counter() - start
+                if attempt < lock_retries and is_lock_error(response):
+                    time.sleep(0.001 * (attempt + 1))
+                    continue
+                break
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(response.status_code)
+                retries.append(attempt)
+
+    settings_override = {} if shards is None else {'AMOUNT_RAISED_SHARDS': shards}
+    with override_settings(**settings_override):
+        wall_time = run_threads(threads, worker)
+        rollup_amount_shards([project.id])
+
+    project.refresh_from_db()
+    accepted = statuses.count(201)
+    recorded_total = Donation.objects.filter(project=project).aggregate(
+        total=Sum('amount')
+    )['total'] or Decimal('0')
+
+    return {
+        'scenario': 'donations',
+        'threads': threads,
+        'attempted': threads * donations,
+        'accepted': accepted,
+        'rejected': len(statuses) - accepted,
+        'lock_retries': sum(retries),
+        'donation_rows': Donation.objects.filter(project=project).count(),
+        'wall_time_s': round(wall_time, 3),
+        'donations_per_s': round(accepted / wall_time, 1) if wall_time else None,
+        'latency_ms': percentiles(latencies),
+        'expected_amount': str(amount * accepted),
+        'recorded_amount': str(recorded_total.quantize(Decimal('0.01'))),
+        'amount_raised': str(project.amount_raised),
+        'lost_amount': str(recorded_total - project.amount_raised),
+    }
@@ -0,0 +1,100 @@
+"""
+Top-N leaderboard reads against ORDER BY over live aggregates.
+
+Trending and most-funded are read from their precomputed indexed columns;
+the baselines rank projects by summing recent donations and by computing
+percent funded per row at query time.
+"""
+import time
+from datetime import timedelta
+
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Sum
+from django.utils import timezone
+
+from charities import leaderboard
+from charities.models import CharityProject
+from charities.stats import rebuild_stats
+
+from . import percentiles
+from .seed import create_users, seed_donations, seed_projects
+
+
+def add_arguments(parser):
+    parser.add_argument('--projects', type=int, default=20_000)
+    parser.add_argument('--donations', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument(
+        '--window-days', type=int, default=7,
+        help='Donation window summed by the live trending baseline'
+    )
+
+
+def time_query(queries, query):
+    samples = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        list(query())
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def run(projects=20_000, donations=200_000, queries=20, limit=10, window_days=7, **options):
+    start = time.perf_counter()
+    owners = create_users(10, prefix='bench-leaderboard')
+    seed_projects(projects, owners)
+    project_ids = list(CharityProject.objects.values_list('id', flat=True))
+    seed_donations(donations, project_ids, owners)
+    seed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rebuild_stats()
+    rebuild_time = time.perf_counter() - start
+
+    since = timezone.now() - timedelta(days=window_days)
+
+    def live_trending():
+        return (
+            CharityProject.objects.annotate(
+                recent=Sum('donations__amount', filter=Q(donations__date__gte=since))
+            )
+            .filter(recent__isnull=False)
+            .order_by('-recent')
+            .values_list('id', 'recent')[:limit]
+        )
+
+    def live_funded():
+        return (
+            CharityProject.objects.annotate(
+                funded=ExpressionWrapper(
+                    F('amount_raised') * 100 / F('goal_amount'), output_field=FloatField()
+                )
+            )
+            .order_by('-funded')
+            .values_list('id', 'funded')[:limit]
+        )
+
+    result = {
+        'scenario': 'leaderboard',
+        'projects': projects,
+        'donations': donations,
+        'queries': queries,
+        'limit': limit,
+        'seed_time_s': round(seed_time, 1),
+        'stats_rebuild_time_s': round(rebuild_time, 1),
+        'trending': {
+            'precomputed_ms': time_query(queries, lambda: leaderboard.top_trending(limit)),
+            'live_aggregate_ms': time_query(queries, live_trending),
+        },
+        'funded': {
+            'precomputed_ms': time_query(queries, lambda: leaderboard.top_funded(limit)),
+            'live_aggregate_ms': time_query(queries, live_funded),
+        },
+    }
+    for ranking in ('trending', 'funded'):
+        timings = result[ranking]
+        if timings['precomputed_ms']['p50']:
+            timings['p50_speedup'] = round(
+                timings['live_aggregate_ms']['p50'] / timings['precomputed_ms']['p50'], 1
+            )
+    return result
@@ -0,0 +1,68 @@
+"""
+?near= lookups over a large synthetic project table.
+
+Compares the bounding-box prefilter (served by project_lat_lng_idx)
+against computing the haversine distance for every row.
+"""
+import random
+import time
+
+from charities import geo
+from charities.models import CharityProject
+
+from . import percentiles
+from .seed import create_users, seed_projects
+
+
+def add_arguments(parser):
+    parser.add_argument('--projects', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--radius-km', type=float, default=50.0)
+    parser.add_argument(
+        '--skip-scan', action='store_true',
+        help='Only time the bounding-box path'
+    )
+
+
+def time_queries(points, radius_km, use_bounding_box):
+    samples = []
+    matches = 0
+    for lat, lng in points:
+        start = time.perf_counter()
+        rows = list(
+            geo.near(CharityProject.objects.all(), lat, lng, radius_km, use_bounding_box)
+            .order_by('distance')
+            .values_list('id', 'distance')[:20]
+        )
+        samples.append(time.perf_counter() - start)
+        matches += len(rows)
+    return {
+        'latency_ms': percentiles(samples),
+        'mean_results': round(matches / len(points), 2) if points else 0,
+    }
+
+
+def run(projects=1_000_000, queries=50, radius_km=50.0, skip_scan=False, **options):
+    start = time.perf_counter()
+    owners = create_users(10, prefix='bench-near')
+    seed_projects(projects, owners)
+    seed_time = time.perf_counter() - start
+
+    rng = random.Random(1)
+    points = [(rng.uniform(-60.0, 70.0), rng.uniform(-180.0, 180.0)) for _ in range(queries)]
+
+    result = {
+        'scenario': 'near',
+        'projects': projects,
+        'queries': queries,
+        'radius_km': radius_km,
+        'seed_time_s': round(seed_time, 1),
+        'bounding_box': time_queries(points, radius_km, use_bounding_box=True),
+    }
+    if not skip_scan:
+        result['full_scan'] = time_queries(points, radius_km, use_bounding_box=False)
+        bbox_p50 = result['bounding_box']['latency_ms']['p50']
+        scan_p50 = result['full_scan']['latency_ms']['p50']
+        if bbox_p50:
+            result['p50_speedup'] = round(scan_p50 / bbox_p50, 1)
+    return result
@@ -0,0 +1,118 @@
+"""
+The project list payload: JSON rendering and compression.
+
+Takes the anonymous project list at each of ``--page-sizes`` and reports:
+- the time to render it with DRF's ``JSONRenderer`` and with
+  ``FastJSONRenderer``, and whether the bytes match;
+- for each available coding, the compressed size, the ratio and the
+  compression time;
+- request latency through the middleware stack with compression
+  negotiated, on a response cache miss and on a hit that reuses the
+  precompressed body.
+
+Renders and compressions are the best of ``--repeat`` runs.
+"""
+import time
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from charities import cache, compression
+from charities.renderers import FastJSONRenderer
+
+from . import percentiles
+from .seed import create_users, seed_projects
+
+
+def parse_sizes(value):
+    sizes = [int(part) for part in value.split(',')]
+    if any(size < 1 for size in sizes):
+        raise ValueError('Page sizes must be positive')
+    return sizes
+
+
+def add_arguments(parser):
+    parser.add_argument('--projects', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument(
+        '--page-sizes', type=parse_sizes, default='20,100',
+        help='Comma-separated ?page_size= values to measure'
+    )
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def best(repeat, func):
+    """``(result, microseconds)`` of the fastest of ``repeat`` calls."""
+    fastest, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if fastest is None or elapsed < fastest:
+            fastest = elapsed
+    return result, round(fastest * 1e6, 1)
+
+
+def request_latency(client, url, params, coding, repeat, warm):
+    samples = []
+    for _ in range(repeat):
+        if not warm:
+            cache.get_cache().clear()
+        start = time.perf_counter()
+        response = client.get(url, params, HTTP_ACCEPT_ENCODING=coding)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200 and response['Content-Encoding'] == coding
+    return percentiles(samples)
+
+
+def measure(client, url, page_size, repeat):
+    params = {'page_size': page_size}
+    cache.get_cache().clear()
+    data = client.get(url, params).data
+
+    drf, drf_us = best(repeat, lambda: JSONRenderer().render(data))
+    fast, fast_us = best(repeat, lambda: FastJSONRenderer().render(data))
+    codings = {}
+    for coding, compress in compression.encoders().items():
+        compressed, compress_us = best(repeat, lambda: compress(fast))
+        codings[coding] = {
+            'bytes': len(compressed),
+            'ratio': round(len(fast) / len(compressed), 1),
+            'compress_us': compress_us,
+            'latency_ms': {
+                'miss': request_latency(client, url, params, coding, repeat, warm=False),
+                'precompressed_hit': request_latency(client, url, params, coding, repeat, warm=True),
+            },
+        }
+
+    return {
+        'page_size': page_size,
+        'items': len(data['results']),
+        'bytes': len(fast),
+        'identical_json': drf == fast,
+        'render_us': {'drf': drf_us, 'fast': fast_us, 'speedup': round(drf_us / fast_us, 1)},
+        'encodings': codings,
+    }
+
+
+def run(projects=2000, users=50, page_sizes=(20, 100), repeat=20, seed=0, **options):
+    if isinstance(page_sizes, str):
+        page_sizes = parse_sizes(page_sizes)
+    owners = create_users(users, prefix='bench-payload')
+    seed_projects(projects, owners, seed=seed)
+
+    client = APIClient()
+    url = reverse('charity-list')
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        results = [measure(client, url, size, repeat) for size in page_sizes]
+
+    return {
+        'scenario': 'payload',
+        'projects': projects,
+        'repeat': repeat,
+        'min_size': compression.settings.COMPRESSION_MIN_SIZE,
+        'pages': results,
+    }
@@ -0,0 +1,87 @@
+"""
+Synthetic data for benchmark scenarios.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from charities.models import CharityProject, Donation
+
+User = get_user_model()
+
+WORDS = (
+    'water school food shelter clinic library garden animal rescue medical '
+    'children elderly community housing youth sports music art education '
+    'relief flood fire refugee health clean energy trees ocean river'
+).split()
+
+
+def create_users(count, prefix='bench-user'):
+    return User.objects.bulk_create([
+        User(
+            username=f'{prefix}-{i}',
+            email=f'{prefix}-{i}@example.com',
+            first_name='Bench',
+            last_name=f'User {i}',
+            password='!'
+        )
+        for i in range(count)
+    ])
+
+
+def seed_projects(count, owners, batch_size=5000, seed=0):
+    """
+    Bulk insert ``count`` projects spread over ``owners`` with random
+    coordinates, text and dates. Returns the number created.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    created = 0
+    while created < count:
+        batch = []
+        for i in range(created, min(created + batch_size, count)):
+            words = rng.sample(WORDS, 6)
+            start = today - timedelta(days=rng.randint(0, 365))
+            batch.append(CharityProject(
+                title=' '.join(words[:3]).title(),
+                description=' '.join(rng.choice(WORDS) for _ in range(60)),
+                goal_amount=Decimal(rng.randint(100, 100000)),
+                amount_raised=Decimal(rng.randint(0, 50000)),
+                start_date=start,
+                end_date=start + timedelta(days=rng.randint(7, 365)),
+                location=words[3].title(),
+                latitude=rng.uniform(-60.0, 70.0),
+                longitude=rng.uniform(-180.0, 180.0),
+                created_by=owners[i % len(owners)]
+            ))
+        CharityProject.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def seed_donations(count, project_ids, donors, batch_size=5000, seed=0, days=30,
+                   prefix='bench-donation'):
+    """
+    Bulk insert ``count`` donations from ``donors`` to random projects,
+    dated over the last ``days`` days. Returns the number created.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    created = 0
+    while created < count:
+        batch = [
+            Donation(
+                user=donors[i % len(donors)],
+                project_id=rng.choice(project_ids),
+                amount=Decimal(rng.randint(1, 500)),
+                transaction_id=f'{prefix}-{i}',
+                date=now - timedelta(seconds=rng.randint(0, days * 86400))
+            )
+            for i in range(created, min(created + batch_size, count))
+        ]
+        Donation.objects.bulk_create(batch)
+        created += len(batch)
+    return created
@@ -0,0 +1,82 @@
+"""
+Per-row cost of project list serialization: ModelSerializer vs .values().
+
+Fetches ``--rows`` projects and serialises them both ways:
+``CharityProjectSerializer`` over model instances (with ``select_related``)
+and ``ProjectValuesSerializer`` over ``.values()`` rows. Fetch, serialize
+and JSON render are timed separately; each is the best of ``--repeat``
+runs, reported in microseconds per row. The two JSON documents must match.
+"""
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from charities.models import CharityProject
+from charities.serializers import CharityProjectSerializer
+from charities.values import ProjectValuesSerializer
+
+from .seed import create_users, seed_projects
+
+
+def add_arguments(parser):
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def best(repeat, func):
+    """``(result, seconds)`` of the fastest of ``repeat`` calls."""
+    fastest, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if fastest is None or elapsed < fastest:
+            fastest = elapsed
+    return result, fastest
+
+
+def measure(rows, repeat, fetch, serialize):
+    objects, fetch_time = best(repeat, fetch)
+    data, serialize_time = best(repeat, lambda: serialize(objects))
+    content, render_time = best(repeat, lambda: JSONRenderer().render(data))
+
+    def per_row(seconds):
+        return round(seconds / rows * 1e6, 2)
+
+    return content, {
+        'fetch_us_per_row': per_row(fetch_time),
+        'serialize_us_per_row': per_row(serialize_time),
+        'render_us_per_row': per_row(render_time),
+        'total_us_per_row': per_row(fetch_time + serialize_time + render_time),
+    }
+
+
+def run(rows=10_000, users=50, repeat=5, seed=0, **options):
+    owners = create_users(users, prefix='bench-serialize')
+    seed_projects(rows, owners, seed=seed)
+    queryset = CharityProject.objects.select_related('created_by').order_by('-created_at', '-id')
+    rows = queryset.count()
+
+    serializer_json, serializer = measure(
+        rows, repeat, lambda: list(queryset.all()),
+        lambda objects: CharityProjectSerializer(objects, many=True).data
+    )
+    values_json, values = measure(
+        rows, repeat, lambda: list(ProjectValuesSerializer.values(queryset)),
+        lambda objects: ProjectValuesSerializer(objects).data
+    )
+
+    return {
+        'scenario': 'serialize',
+        'rows': rows,
+        'repeat': repeat,
+        'identical_json': serializer_json == values_json,
+        'serializer': serializer,
+        'values': values,
+        'serialize_speedup': round(
+            serializer['serialize_us_per_row'] / values['serialize_us_per_row'], 1
+        ),
+        'total_speedup': round(serializer['total_us_per_row'] / values['total_us_per_row'], 1),
+    }
@@ -0,0 +1,295 @@
+"""
+WSGI vs ASGI: how many concurrent connections the same workload sustains.
+
+Serves the project over HTTP twice: the WSGI application on a pool of
+``--threads`` threads (the way a threaded worker serves it), and the ASGI
+application under uvicorn, where the public read endpoints are async
+views. At each ``--connections`` level, that many keep-alive connections
+are opened at once, and each sends ``--requests`` requests drawn from
+``--mix``. A WSGI thread is held by its connection for as long as the
+connection stays open, so once connections outnumber threads, the extra
+ones queue. An event loop keeps all of them in flight. Throughput,
+latency percentiles and errors are reported per server and level.
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.core.management.base import CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+
+from . import percentiles
+from .api import QuietRequestHandler, open_project_ids, parse_mix, request_for, seed_dataset
+
+SERVERS = ('wsgi', 'asgi')
+DEFAULT_MIX = 'list=4,search=2,detail=3,user_donations=1'
+# Listen backlog for both servers, so connections wait rather than fail
+BACKLOG = 2048
+
+
+def parse_levels(value):
+    """``'8,64'`` -> ``[8, 64]``."""
+    levels = [int(part) for part in value.split(',')]
+    if any(level < 1 for level in levels):
+        raise ValueError('Connection counts must be positive')
+    return levels
+
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--projects', type=int, default=2000)
+    parser.add_argument('--donations', type=int, default=20_000, help='Donations seeded up front')
+    parser.add_argument(
+        '--connections', type=parse_levels, default='8,64,256',
+        help='Comma-separated numbers of concurrent connections to try'
+    )
+    parser.add_argument('--requests', type=int, default=20, help='Requests per connection')
+    parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+    parser.add_argument(
+        '--servers', default=','.join(SERVERS), help='Comma-separated subset of wsgi,asgi'
+    )
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument(
+        '--auth-reads', action='store_true',
+        help='Authenticate project reads too, bypassing the anonymous response cache'
+    )
+    parser.add_argument(
+        '--timeout', type=float, default=30.0, help='Seconds before a request counts as failed'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+
+
+class PooledWSGIServer(ThreadedWSGIServer):
+    """``ThreadedWSGIServer`` with a fixed pool instead of a thread per connection."""
+    request_queue_size = BACKLOG
+
+    def __init__(self, *args, threads, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix='wsgi')
+
+    def get_request(self):
+        # As production servers do; otherwise each keep-alive response
+        # waits out a delayed ACK between its header and body writes
+        request, client_address = super().get_request()
+        request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return request, client_address
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown()
+
+
+class WSGIServer:
+    """The project's WSGI application on ``threads`` threads, on a random local port."""
+    def __init__(self, threads):
+        self.httpd = PooledWSGIServer(('127.0.0.1', 0), QuietRequestHandler, threads=threads)
+        self.httpd.set_app(get_wsgi_application())
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+
+class ASGIServer:
+    """``backend.asgi.application`` under uvicorn, on a random local port."""
+    def __init__(self):
+        import uvicorn
+
+        from backend.asgi import application
+
+        self.server = uvicorn.Server(uvicorn.Config(
+            application, host='127.0.0.1', port=0, lifespan='off', log_level='warning',
+            access_log=False, backlog=BACKLOG
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.port = None
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError('uvicorn failed to start')
+            time.sleep(0.01)
+        self.port = self.server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def read_body(reader, headers):
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                return
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+
+
+async def exchange(reader, writer, method, target, body, headers):
+    """Send one HTTP/1.1 request; return ``(status, keep_alive)``."""
+    lines = [f'{method} {target} HTTP/1.1', 'Host: 127.0.0.1']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    if body is not None:
+        lines += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+    writer.write('\r\n'.join(lines).encode() + b'\r\n\r\n' + (body or b''))
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+    await read_body(reader, response_headers)
+    keep_alive = (
+        response_headers.get('connection', '').lower() != 'close'
+        and ('content-length' in response_headers or 'transfer-encoding' in response_headers)
+    )
+    return status, keep_alive
+
+
+async def connection(port, requests, next_request, timeout):
+    """One keep-alive connection sending ``requests`` requests in turn."""
+    reader = writer = None
+    results = []
+    try:
+        for _ in range(requests):
+            name, method, target, body, headers = next_request()
+            started = time.perf_counter()
+            keep_alive = False
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection('127.0.0.1', port), timeout
+                    )
+                status, keep_alive = await asyncio.wait_for(
+                    exchange(reader, writer, method, target, body, headers), timeout
+                )
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    ValueError, IndexError):
+                status = None
+            results.append((name, time.perf_counter() - started, status))
+            if not keep_alive and writer is not None:
+                writer.close()
+                writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+    return results
+
+
+def run_level(port, count, requests, make_request, timeout):
+    """``count`` concurrent connections; return ``(results, wall_time)``."""
+    async def main():
+        return await asyncio.gather(*[
+            connection(port, requests, make_request(index), timeout) for index in range(count)
+        ])
+
+    start = time.perf_counter()
+    per_connection = asyncio.run(main())
+    wall_time = time.perf_counter() - start
+    return [result for results in per_connection for result in results], wall_time
+
+
+def summarise(count, results, wall_time):
+    errors = sum(1 for _, _, status in results if status is None or status >= 400)
+    return {
+        'connections': count,
+        'requests': len(results),
+        'errors': errors,
+        'wall_time_s': round(wall_time, 3),
+        'throughput_rps': round(len(results) / wall_time, 1) if wall_time else None,
+        'latency_ms': percentiles([elapsed for _, elapsed, _ in results]),
+    }
+
+
+def run(users=100, projects=2000, donations=20_000, connections=(8, 64, 256), requests=20,
+        threads=8, servers='wsgi,asgi', mix=DEFAULT_MIX, auth_reads=False, timeout=30.0,
+        seed=0, **options):
+    if isinstance(mix, str):
+        mix = parse_mix(mix)
+    if isinstance(connections, str):
+        connections = parse_levels(connections)
+    servers = [name.strip() for name in servers.split(',')]
+    unknown = set(servers) - set(SERVERS)
+    if unknown:
+        raise CommandError(f"Unknown server {', '.join(sorted(unknown))}; expected wsgi or asgi")
+    if 'asgi' in servers:
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('The asgi server needs uvicorn: pip install uvicorn')
+
+    start = time.perf_counter()
+    accounts, project_ids, tokens = seed_dataset(users, projects, donations, seed=seed)
+    open_ids = open_project_ids()
+    seed_time = time.perf_counter() - start
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    def make_request(index):
+        rng = random.Random(seed * 1000 + index)
+        account = index % len(accounts)
+        user_id, token = accounts[account].id, tokens[account]
+
+        def next_request():
+            name = rng.choices(names, weights)[0]
+            method, path, params, data, auth = request_for(
+                name, rng, project_ids, user_id, token, auth_reads, open_ids
+            )
+            target = f'{path}?{urlencode(params)}' if params else path
+            body = json.dumps(data).encode() if data is not None else None
+            headers = {'Authorization': f'JWT {auth}'} if auth else {}
+            return name, method, target, body, headers
+        return next_request
+
+    results = {}
+    with override_settings(ALLOWED_HOSTS=['127.0.0.1', 'localhost']):
+        for name in servers:
+            results[name] = []
+            for count in connections:
+                server = WSGIServer(threads) if name == 'wsgi' else ASGIServer()
+                with server:
+                    level, wall_time = run_level(
+                        server.port, count, requests, make_request, timeout
+                    )
+                results[name].append(summarise(count, level, wall_time))
+
+    return {
+        'scenario': 'servers',
+        'users': users,
+        'projects': projects,
+        'seeded_donations': donations,
+        'wsgi_threads': threads,
+        'requests_per_connection': requests,
+        'mix': mix,
+        'auth_reads': auth_reads,
+        'seed_time_s': round(seed_time, 1),
+        'servers': results,
+    }
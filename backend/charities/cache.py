@@ -0,0 +1,228 @@
+"""
+Versioned cache for anonymous project list and detail responses.
+
+Keys embed a global catalog version (list) or a per-project version
+(detail) plus a hash of the query string. Writes never delete keys; they
+bump the version so every stale entry is simply never read again and
+ages out of the cache. ``CompressionMiddleware`` caches compressed
+bodies of these responses under the same keys. Entries are computed on
+the primary database, never a replica (see ``charities.replicas``).
+"""
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import Http404
+from rest_framework.response import Response
+
+from . import replicas
+
+CATALOG_VERSION_KEY = 'charities:catalog:version'
+PROJECT_VERSION_KEY = 'charities:project:{}:version'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_cache():
+    return caches[getattr(settings, 'PROJECT_CACHE_ALIAS', 'default')]
+
+
+def cache_timeout():
+    return getattr(settings, 'PROJECT_CACHE_TIMEOUT', 300)
+
+
+def _new_version():
+    # Never restart from a small number after eviction, or old entries
+    # could become readable again
+    return time.time_ns()
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def _versions(*keys):
+    cache = get_cache()
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def bump_project(project_id):
+    """
+    Invalidate cached responses for one project and the catalog.
+
+    Bumped immediately and again after commit: a reader that cached the
+    pre-commit state in between is invalidated by the second bump.
+    """
+    bump_projects([project_id])
+
+
+def bump_projects(project_ids):
+    """``bump_project()`` for several projects, bumping the catalog once."""
+    def bump():
+        for project_id in project_ids:
+            _bump(PROJECT_VERSION_KEY.format(project_id))
+        _bump(CATALOG_VERSION_KEY)
+    bump()
+    transaction.on_commit(bump)
+
+
+def query_hash(request):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    return hashlib.md5(query.encode()).hexdigest()
+
+
+def list_key(request):
+    version, = _versions(CATALOG_VERSION_KEY)
+    return f'charities:list:{version}:{query_hash(request)}'
+
+
+def detail_key(request, project_id):
+    version, = _versions(PROJECT_VERSION_KEY.format(project_id))
+    return f'charities:detail:{project_id}:{version}:{query_hash(request)}'
+
+
+def _remember_key(name, project_id):
+    if project_id is None:
+        version, = _versions(CATALOG_VERSION_KEY)
+        return f'charities:{name}:{version}'
+    version, = _versions(PROJECT_VERSION_KEY.format(project_id))
+    return f'charities:{name}:{project_id}:{version}'
+
+
+def remember(name, compute, project_id=None):
+    """
+    Cache ``compute()`` under the catalog version, or the project version
+    when ``project_id`` is given, so it is recomputed only after a write.
+    """
+    key = _remember_key(name, project_id)
+    cache = get_cache()
+    value = cache.get(key)
+    if value is None:
+        with replicas.primary():
+            value = compute()
+        cache.set(key, value, cache_timeout())
+    return value
+
+
+async def aremember(name, compute, project_id=None):
+    """``remember()`` for a coroutine function ``compute``."""
+    key = _remember_key(name, project_id)
+    cache = get_cache()
+    value = cache.get(key)
+    if value is None:
+        with replicas.primary():
+            value = await compute()
+        cache.set(key, value, cache_timeout())
+    return value
+
+
+def record(hit):
+    with _stats_lock:
+        _stats['hits' if hit else 'misses'] += 1
+
+
+def stats():
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats['hits'] = _stats['misses'] = 0
+
+
+class CachedReadMixin:
+    """
+    Serve anonymous ``list``/``retrieve`` from the versioned cache.
+    """
+    def get_response_cache_key(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return None
+        if self.action == 'list':
+            return list_key(request)
+        if self.action == 'retrieve':
+            # Key on the id that bump_project() invalidates, so /projects/01/
+            # shares the entry of /projects/1/
+            try:
+                project_id = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+            except ValueError:
+                raise Http404
+            return detail_key(request, project_id)
+        return None
+
+    def cached_response(self, request, view, *args, **kwargs):
+        key = self.get_response_cache_key(request, *args, **kwargs)
+        if key is None:
+            return view(request, *args, **kwargs)
+        hit = self.cache_hit(key)
+        if hit is not None:
+            return hit
+        with replicas.primary():
+            response = view(request, *args, **kwargs)
+        return self.cache_store(key, response)
+
+    async def acached_response(self, request, view, *args, **kwargs):
+        key = self.get_response_cache_key(request, *args, **kwargs)
+        if key is None:
+            return await view(request, *args, **kwargs)
+        hit = self.cache_hit(key)
+        if hit is not None:
+            return hit
+        with replicas.primary():
+            response = await view(request, *args, **kwargs)
+        return self.cache_store(key, response)
+
+    def cache_hit(self, key):
+        data = get_cache().get(key)
+        record(hit=data is not None)
+        if data is None:
+            return None
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return self.precompressible(response, key)
+
+    def cache_store(self, key, response):
+        response['X-Cache'] = 'MISS'
+        if response.status_code != 200:
+            return response
+        get_cache().set(key, response.data, cache_timeout())
+        return self.precompressible(response, key)
+
+    def precompressible(self, response, key):
+        # CompressionMiddleware caches the compressed body under this key;
+        # the same data renders differently per media type (e.g. indent=)
+        media_type = self.request.accepted_media_type.replace(' ', '')
+        response.compression_cache_key = f'{key}:{media_type}'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(request, super().alist, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(request, super().aretrieve, *args, **kwargs)
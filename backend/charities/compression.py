@@ -0,0 +1,140 @@
+"""
+Negotiated response compression: brotli when installed, else gzip.
+
+``CompressionMiddleware`` compresses JSON responses once they are
+``COMPRESSION_MIN_SIZE`` bytes or more, with the coding the client
+prefers in ``Accept-Encoding`` (brotli wins ties). Smaller bodies are not
+worth the CPU and the header bytes. Streaming responses (the donation
+exports) are left alone. HTML (admin pages, the browsable API) carries
+CSRF tokens next to reflected input, so it is never compressed, against
+BREACH; gzip bodies are also padded with random bytes as Django's
+``GZipMiddleware`` does.
+
+Compressed bodies of responses served through the response cache (see
+``charities.cache``) are cached too, under the response's versioned key,
+so a cache hit is not compressed again; a write bumps the version and
+retires them with the cached data.
+"""
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from . import cache, timing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(r'^(application/json|[^;]*\+json)', re.IGNORECASE)
+
+
+def brotli_compress(content):
+    return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+
+def gzip_compress(content):
+    return compress_string(content, max_random_bytes=100)
+
+
+def encoders():
+    """Content coding -> compressor, in order of preference."""
+    available = {'br': brotli_compress} if brotli is not None else {}
+    available['gzip'] = gzip_compress
+    return available
+
+
+def parse_accept_encoding(header):
+    """``'gzip, br;q=0.5'`` -> ``{'gzip': 1.0, 'br': 0.5}``."""
+    weights = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        name, _, value = params.partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+    return weights
+
+
+def negotiate(header):
+    """The preferred coding we support for ``Accept-Encoding: header``, or ``None``."""
+    weights = parse_accept_encoding(header)
+    best, best_weight = None, 0.0
+    for coding in encoders():
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compressible(response):
+    return (
+        not response.streaming
+        and not response.has_header('Content-Encoding')
+        and COMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))
+        and len(response.content) >= settings.COMPRESSION_MIN_SIZE
+    )
+
+
+def compressed_content(response, coding):
+    key = getattr(response, 'compression_cache_key', None)
+    if key is None:
+        return encoders()[coding](response.content)
+
+    key = f'{key}:{coding}'
+    content = cache.get_cache().get(key)
+    if content is None:
+        content = encoders()[coding](response.content)
+        cache.get_cache().set(key, content, cache.cache_timeout())
+    return content
+
+
+def compress(request, response):
+    if not compressible(response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    coding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if coding is None:
+        return response
+
+    with timing.span('compress'):
+        content = compressed_content(response, coding)
+    if len(content) >= len(response.content):
+        return response
+
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    response['Content-Encoding'] = coding
+    # The body changed, so a strong validator no longer applies to it
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return compress(request, await self.get_response(request))
@@ -0,0 +1,162 @@
+"""
+ETag / Last-Modified validators for the project endpoints.
+
+Validators come from one cheap probe: the project's ``updated_at`` for
+detail, ``MAX(updated_at)`` and ``COUNT(*)`` over the catalog for list.
+A matching ``If-None-Match``/``If-Modified-Since`` is answered with 304
+before the queryset is evaluated or anything is serialised. The list has
+an ETag but no Last-Modified: ``MAX(updated_at)`` does not advance when a
+project is deleted or archived, while the count in the ETag does. Saving a
+user touches ``updated_at`` of their projects, which embed them as
+``created_by`` (see ``models.creator_changed``). Lists filtered by
+``?status=`` also get a new ETag each day.
+
+Probe results are remembered under the same versions as the response
+cache (see ``charities.cache``), so the probe runs once per write.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import cache
+from .models import CharityProject
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest())
+
+
+def _project_probe(project_id):
+    return CharityProject.objects.filter(pk=project_id).values_list('updated_at', flat=True)
+
+
+def _project_result(project_id, updated_at):
+    if updated_at is None:
+        return None, None
+    return make_etag('project', project_id, updated_at.isoformat()), updated_at
+
+
+def _catalog_aggregates():
+    return {'last_modified': Max('updated_at'), 'count': Count('id')}
+
+
+def _catalog_result(result):
+    last_modified = result['last_modified']
+    return (
+        make_etag('catalog', result['count'], last_modified.isoformat() if last_modified else ''),
+        None,
+    )
+
+
+def project_validators(project_id):
+    def probe():
+        return _project_result(project_id, _project_probe(project_id).first())
+    return cache.remember('validators', probe, project_id=project_id)
+
+
+def catalog_validators():
+    def probe():
+        return _catalog_result(CharityProject.objects.aggregate(**_catalog_aggregates()))
+    return cache.remember('validators', probe)
+
+
+async def aproject_validators(project_id):
+    async def probe():
+        return _project_result(project_id, await _project_probe(project_id).afirst())
+    return await cache.aremember('validators', probe, project_id=project_id)
+
+
+async def acatalog_validators():
+    async def probe():
+        return _catalog_result(await CharityProject.objects.aaggregate(**_catalog_aggregates()))
+    return await cache.aremember('validators', probe)
+
+
+class ConditionalReadMixin:
+    """
+    Answer conditional GETs on ``list``/``retrieve`` with 304 and tag full
+    responses with ``ETag``, and ``Last-Modified`` on ``retrieve``.
+    """
+    def get_validators(self, request, *args, **kwargs):
+        if self.action == 'list':
+            return self.dated(request, *catalog_validators())
+        project_id = self.get_project_id(kwargs)
+        if project_id is None:
+            return None, None
+        return project_validators(project_id)
+
+    async def aget_validators(self, request, *args, **kwargs):
+        if self.action == 'list':
+            return self.dated(request, *await acatalog_validators())
+        project_id = self.get_project_id(kwargs)
+        if project_id is None:
+            return None, None
+        return await aproject_validators(project_id)
+
+    def dated(self, request, etag, last_modified):
+        # ?status= results change at midnight without any write
+        if request.query_params.get('status'):
+            etag = make_etag(etag, timezone.localdate())
+        return etag, last_modified
+
+    def get_project_id(self, kwargs):
+        if self.action != 'retrieve':
+            return None
+        try:
+            return int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            return None
+
+    def conditional_response(self, request, view, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        if etag is None:
+            return view(request, *args, **kwargs)
+        not_modified = self.not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return self.tag_response(view(request, *args, **kwargs), etag, last_modified)
+
+    async def aconditional_response(self, request, view, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await view(request, *args, **kwargs)
+        etag, last_modified = await self.aget_validators(request, *args, **kwargs)
+        if etag is None:
+            return await view(request, *args, **kwargs)
+        not_modified = self.not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return self.tag_response(await view(request, *args, **kwargs), etag, last_modified)
+
+    @staticmethod
+    def timestamp(last_modified):
+        return int(last_modified.timestamp()) if last_modified else None
+
+    def not_modified(self, request, etag, last_modified):
+        return get_conditional_response(
+            request, etag=etag, last_modified=self.timestamp(last_modified)
+        )
+
+    def tag_response(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response['ETag'] = etag
+            timestamp = self.timestamp(last_modified)
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, super().alist, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, super().aretrieve, *args, **kwargs)
@@ -0,0 +1,97 @@
+import random
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import cache
+from .models import AmountRaisedShard, CharityProject
+
+
+def shard_count():
+    return getattr(settings, 'AMOUNT_RAISED_SHARDS', 0)
+
+
+def add_to_amount_raised(project_id, amount):
+    """
+    Atomically add ``amount`` to a project's total without reading it first.
+
+    With ``AMOUNT_RAISED_SHARDS`` unset the project row is incremented in
+    place. Otherwise the amount lands on one of N shard rows and is folded
+    into ``amount_raised`` later by ``rollup_amount_shards``.
+    """
+    cache.bump_project(project_id)
+    shards = shard_count()
+    if not shards:
+        CharityProject.objects.filter(pk=project_id).update(
+            amount_raised=F('amount_raised') + amount,
+            updated_at=timezone.now()
+        )
+        return
+
+    shard = random.randrange(shards)
+    updated = AmountRaisedShard.objects.filter(
+        project_id=project_id, shard=shard
+    ).update(amount=F('amount') + amount)
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            AmountRaisedShard.objects.create(project_id=project_id, shard=shard, amount=amount)
+    except IntegrityError:
+        # Another donor created the shard first
+        AmountRaisedShard.objects.filter(
+            project_id=project_id, shard=shard
+        ).update(amount=F('amount') + amount)
+
+
+def current_amount_raised(project_id):
+    """
+    Project total including amounts still sitting in shards.
+    """
+    project_amount = CharityProject.objects.filter(pk=project_id).values_list(
+        'amount_raised', flat=True
+    ).get()
+    pending = AmountRaisedShard.objects.filter(project_id=project_id).aggregate(
+        total=Sum('amount')
+    )['total']
+    return project_amount + (pending or Decimal('0'))
+
+
+def rollup_amount_shards(project_ids=None):
+    """
+    Fold pending shard amounts into ``CharityProject.amount_raised``.
+
+    Each shard is decremented by exactly the amount that was read, so
+    donations landing during the rollup are kept for the next pass.
+    Returns the number of projects updated.
+    """
+    pending = AmountRaisedShard.objects.exclude(amount=0)
+    if project_ids is not None:
+        pending = pending.filter(project_id__in=project_ids)
+
+    rolled_up = 0
+    for project_id in pending.values_list('project_id', flat=True).distinct().order_by():
+        with transaction.atomic():
+            shards = list(
+                AmountRaisedShard.objects.select_for_update()
+                .filter(project_id=project_id)
+                .exclude(amount=0)
+            )
+            total = sum((shard.amount for shard in shards), Decimal('0'))
+            if not total:
+                continue
+            for shard in shards:
+                AmountRaisedShard.objects.filter(pk=shard.pk).update(
+                    amount=F('amount') - shard.amount
+                )
+            CharityProject.objects.filter(pk=project_id).update(
+                amount_raised=F('amount_raised') + total,
+                updated_at=timezone.now()
+            )
+            cache.bump_project(project_id)
+            rolled_up += 1
+    return rolled_up
@@ -0,0 +1,123 @@
+"""
+Sparse fieldsets: ``?fields=`` and ``?omit=``.
+
+``?fields=id,title`` keeps only the listed top-level fields of each item;
+``?omit=description`` drops the listed ones. Both take comma-separated
+serializer field names and can be combined; unknown names are a 400.
+Besides trimming the output, the queryset is narrowed with ``only()`` to
+the columns the remaining fields read, and relations whose nested
+serializer was left out are dropped from ``select_related``, so neither
+their columns nor their joins are fetched.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fields(request, serializer_class):
+    """
+    The field names of ``serializer_class`` selected by ``request``, in
+    declaration order, or ``None`` when neither parameter is given.
+    """
+    params = {
+        param: split(request.query_params[param])
+        for param in (FIELDS_PARAM, OMIT_PARAM) if param in request.query_params
+    }
+    if not params:
+        return None
+
+    available = list(serializer_class().fields)
+    for param, names in params.items():
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValidationError({
+                param: f"Unknown fields: {', '.join(unknown)}. "
+                       f"Must be among: {', '.join(available)}."
+            })
+
+    selected = params.get(FIELDS_PARAM) or available
+    omitted = params.get(OMIT_PARAM, [])
+    return [name for name in available if name in selected and name not in omitted]
+
+
+def model_columns(serializer, prefix=''):
+    """
+    ``(columns, relations)`` read by ``serializer``'s fields: the ``only()``
+    arguments and the ``select_related()`` paths. ``None`` when a field
+    reads something other than model fields (``source='*'``).
+    """
+    columns, relations = [], []
+    for field in serializer._readable_fields:
+        if field.source == '*':
+            return None
+        source = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.BaseSerializer):
+            nested = model_columns(field, source + '__')
+            if nested is None:
+                return None
+            relations.append(source)
+            columns.extend(nested[0])
+            relations.extend(nested[1])
+        else:
+            columns.append(source)
+    return columns, relations
+
+
+def narrow(queryset, serializer_class, fields):
+    """
+    ``queryset`` loading only what ``serializer_class(fields=fields)``
+    outputs. Returned unchanged when ``fields`` is ``None`` or the
+    serializer reads more than plain model fields.
+    """
+    if fields is None:
+        return queryset
+    read = model_columns(serializer_class(fields=fields))
+    if read is None:
+        return queryset
+    columns, relations = read
+    queryset = queryset.select_related(None)
+    if relations:
+        # select_related() with no arguments would follow every relation
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*columns)
+
+
+class SparseFieldsSerializerMixin:
+    """Accept ``fields=[...]`` to keep only those fields, as from ``requested_fields()``."""
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=``/``?omit=`` for the ``list`` and ``retrieve`` actions. The
+    serializer must accept ``fields=``, as ``SparseFieldsSerializerMixin``
+    does.
+    """
+    sparse_field_actions = ('list', 'retrieve')
+
+    def get_sparse_fields(self):
+        if self.action not in self.sparse_field_actions:
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = requested_fields(self.request, self.get_serializer_class())
+        return self._sparse_fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return narrow(queryset, self.get_serializer_class(), self.get_sparse_fields())
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
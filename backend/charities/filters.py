@@ -0,0 +1,90 @@
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from . import geo, search, status
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` backed by the database's full-text index (see
+    ``charities.search``). Results are ranked by relevance unless the
+    client asks for another ``?ordering=``. Falls back to the
+    ``icontains`` lookups of ``SearchFilter`` on other databases, and for
+    ``?include_archived=true``.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        results = search.search(queryset, terms)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        return results.order_by('-search_rank')
+
+
+class NearFilter(filters.BaseFilterBackend):
+    """
+    ``?near=lat,lng&radius_km=`` keeps projects within the radius and
+    annotates them with ``distance`` (km), so ``?ordering=distance`` works.
+    """
+    near_param = 'near'
+    radius_param = 'radius_km'
+    default_radius_km = 10.0
+    max_radius_km = 20000.0
+
+    def filter_queryset(self, request, queryset, view):
+        near = request.query_params.get(self.near_param)
+        if not near:
+            return queryset
+
+        try:
+            lat, lng = (float(part) for part in near.split(','))
+        except ValueError:
+            raise ValidationError({self.near_param: 'Expected "latitude,longitude".'})
+        if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+            raise ValidationError({self.near_param: 'Coordinates out of range.'})
+
+        try:
+            radius_km = float(request.query_params.get(self.radius_param, self.default_radius_km))
+        except ValueError:
+            raise ValidationError({self.radius_param: 'A number is required.'})
+        if not (0 < radius_km <= self.max_radius_km):
+            raise ValidationError({
+                self.radius_param: f'Must be between 0 and {self.max_radius_km:g}.'
+            })
+
+        return geo.near(queryset, lat, lng, radius_km)
+
+
+class ProjectStatusFilter(filters.BaseFilterBackend):
+    """
+    ``?status=active|upcoming|ended|funded`` keeps projects in that
+    campaign status today (see ``charities.status``).
+    """
+    status_param = 'status'
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.status_param)
+        if not value:
+            return queryset
+        if value not in status.STATUSES:
+            raise ValidationError({
+                self.status_param: f"Must be one of: {', '.join(status.STATUSES)}."
+            })
+        return status.with_status(queryset, value)
+
+
+class ProjectOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that only accepts annotation-backed fields such as
+    ``distance`` when an earlier filter has added the annotation.
+    """
+    annotation_fields = ['distance']
+
+    def get_valid_fields(self, queryset, view, context={}):
+        valid_fields = super().get_valid_fields(queryset, view, context)
+        return [
+            (field, label) for field, label in valid_fields
+            if field not in self.annotation_fields or field in queryset.query.annotations
+        ]
@@ -0,0 +1,64 @@
+"""
+"Projects near me" without PostGIS.
+
+Candidates are pruned with a latitude/longitude bounding box, which the
+``project_lat_lng_idx`` index answers as a range scan, and only those are
+checked against the exact haversine distance.
+"""
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Q for the lat/lng box enclosing the circle, split in two across the
+    antimeridian and left open in longitude when the circle covers a pole.
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    box = Q(latitude__gte=max(min_lat, -90.0), latitude__lte=min(max_lat, 90.0))
+
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return box & Q(longitude__isnull=False)
+
+    delta_lng = math.degrees(
+        math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat))))
+    )
+    min_lng, max_lng = lng - delta_lng, lng + delta_lng
+    if delta_lng >= 180.0:
+        return box & Q(longitude__isnull=False)
+    if min_lng < -180.0:
+        return box & (Q(longitude__gte=min_lng + 360.0) | Q(longitude__lte=max_lng))
+    if max_lng > 180.0:
+        return box & (Q(longitude__gte=min_lng) | Q(longitude__lte=max_lng - 360.0))
+    return box & Q(longitude__gte=min_lng, longitude__lte=max_lng)
+
+
+def haversine(lat, lng):
+    """
+    Great-circle distance in kilometres from (lat, lng) to each row.
+    """
+    lat_rad = math.radians(lat)
+    lng_rad = math.radians(lng)
+    delta_lat = (Radians(F('latitude')) - Value(lat_rad)) / 2
+    delta_lng = (Radians(F('longitude')) - Value(lng_rad)) / 2
+    a = (
+        Power(Sin(delta_lat), 2)
+        + Value(math.cos(lat_rad)) * Cos(Radians(F('latitude'))) * Power(Sin(delta_lng), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def near(queryset, lat, lng, radius_km, use_bounding_box=True):
+    """
+    Projects within ``radius_km`` of (lat, lng), annotated with ``distance``.
+    """
+    if use_bounding_box:
+        queryset = queryset.filter(bounding_box(lat, lng, radius_km))
+    else:
+        queryset = queryset.filter(latitude__isnull=False, longitude__isnull=False)
+    return queryset.annotate(distance=haversine(lat, lng)).filter(distance__lte=radius_km)
@@ -0,0 +1,50 @@
+"""
+Top-N project rankings served from precomputed, indexed columns.
+
+Both rankings are an index scan stopped after ``limit`` rows: trending
+walks stats_trending_score_idx and most-funded walks
+project_percent_funded_idx, so neither sorts the project table.
+
+Trending picks its top ids in a subquery on the stats index and joins the
+projects to those alone. Joined directly, the planner may drive from the
+project table when the stats table is empty or was analyzed before the
+stats backfill.
+"""
+from django.utils import timezone
+
+from . import trending
+from .models import CharityProject, ProjectStats
+
+RANKINGS = ('trending', 'funded')
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+
+def top_trending(limit=DEFAULT_LIMIT, now=None):
+    """``(project, decayed score)`` pairs, highest score first."""
+    now = now or timezone.now()
+    top = (
+        ProjectStats.objects.filter(trending_score__isnull=False)
+        .order_by('-trending_score').values('project_id')[:limit]
+    )
+    rows = (
+        ProjectStats.objects.filter(project_id__in=top)
+        .select_related('project__created_by')
+        .order_by('-trending_score')
+    )
+    return [(row.project, trending.current_score(row.trending_score, now)) for row in rows]
+
+
+def top_funded(limit=DEFAULT_LIMIT):
+    """``(project, percent funded)`` pairs, most funded first."""
+    projects = (
+        CharityProject.objects.select_related('created_by')
+        .order_by('-percent_funded', '-id')[:limit]
+    )
+    return [(project, project.percent_funded) for project in projects]
+
+
+def top_projects(by, limit=DEFAULT_LIMIT):
+    if by == 'trending':
+        return top_trending(limit)
+    return top_funded(limit)
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from charities import archive
+
+
+class Command(BaseCommand):
+    help = 'Move projects that ended long ago, with their donations, to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Archive projects that ended more than this many days ago '
+                 '(default: ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Projects moved per transaction'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Stop after archiving this many projects'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count the projects that would be archived'
+        )
+
+    def handle(self, *args, **options):
+        before = archive.cutoff(options['days'])
+        if options['dry_run']:
+            due = archive.due(before).count()
+            self.stdout.write(f"Would archive {due} project(s) that ended before {before}")
+            return
+
+        def progress(result):
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f"Archived {result.projects} project(s) and {result.donations} donation(s)"
+                )
+
+        result = archive.archive_projects(
+            before, batch_size=options['batch_size'], limit=options['limit'], progress=progress
+        )
+        self.stdout.write(
+            f"Archived {result.projects} project(s) and {result.donations} donation(s) "
+            f"that ended before {before}"
+        )
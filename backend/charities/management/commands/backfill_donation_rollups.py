@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from charities.stats import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the hourly and daily donation buckets from the donations table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project', type=int, action='append', dest='projects',
+            help='Only backfill this project (may be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        backfilled = backfill_rollups(options['projects'])
+        self.stdout.write(f"Backfilled donation rollups for {backfilled} project(s)")
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from charities.bench import SCENARIOS, git_revision, load_scenario, scratch_database
+
+
+class Command(BaseCommand):
+    help = 'Run a charities benchmark scenario against a scratch database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Also write the JSON result to this file'
+        )
+        subparsers = parser.add_subparsers(dest='scenario', required=True)
+        for name in SCENARIOS:
+            scenario = load_scenario(name)
+            subparser = subparsers.add_parser(
+                name, help=scenario.__doc__.strip().splitlines()[0]
+            )
+            scenario.add_arguments(subparser)
+
+    def handle(self, *args, **options):
+        scenario = load_scenario(options['scenario'])
+        with scratch_database() as connection:
+            result = scenario.run(**options)
+            result['database'] = connection.vendor
+        result['commit'] = git_revision()
+
+        output = json.dumps(result, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
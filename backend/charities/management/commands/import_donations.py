@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from charities.imports import detect_format, import_donations, open_source
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream donations from a CSV or NDJSON file (columns: transaction_id, '
+        'project_id, user_id, amount, optional ISO 8601 date)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, optionally .gz, or - for stdin')
+        parser.add_argument('--format', choices=['csv', 'ndjson'])
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Validate and report without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        verbosity = options['verbosity']
+
+        def progress(result):
+            if verbosity > 1:
+                self.stdout.write(
+                    f'{result.read} rows read, {result.imported} imported '
+                    f'({result.rows_per_second:.0f} rows/s)'
+                )
+
+        try:
+            stream = open_source(options['path'])
+        except OSError as e:
+            raise CommandError(e)
+
+        with stream:
+            result = import_donations(
+                stream,
+                fmt=fmt,
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+                progress=progress
+            )
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(
+            f"{'Validated' if options['dry_run'] else 'Imported'} {result.imported} "
+            f"of {result.read} rows in {result.elapsed:.1f}s "
+            f"({result.rows_per_second:.0f} rows/s): "
+            f"{result.duplicates} duplicate(s), {result.invalid} invalid"
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from charities.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-project donation stats from the donations table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project', type=int, action='append', dest='projects',
+            help='Only rebuild this project (may be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_stats(options['projects'])
+        self.stdout.write(f"Rebuilt stats for {rebuilt} project(s)")
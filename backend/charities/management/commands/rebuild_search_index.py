@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from charities.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for charity projects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        backend = rebuild_index(using=options['database'])
+        if backend is None:
+            self.stdout.write('No full-text backend for this database; nothing to do')
+        else:
+            self.stdout.write(f'Rebuilt {backend} search index')
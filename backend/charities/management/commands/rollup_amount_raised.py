@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from charities.counters import rollup_amount_shards
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded donation totals into CharityProject.amount_raised'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep rolling up instead of exiting after one pass'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=10.0,
+            help='Seconds to sleep between passes when --loop is set'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            rolled_up = rollup_amount_shards()
+            if options['verbosity'] > 1 or not options['loop']:
+                self.stdout.write(f"Rolled up {rolled_up} project(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
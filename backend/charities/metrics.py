@@ -0,0 +1,134 @@
+"""
+Prometheus metrics for the charities API, served at ``/metrics``.
+
+Metrics live in prometheus_client's default registry. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (it must be set before this module is
+imported), every process writes its samples to its own memory-mapped file
+in that directory and ``/metrics`` aggregates them; this is how the web
+workers and the send_queued_emails worker report together. Updates never
+take a lock shared between processes.
+"""
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest,
+    multiprocess,
+)
+
+from .timing import observe_queries
+
+REQUESTS = Counter(
+    'charities_http_requests_total',
+    'HTTP requests by route, method and status',
+    ['route', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'charities_http_request_duration_seconds',
+    'Time to produce a response, by route and method',
+    ['route', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+REQUEST_QUERIES = Histogram(
+    'charities_http_request_db_queries',
+    'Database queries per request, by route',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+)
+DONATIONS = Counter(
+    'charities_donations_total',
+    'Committed donations, by source',
+    ['source']
+)
+DONATION_AMOUNT = Counter(
+    'charities_donation_amount_total',
+    'Sum of committed donation amounts, by source',
+    ['source']
+)
+EMAILS_QUEUED = Counter(
+    'charities_emails_queued_total',
+    'Notification emails written to the outbox, by kind',
+    ['kind']
+)
+EMAIL_DELIVERIES = Counter(
+    'charities_email_deliveries_total',
+    'Outbox delivery attempts: sent, failed (will retry) or gave_up',
+    ['outcome']
+)
+
+
+def record_donations(count, amount, source):
+    """Count donations once the surrounding transaction commits."""
+    def record():
+        DONATIONS.labels(source).inc(count)
+        DONATION_AMOUNT.labels(source).inc(float(amount))
+    transaction.on_commit(record)
+
+
+def record_email_queued(kind):
+    transaction.on_commit(lambda: EMAILS_QUEUED.labels(kind).inc())
+
+
+def record_email_delivery(outcome):
+    EMAIL_DELIVERIES.labels(outcome).inc()
+
+
+def registry(path=None):
+    """The registry to expose: per-process, or merged from ``path``."""
+    path = path or os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not path:
+        return REGISTRY
+    merged = CollectorRegistry()
+    multiprocess.MultiProcessCollector(merged, path=path)
+    return merged
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        # Open only on a development server
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = []
+        start = time.perf_counter()
+        with observe_queries(queries.append):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, len(queries))
+        return response
+
+    async def __acall__(self, request):
+        queries = []
+        start = time.perf_counter()
+        with observe_queries(queries.append):
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, len(queries))
+        return response
+
+    def record(self, request, response, elapsed, queries):
+        match = request.resolver_match
+        # The URL pattern, not the path, keeps label cardinality bounded
+        route = match.route if match else 'unmatched'
+        REQUESTS.labels(route, request.method, response.status_code).inc()
+        REQUEST_LATENCY.labels(route, request.method).observe(elapsed)
+        REQUEST_QUERIES.labels(route).observe(queries)
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 10:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0009_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AmountRaisedShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='amount_shards', to='charities.charityproject')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'shard'), name='unique_amount_shard')],
+            },
+        ),
+    ]
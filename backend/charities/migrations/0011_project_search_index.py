@@ -0,0 +1,79 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE charities_charityproject ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION charities_charityproject_search_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.location, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER charities_charityproject_search_trigger
+    BEFORE INSERT OR UPDATE OF title, description, location
+    ON charities_charityproject
+    FOR EACH ROW EXECUTE FUNCTION charities_charityproject_search_update()
+    """,
+    "UPDATE charities_charityproject SET title = title",
+    "CREATE INDEX charities_project_search_idx ON charities_charityproject USING gin (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS charities_charityproject_search_trigger ON charities_charityproject",
+    "DROP FUNCTION IF EXISTS charities_charityproject_search_update()",
+    "ALTER TABLE charities_charityproject DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE charities_charityproject_fts
+    USING fts5(title, description, location, tokenize = 'porter unicode61')
+    """,
+    """
+    INSERT INTO charities_charityproject_fts (rowid, title, description, location)
+    SELECT id, title, description, location FROM charities_charityproject
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS charities_charityproject_fts",
+]
+
+
+def sqlite_has_fts5(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return 'ENABLE_FTS5' in {row[0] for row in cursor.fetchall()}
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        if vendor == 'postgresql':
+            sql = statements['postgresql']
+        elif vendor == 'sqlite' and sqlite_has_fts5(schema_editor):
+            sql = statements['sqlite']
+        else:
+            return
+        for statement in sql:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0010_amountraisedshard'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
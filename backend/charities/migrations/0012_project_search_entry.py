@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 11:52
+
+import charities.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0011_project_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectSearchEntry',
+            fields=[
+                ('project', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='charities.charityproject')),
+                ('document', charities.search.FTSDocumentField(db_column='charities_charityproject_fts')),
+            ],
+            options={
+                'db_table': 'charities_charityproject_fts',
+                'managed': False,
+            },
+        ),
+    ]
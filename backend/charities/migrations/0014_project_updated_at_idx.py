@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 11:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0013_project_lat_lng_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='charityproject',
+            index=models.Index(fields=['updated_at'], name='project_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 11:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0014_project_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='donation',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
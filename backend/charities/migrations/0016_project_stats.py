@@ -0,0 +1,78 @@
+# Generated by Django 5.2 on 2026-10-18 11:31
+
+from datetime import timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncHour
+
+
+def backfill_project_stats(apps, schema_editor):
+    """Stats rows and hourly buckets for donations made before this migration."""
+    Donation = apps.get_model('charities', 'Donation')
+    ProjectStats = apps.get_model('charities', 'ProjectStats')
+    ProjectHourlyTotal = apps.get_model('charities', 'ProjectHourlyTotal')
+    project_ids = Donation.objects.values_list('project_id', flat=True).distinct().order_by()
+    for project_id in project_ids.iterator():
+        donations = Donation.objects.filter(project_id=project_id).order_by()
+        totals = donations.aggregate(
+            donors=Count('user', distinct=True),
+            count=Count('id'),
+            total=Sum('amount'),
+            largest=Max('amount'),
+        )
+        ProjectStats.objects.create(
+            project_id=project_id,
+            donor_count=totals['donors'],
+            donation_count=totals['count'],
+            total_amount=totals['total'],
+            largest_gift=totals['largest'],
+        )
+        ProjectHourlyTotal.objects.bulk_create(
+            ProjectHourlyTotal(
+                project_id=project_id,
+                hour=row['hour'],
+                amount=row['amount'],
+                donation_count=row['count'],
+            )
+            for row in donations.annotate(hour=TruncHour('date', tzinfo=dt_timezone.utc))
+            .values('hour')
+            .annotate(amount=Sum('amount'), count=Count('id'))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0015_donation_date_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='charities.charityproject')),
+                ('donor_count', models.PositiveIntegerField(default=0)),
+                ('donation_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('largest_gift', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProjectHourlyTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('donation_count', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_totals', to='charities.charityproject')),
+            ],
+            options={
+                'ordering': ['project', 'hour'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'hour'), name='unique_project_hour')],
+            },
+        ),
+        migrations.RunPython(backfill_project_stats, migrations.RunPython.noop),
+    ]
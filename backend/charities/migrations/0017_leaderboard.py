@@ -0,0 +1,70 @@
+# Generated by Django 5.2 on 2026-10-18 11:35
+
+import math
+from datetime import datetime, timezone as dt_timezone
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+# charities.trending as of this migration, so later changes to it cannot
+# alter what the migration writes
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def log_weight(amount, when, tau_hours):
+    hours = (when - EPOCH).total_seconds() / 3600
+    return math.log(float(amount)) + hours / tau_hours
+
+
+def combine(log_scores):
+    log_scores = list(log_scores)
+    if not log_scores:
+        return None
+    peak = max(log_scores)
+    return peak + math.log(sum(math.exp(s - peak) for s in log_scores))
+
+
+def backfill_trending_scores(apps, schema_editor):
+    """Trending scores for the stats rows 0016 backfilled."""
+    ProjectStats = apps.get_model('charities', 'ProjectStats')
+    Donation = apps.get_model('charities', 'Donation')
+    tau_hours = settings.TRENDING_HALF_LIFE_HOURS / math.log(2)
+    for stats in ProjectStats.objects.all().iterator():
+        stats.trending_score = combine(
+            log_weight(amount, when, tau_hours)
+            for amount, when in Donation.objects.filter(project_id=stats.project_id)
+            .values_list('amount', 'date').iterator()
+        )
+        stats.save(update_fields=['trending_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0016_project_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='charityproject',
+            name='percent_funded',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(goal_amount__gt=0, then=django.db.models.functions.comparison.Cast(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('amount_raised'), '*', models.Value(100)), '/', models.F('goal_amount')), models.FloatField())), default=models.Value(0.0), output_field=models.FloatField()), output_field=models.FloatField()),
+        ),
+        migrations.AddField(
+            model_name='projectstats',
+            name='trending_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='charityproject',
+            index=models.Index(fields=['-percent_funded', '-id'], name='project_percent_funded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectstats',
+            index=models.Index(fields=['-trending_score'], name='stats_trending_score_idx'),
+        ),
+        migrations.RunPython(backfill_trending_scores, migrations.RunPython.noop),
+    ]
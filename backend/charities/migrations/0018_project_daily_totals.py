@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 12:58
+
+from datetime import timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_totals(apps, schema_editor):
+    """UTC day buckets for donations made before this migration."""
+    Donation = apps.get_model('charities', 'Donation')
+    ProjectDailyTotal = apps.get_model('charities', 'ProjectDailyTotal')
+    rows = (
+        Donation.objects.annotate(day=TruncDate('date', tzinfo=dt_timezone.utc))
+        .values('project_id', 'day')
+        .annotate(amount=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    batch = []
+    for row in rows.iterator():
+        batch.append(ProjectDailyTotal(
+            project_id=row['project_id'],
+            day=row['day'],
+            amount=row['amount'],
+            donation_count=row['count'],
+        ))
+        if len(batch) >= 1000:
+            ProjectDailyTotal.objects.bulk_create(batch)
+            batch = []
+    ProjectDailyTotal.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0017_leaderboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectDailyTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('donation_count', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_totals', to='charities.charityproject')),
+            ],
+            options={
+                'ordering': ['project', 'day'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'day'), name='unique_project_day')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.2 on 2026-10-18 13:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+PROJECT_COLUMNS = (
+    'id, title, description, goal_amount, amount_raised, start_date, end_date, '
+    'location, latitude, longitude, created_at, updated_at, created_by_id, percent_funded'
+)
+DONATION_COLUMNS = 'id, user_id, project_id, amount, date, transaction_id'
+
+CREATE_VIEWS = [
+    f"""
+    CREATE VIEW charities_anyproject AS
+    SELECT {PROJECT_COLUMNS}, NULL AS archived_at FROM charities_charityproject
+    UNION ALL
+    SELECT {PROJECT_COLUMNS}, archived_at FROM charities_archivedproject
+    """,
+    f"""
+    CREATE VIEW charities_anydonation AS
+    SELECT {DONATION_COLUMNS} FROM charities_donation
+    UNION ALL
+    SELECT {DONATION_COLUMNS} FROM charities_archiveddonation
+    """,
+]
+
+DROP_VIEWS = [
+    "DROP VIEW IF EXISTS charities_anydonation",
+    "DROP VIEW IF EXISTS charities_anyproject",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0018_project_daily_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnyDonation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('date', models.DateTimeField()),
+                ('transaction_id', models.CharField(max_length=100)),
+            ],
+            options={
+                'db_table': 'charities_anydonation',
+                'ordering': ['-date'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='AnyProject',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('goal_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('amount_raised', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('percent_funded', models.FloatField()),
+                ('archived_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'db_table': 'charities_anyproject',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedProject',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('goal_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('amount_raised', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('percent_funded', models.FloatField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_charities', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedDonation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('date', models.DateTimeField()),
+                ('transaction_id', models.CharField(max_length=100, unique=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_donations', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donations', to='charities.archivedproject')),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEWS, DROP_VIEWS),
+    ]
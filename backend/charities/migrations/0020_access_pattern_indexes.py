@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-18 13:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0019_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='amountraisedshard',
+            index=models.Index(condition=models.Q(('amount', 0), _negated=True), fields=['project'], name='shard_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='charityproject',
+            index=models.Index(fields=['-created_at', '-id'], name='project_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='charityproject',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='project_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='charityproject',
+            index=models.Index(fields=['end_date', 'id'], name='project_end_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['user', '-date', '-id'], name='donation_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['project', '-date', '-id'], name='donation_project_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 13:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0020_access_pattern_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='charityproject',
+            index=models.Index(fields=['start_date'], name='project_start_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='charityproject',
+            index=models.Index(condition=models.Q(('amount_raised__lt', models.F('goal_amount'))), fields=['-created_at', '-id'], name='project_open_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 14:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('charities', '0021_project_status_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='charityproject',
+            index=models.Index(fields=['goal_amount', 'id'], name='project_goal_amount_idx'),
+        ),
+    ]
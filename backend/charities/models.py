@@ -1,10 +1,13 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
+from django.db.models.functions import Cast
 from django.template.loader import render_to_string
+from django.utils import timezone
 import os
 
+from . import cache, metrics, search
+
 def project_image_path(instance, filename):
     # The instance.id might be None when creating a new project
     # Add a UUID or timestamp if id is not available
@@ -30,12 +33,32 @@ class CharityProject(models.Model):
         on_delete=models.CASCADE,
         related_name='charities'
     )
+    percent_funded = models.GeneratedField(
+        expression=models.Case(
+            models.When(
+                goal_amount__gt=0,
+                then=Cast(models.F('amount_raised') * 100 / models.F('goal_amount'), models.FloatField())
+            ),
+            default=models.Value(0.0),
+            output_field=models.FloatField()
+        ),
+        output_field=models.FloatField(),
+        db_persist=True
+    )
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(search.INDEXED_FIELDS):
+            search.index_project(self, using=self._state.db)
+        cache.bump_project(self.pk)
 
     def delete(self, *args, **kwargs):
-        super().delete(*args, **kwargs)
+        project_id, using = self.pk, self._state.db
+        result = super().delete(*args, **kwargs)
+        search.unindex_project(project_id, using=using)
+        cache.bump_project(project_id)
+        return result
 
     @property
     def goal_reached(self):
@@ -50,6 +73,81 @@ class CharityProject(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Bounding-box prefilter for ?near= (see charities.geo)
+            models.Index(fields=['latitude', 'longitude'], name='project_lat_lng_idx'),
+            # MAX(updated_at) probe for the list ETag (see charities.conditional)
+            models.Index(fields=['updated_at'], name='project_updated_at_idx'),
+            # Most-funded leaderboard
+            models.Index(fields=['-percent_funded', '-id'], name='project_percent_funded_idx'),
+            # Default list order and its keyset cursor (ProjectCursorPagination)
+            models.Index(fields=['-created_at', '-id'], name='project_created_at_idx'),
+            # User projects: one owner's projects in list order
+            models.Index(
+                fields=['created_by', '-created_at', '-id'], name='project_owner_created_idx'
+            ),
+            # ?ordering=goal_amount
+            models.Index(fields=['goal_amount', 'id'], name='project_goal_amount_idx'),
+            # ?ordering=end_date and end-date ranges (archiving, status filters)
+            models.Index(fields=['end_date', 'id'], name='project_end_date_idx'),
+            # ?status=upcoming
+            models.Index(fields=['start_date'], name='project_start_date_idx'),
+            # ?status=active: open projects (goal not reached) in list order
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(amount_raised__lt=models.F('goal_amount')),
+                name='project_open_created_idx'
+            ),
+        ]
+
+class ProjectSearchEntry(models.Model):
+    """
+    A row of the SQLite FTS5 index created by migration 0011, so searches
+    can join it instead of probing it once per project. The table only
+    exists on SQLite; see charities.search.
+    """
+    project = models.OneToOneField(
+        'CharityProject',
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_entry'
+    )
+    document = search.FTSDocumentField(db_column=search.FTS_TABLE)
+
+    class Meta:
+        managed = False
+        db_table = search.FTS_TABLE
+
+
+class AmountRaisedShard(models.Model):
+    """
+    One slice of a project's pending ``amount_raised``. Donations add to a
+    random shard so concurrent donors to a popular project do not queue on
+    the project row; rollup_amount_raised folds the shards back in.
+    """
+    project = models.ForeignKey(
+        'CharityProject',
+        on_delete=models.CASCADE,
+        related_name='amount_shards'
+    )
+    shard = models.PositiveSmallIntegerField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'shard'], name='unique_amount_shard'),
+        ]
+        indexes = [
+            # Only shards holding a pending amount, for rollup_amount_shards()
+            models.Index(
+                fields=['project'], condition=~models.Q(amount=0), name='shard_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id}#{self.shard}: {self.amount}"
 
 class Donation(models.Model):
     user = models.ForeignKey(
@@ -59,11 +157,16 @@ class Donation(models.Model):
     )
     project = models.ForeignKey('CharityProject', on_delete=models.CASCADE, related_name='donations')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
-    date = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add so imported donations keep their original date
+    date = models.DateTimeField(default=timezone.now)
     transaction_id = models.CharField(max_length=100, unique=True)
 
 
-    def send_thank_you_email(self):
+    def queue_thank_you_email(self):
+        """
+        Write the thank-you email to the outbox; it is sent by the
+        send_queued_emails worker once the surrounding transaction commits.
+        """
         subject = 'Thank you for your donation!'
         context = {
             'user': self.user,
@@ -72,17 +175,15 @@ class Donation(models.Model):
             'date': self.date
         }
         html_message = render_to_string('emails/donation_thank_you.html', context)
-        
-        send_mail(
+
+        metrics.record_email_queued('thank_you')
+        return EmailOutbox.objects.enqueue(
             subject=subject,
-            message='',
             html_message=html_message,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[self.user.email],
-            fail_silently=False
+            recipient=self.user.email
         )
 
-    def check_and_notify_goal_reached(self):
+    def queue_goal_reached_email(self):
         if self.project.amount_raised >= self.project.goal_amount:
             subject = f'Goal Reached for {self.project.title}!'
             context = {
@@ -91,19 +192,293 @@ class Donation(models.Model):
                 'amount_raised': self.project.amount_raised
             }
             html_message = render_to_string('emails/goal_reached.html', context)
-            
+
             # Send to project creator
-            send_mail(
+            metrics.record_email_queued('goal_reached')
+            return EmailOutbox.objects.enqueue(
                 subject=subject,
-                message='',
                 html_message=html_message,
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[self.project.created_by.email],
-                fail_silently=False
+                recipient=self.project.created_by.email
             )
+        return None
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # User donations in DonationCursorPagination order
+            models.Index(fields=['user', '-date', '-id'], name='donation_user_date_idx'),
+            # A project's donations by date (export, stats rebuilds)
+            models.Index(fields=['project', '-date', '-id'], name='donation_project_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - ${self.amount} to {self.project.title}"
+
+
+class ProjectStats(models.Model):
+    """
+    Running donation totals for a project, updated in the donation write
+    path (see charities.stats) so reading them never scans donations.
+    """
+    project = models.OneToOneField(
+        'CharityProject',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    donor_count = models.PositiveIntegerField(default=0)
+    donation_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    largest_gift = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Log of the decayed donation score; see charities.trending
+    trending_score = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trending_score'], name='stats_trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"Stats for project {self.project_id}"
+
+
+class ProjectHourlyTotal(models.Model):
+    """
+    Donations to a project per UTC hour; the last 24 of these give the
+    project's recent total.
+    """
+    project = models.ForeignKey(
+        'CharityProject',
+        on_delete=models.CASCADE,
+        related_name='hourly_totals'
+    )
+    hour = models.DateTimeField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    donation_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['project', 'hour']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'hour'], name='unique_project_hour'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} @ {self.hour:%Y-%m-%d %H:00}: {self.amount}"
+
+
+class ProjectDailyTotal(models.Model):
+    """
+    Donations to a project per UTC day, for time series longer than the
+    hourly buckets are worth reading.
+    """
+    project = models.ForeignKey(
+        'CharityProject',
+        on_delete=models.CASCADE,
+        related_name='daily_totals'
+    )
+    day = models.DateField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    donation_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['project', 'day']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'day'], name='unique_project_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} @ {self.day:%Y-%m-%d}: {self.amount}"
+
+
+class ArchivedProject(models.Model):
+    """
+    An ended project moved out of ``CharityProject`` by ``archive_projects``
+    (see charities.archive), keeping its id. The same columns, with
+    ``percent_funded`` copied rather than generated, plus when it moved.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=100)
+    description = models.TextField()
+    goal_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    amount_raised = models.DecimalField(max_digits=10, decimal_places=2)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    location = models.CharField(max_length=255, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    created_by = models.ForeignKey(
+        'accounts.UserAccount',
+        on_delete=models.CASCADE,
+        related_name='archived_charities'
+    )
+    percent_funded = models.FloatField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedDonation(models.Model):
+    """A donation to an ``ArchivedProject``, moved with it."""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_donations'
+    )
+    project = models.ForeignKey(
+        'ArchivedProject', on_delete=models.CASCADE, related_name='donations'
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateTimeField()
+    transaction_id = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.transaction_id}: ${self.amount} to archived project {self.project_id}"
+
+
+class AnyProject(models.Model):
+    """
+    A hot or archived project: the ``UNION ALL`` view over ``CharityProject``
+    and ``ArchivedProject`` created by migration 0019, read for
+    ``?include_archived=true``. ``archived_at`` is null for hot projects.
+    A column added to either table must be added to the view too.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=100)
+    description = models.TextField()
+    goal_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    amount_raised = models.DecimalField(max_digits=10, decimal_places=2)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    location = models.CharField(max_length=255, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    created_by = models.ForeignKey(
+        'accounts.UserAccount',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    percent_funded = models.FloatField()
+    archived_at = models.DateTimeField(null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'charities_anyproject'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.title
+
+
+# The user fields CharityProjectSerializer embeds as ``created_by``
+CREATOR_FIELDS = {'username', 'email', 'first_name', 'last_name'}
+
+
+def creator_changed(sender, instance, update_fields=None, **kwargs):
+    """
+    ``post_save``/``pre_delete`` receiver for users; see
+    ``CharitiesConfig.ready()``. Project responses embed their creator, so
+    a change to one touches their projects' ``updated_at``, which the
+    ETags hash (see charities.conditional), and invalidates their cached
+    responses.
+    """
+    if update_fields is not None and not CREATOR_FIELDS & set(update_fields):
+        return
+    CharityProject.objects.filter(created_by_id=instance.pk).update(updated_at=timezone.now())
+    project_ids = list(
+        AnyProject.objects.filter(created_by_id=instance.pk).values_list('id', flat=True)
+    )
+    if project_ids:
+        cache.bump_projects(project_ids)
+
+
+class AnyDonation(models.Model):
+    """A hot or archived donation; the view over ``Donation`` and ``ArchivedDonation``."""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    project = models.ForeignKey(
+        'AnyProject',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='donations'
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateTimeField()
+    transaction_id = models.CharField(max_length=100)
+
+    class Meta:
+        managed = False
+        db_table = 'charities_anydonation'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.transaction_id}: ${self.amount} to project {self.project_id}"
+
+
+class EmailOutboxManager(models.Manager):
+    def enqueue(self, subject, html_message, recipient):
+        return self.create(
+            subject=subject,
+            html_message=html_message,
+            recipient=recipient
+        )
+
+    def due(self, now=None):
+        return self.filter(
+            status=EmailOutbox.STATUS_PENDING,
+            next_attempt_at__lte=now or timezone.now()
+        )
+
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing email written in the same transaction as the change that
+    triggered it and delivered later by the send_queued_emails command.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    html_message = models.TextField()
+    recipient = models.EmailField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = EmailOutboxManager()
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - ${self.amount} to {self.project.title}"
\ No newline at end of file
+        return f"{self.subject} -> {self.recipient} ({self.status})"
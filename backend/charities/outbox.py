@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import EmailOutbox
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff for a message that has failed ``attempts`` times.
+    """
+    base = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'OUTBOX_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def lease():
+    """
+    How long claimed messages stay hidden from other workers. A message
+    whose worker died before recording the outcome is retried after it.
+    """
+    return timedelta(seconds=getattr(settings, 'OUTBOX_LEASE_SECONDS', 300))
+
+
+def claim(batch_size):
+    """
+    Claim up to ``batch_size`` due messages by pushing their
+    ``next_attempt_at`` past the lease, in a short transaction of its own.
+    Rows are picked with SKIP LOCKED where the database supports it, so
+    several workers can drain the outbox at once.
+    """
+    with transaction.atomic():
+        messages = list(
+            EmailOutbox.objects.due()
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if messages:
+            leased_until = timezone.now() + lease()
+            EmailOutbox.objects.filter(
+                pk__in=[message.pk for message in messages]
+            ).update(next_attempt_at=leased_until)
+            for message in messages:
+                message.next_attempt_at = leased_until
+    return messages
+
+
+def send_pending(batch_size=50, connection=None):
+    """
+    Deliver one batch of due outbox messages over a single SMTP connection.
+
+    The batch is claimed first (see ``claim``); messages are then sent
+    outside any transaction and each outcome is saved on its own, so no
+    database lock is held while talking to the mail server and a crash
+    mid-batch resends at most the message in flight. Returns a
+    ``(sent, failed)`` tuple for the batch.
+    """
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    sent = failed = 0
+
+    messages = claim(batch_size)
+    if not messages:
+        return sent, failed
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+        open_error = None
+    except Exception as e:
+        open_error = e
+
+    try:
+        for message in messages:
+            now = timezone.now()
+            try:
+                if open_error is not None:
+                    raise open_error
+                email = EmailMultiAlternatives(
+                    subject=message.subject,
+                    body='',
+                    from_email=settings.EMAIL_HOST_USER,
+                    to=[message.recipient],
+                    connection=connection
+                )
+                email.attach_alternative(message.html_message, 'text/html')
+                email.send()
+            except Exception as e:
+                message.attempts += 1
+                message.last_error = str(e)
+                if message.attempts >= max_attempts:
+                    message.status = EmailOutbox.STATUS_FAILED
+                    metrics.record_email_delivery('gave_up')
+                else:
+                    message.next_attempt_at = now + retry_delay(message.attempts)
+                    metrics.record_email_delivery('failed')
+                failed += 1
+            else:
+                message.attempts += 1
+                message.status = EmailOutbox.STATUS_SENT
+                message.sent_at = now
+                message.last_error = ''
+                metrics.record_email_delivery('sent')
+                sent += 1
+            message.save(update_fields=[
+                'status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'
+            ])
+    finally:
+        if open_error is None:
+            connection.close()
+
+    return sent, failed
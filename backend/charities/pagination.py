@@ -0,0 +1,254 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.encoding import force_str
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks with a ``WHERE`` on the ordering columns
+    instead of ``OFFSET``, so every page costs the same however deep it is.
+
+    The ordering comes from the queryset (e.g. set by ``OrderingFilter``)
+    or falls back to ``ordering``; the primary key is always appended as a
+    tiebreaker. The cursor is an opaque token holding the ordering values
+    of the row at the page boundary. ``COUNT(*)`` only runs when the
+    client asks for it with ``?count=true``.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.page_queryset(queryset, request)
+        self.count = queryset.count() if self.wants_count(request) else None
+        return self.paginate_rows(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset()`` on the async ORM."""
+        page = self.page_queryset(queryset, request)
+        self.count = await queryset.acount() if self.wants_count(request) else None
+        return self.paginate_rows([row async for row in page])
+
+    def page_queryset(self, queryset, request):
+        """The unevaluated query for this page, plus one row to detect more."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = self.get_ordering(queryset)
+
+        values, reverse = self.decode_cursor(request, queryset)
+        self.cursor_values = values
+        self.page_reversed = reverse
+        fields = self.fields
+        if reverse:
+            fields = [(name, not descending) for name, descending in fields]
+
+        queryset = self.load_ordering_columns(queryset).order_by(
+            *[('-' if descending else '') + name for name, descending in fields]
+        )
+        if values is not None:
+            queryset = queryset.filter(self.seek(fields, values))
+        return queryset[:self.page_size + 1]
+
+    def paginate_rows(self, rows):
+        values, reverse = self.cursor_values, self.page_reversed
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = {}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def get_ordering(self, queryset):
+        """
+        Return ``[(field_name, descending), ...]`` ending with the primary key.
+        """
+        ordering = [
+            field for field in queryset.query.order_by if isinstance(field, str)
+        ] or list(self.ordering)
+
+        fields = []
+        for field in ordering:
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            if name == 'pk':
+                name = queryset.model._meta.pk.name
+            fields.append((name, descending))
+
+        pk_name = queryset.model._meta.pk.name
+        if pk_name not in [name for name, _ in fields]:
+            fields.append((pk_name, fields[0][1] if fields else False))
+        return fields
+
+    def load_ordering_columns(self, queryset):
+        """
+        Add the ordering columns to a queryset narrowed by ``values()`` or
+        ``only()`` (see ``charities.fieldsets``): cursors are built from them.
+        """
+        names = [name for name, _ in self.fields]
+        if queryset._fields:
+            missing = [name for name in names if name not in queryset._fields]
+            return queryset.values(*queryset._fields, *missing) if missing else queryset
+        loaded, deferred = queryset.query.deferred_loading
+        if deferred and loaded & set(names):
+            return queryset.defer(None).defer(*(loaded - set(names)))
+        if loaded and not deferred:
+            return queryset.only(*loaded, *names)
+        return queryset
+
+    def seek(self, fields, values):
+        """
+        Rows strictly after ``values`` in ``fields`` order, i.e. the
+        expansion of a row-value comparison ``(a, b) < (x, y)``.
+        """
+        condition = Q()
+        for index, (name, descending) in enumerate(fields):
+            step = Q(**{f'{name}__{"lt" if descending else "gt"}': values[index]})
+            for prior_index, (prior_name, _) in enumerate(fields[:index]):
+                step &= Q(**{prior_name: values[prior_index]})
+            condition |= step
+
+        # Bound the leading column too so the index range scan starts at
+        # the cursor rather than at the beginning of the index
+        name, descending = fields[0]
+        return Q(**{f'{name}__{"lte" if descending else "gte"}': values[0]}) & condition
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        return self.build_link(self.last_row, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_row is None:
+            # Cursor pointed past the end; step back from where it pointed
+            return self.encode_link(self.cursor_values, reverse=True)
+        return self.build_link(self.first_row, reverse=True)
+
+    def build_link(self, row, reverse):
+        return self.encode_link(
+            [self.row_value(row, name) for name, _ in self.fields], reverse
+        )
+
+    def encode_link(self, values, reverse):
+        token = json.dumps({'v': [self.to_json(value) for value in values], 'r': reverse})
+        cursor = base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+        return replace_query_param(
+            remove_query_param(self.base_url, self.count_query_param),
+            self.cursor_query_param, cursor
+        )
+
+    def decode_cursor(self, request, queryset):
+        """
+        The ordering values and direction held by the cursor, each converted
+        with its field's ``to_python()`` so a tampered token is a 404 rather
+        than an error in ``filter()``.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            token = json.loads(force_str(base64.urlsafe_b64decode(padded.encode())))
+            values, reverse = token['v'], bool(token['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                self.output_field(queryset, name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    @staticmethod
+    def output_field(queryset, name):
+        """The model field or annotation output field behind ``name``."""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        model = queryset.model
+        *related, last = name.split('__')
+        for part in related:
+            model = model._meta.get_field(part).related_model
+        return model._meta.get_field(last)
+
+    @staticmethod
+    def row_value(row, name):
+        for part in name.split('__'):
+            row = row[part] if isinstance(row, dict) else getattr(row, part)
+        return row
+
+    @staticmethod
+    def to_json(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+
+class ProjectCursorPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class DonationCursorPagination(KeysetPagination):
+    ordering = ('-date', '-id')
@@ -9,5 +9,13 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         
-        # Write permissions are only allowed to the owner
-        return obj.created_by == request.user
\ No newline at end of file
+        # Write permissions are only allowed to the owner; compare ids so
+        # the creator row is never fetched
+        return obj.created_by_id == request.user.id
+
+class IsOwner(permissions.BasePermission):
+    """
+    Only the owner of an object may access it, including for reads.
+    """
+    def has_object_permission(self, request, view, obj):
+        return obj.created_by_id == request.user.id
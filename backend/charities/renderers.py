@@ -0,0 +1,47 @@
+"""
+JSON rendering on orjson, when it is installed.
+
+orjson encodes the dicts, lists and strings of a serialised page several
+times faster than ``json.dumps()`` with DRF's encoder. ``FastJSONRenderer``
+is registered in ``REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']``; without
+orjson it is DRF's ``JSONRenderer``.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson. The output is the same bytes
+    as DRF's: types orjson does not encode the same way (Decimal, dates,
+    times, lazy strings) go through DRF's encoder, and U+2028/U+2029 are
+    escaped the same way. Indented or ASCII-only output, and values orjson
+    rejects (integers over 64 bits, non-string keys), are rendered by
+    ``JSONRenderer`` itself. Two edge cases differ: NaN and infinities
+    render as ``null`` rather than failing, and float exponents are written
+    ``1e-5`` rather than ``1e-05``.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret
@@ -0,0 +1,168 @@
+"""
+Read replicas with read-your-writes stickiness.
+
+``ReplicaRouter`` sends every write to the primary (``default``). Reads go
+to a replica in ``REPLICA_DATABASES`` only inside a request that opted in:
+``ReplicaMiddleware`` gives each request a routing state, and views mark
+it with ``read_from_replica()`` once the user is authenticated --
+``ReplicaReadMixin`` for viewsets, ``@replica_reads`` for function views.
+It only applies to safe methods. One replica is picked per request, so
+its reads see one consistent snapshot.
+
+A request that writes is pinned to the primary from then on, and so is
+its user for ``REPLICA_PIN_SECONDS`` after it: the pin is kept in the
+cache, which must therefore be shared by all workers. Reads inside
+``transaction.atomic()`` also stay on the primary.
+
+Anything cached under a write-bumped version (see ``charities.cache``)
+is computed on the primary with ``primary()``: a replica that has not
+caught up would otherwise store pre-write data under the post-write
+version, where it would stay until the next write.
+"""
+import functools
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import cache
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY = 'charities:replicas:pin:{}'
+
+_state = ContextVar('charities_replica_state', default=None)
+
+
+class RoutingState:
+    """Where this request's reads go; shared by the threads serving it."""
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def pin(user_id):
+    cache.get_cache().set(PIN_KEY.format(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get_cache().get(PIN_KEY.format(user_id)) is not None
+
+
+def read_from_replica(request):
+    """Route the rest of ``request``'s reads to a replica, if it may use one."""
+    state = _state.get()
+    if (
+        state is None or state.wrote or not settings.REPLICA_DATABASES
+        or request.method not in SAFE_METHODS
+    ):
+        return
+    user = request.user
+    if user.is_authenticated and is_pinned(user.pk):
+        return
+    state.replica = random.choice(settings.REPLICA_DATABASES)
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block, whatever the request's routing."""
+    state = _state.get()
+    if state is None or state.replica is None:
+        yield
+        return
+    replica, state.replica = state.replica, None
+    try:
+        yield
+    finally:
+        state.replica = replica
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None or state.replica is None or state.wrote
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        # Not None: an instance read from a replica must still be saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            self.pin_user(request)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            # request.user may still be the lazy session user
+            await sync_to_async(self.pin_user)(request)
+        return response
+
+    def pin_user(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin(user.pk)
+
+
+class ReplicaReadMixin:
+    """Serve safe-method requests to this viewset from a replica."""
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        read_from_replica(request)
+
+
+def replica_reads(view):
+    """
+    ``ReplicaReadMixin`` for a function view, sync or async; goes under
+    ``@api_view``, so it runs after authentication.
+    """
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            read_from_replica(request)
+            return await view(request, *args, **kwargs)
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            read_from_replica(request)
+            return view(request, *args, **kwargs)
+    return wrapper
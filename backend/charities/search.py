@@ -0,0 +1,150 @@
+"""
+Full-text search over CharityProject title, location and description.
+
+PostgreSQL keeps a ``search_vector`` tsvector column up to date with a
+trigger and indexes it with GIN. SQLite keeps an FTS5 shadow table that
+``CharityProject.save()``/``delete()`` write through to. Both are created
+by migration 0011; other databases fall back to ``icontains``.
+"""
+import functools
+import re
+import sqlite3
+from contextlib import closing
+
+from django.db import connections
+from django.db.models import F, FloatField, Func, Lookup, TextField, Value
+from django.db.models.expressions import RawSQL
+
+PROJECT_TABLE = 'charities_charityproject'
+FTS_TABLE = 'charities_charityproject_fts'
+INDEXED_FIELDS = ('title', 'description', 'location')
+
+# Column weights for bm25(), in FTS_TABLE column order
+SQLITE_WEIGHTS = '10.0, 1.0, 5.0'
+
+
+class FTSDocumentField(TextField):
+    """
+    The hidden column of an FTS5 table, which has the table's own name.
+    ``field__match=query`` compiles to ``MATCH``.
+    """
+
+
+@FTSDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+@functools.cache
+def sqlite_has_fts5():
+    # Compile options belong to the sqlite3 library that every connection
+    # in the process shares, so ask a throwaway in-memory database rather
+    # than a Django connection; that keeps backend_for() query-free and
+    # safe to call from async views
+    with closing(sqlite3.connect(':memory:')) as db:
+        options = {row[0] for row in db.execute('PRAGMA compile_options')}
+    return 'ENABLE_FTS5' in options
+
+
+def backend_for(connection):
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite' and sqlite_has_fts5():
+        return 'sqlite'
+    return None
+
+
+def search_terms(terms):
+    """
+    Reduce free text to word tokens so it is always a valid query.
+    """
+    words = []
+    for term in terms:
+        words.extend(re.findall(r'\w+', term))
+    return words
+
+
+def search(queryset, terms):
+    """
+    Filter ``queryset`` to projects matching every term (as a prefix) and
+    annotate it with ``search_rank``, higher meaning more relevant.
+
+    Returns None when the database has no full-text backend, or for
+    querysets of other models (the index only covers hot projects).
+    """
+    connection = connections[queryset.db]
+    backend = backend_for(connection)
+    if backend is None or queryset.model._meta.db_table != PROJECT_TABLE:
+        return None
+
+    words = search_terms(terms)
+    if not words:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+    if backend == 'postgresql':
+        query = ' & '.join(f'{word}:*' for word in words)
+        matches = RawSQL(
+            f"SELECT id FROM {PROJECT_TABLE} "
+            f"WHERE search_vector @@ to_tsquery('english', %s)",
+            [query]
+        )
+        # float8 so the rank round-trips exactly through pagination cursors
+        rank = RawSQL(
+            f"ts_rank({PROJECT_TABLE}.search_vector, to_tsquery('english', %s))::float8",
+            [query], output_field=FloatField()
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+    # Join the FTS5 table (see ProjectSearchEntry) so the MATCH runs once
+    # and bm25() is read off each matching row
+    query = ' '.join(f'"{word}"*' for word in words)
+    rank = Func(
+        F('search_entry__document'),
+        template=f'-bm25(%(expressions)s, {SQLITE_WEIGHTS})',
+        output_field=FloatField()
+    )
+    return queryset.filter(search_entry__document__match=query).annotate(search_rank=rank)
+
+
+def index_project(project, using='default'):
+    connection = connections[using]
+    if backend_for(connection) != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [project.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, location) '
+            f'VALUES (%s, %s, %s, %s)',
+            [project.pk, project.title, project.description, project.location]
+        )
+
+
+def unindex_project(project_id, using='default'):
+    connection = connections[using]
+    if backend_for(connection) != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [project_id])
+
+
+def rebuild_index(using='default'):
+    """
+    Recompute the whole index from the project table.
+    """
+    connection = connections[using]
+    backend = backend_for(connection)
+    with connection.cursor() as cursor:
+        if backend == 'postgresql':
+            cursor.execute(f'UPDATE {PROJECT_TABLE} SET title = title')
+        elif backend == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, description, location) '
+                f'SELECT id, title, description, location FROM {PROJECT_TABLE}'
+            )
+    return backend
@@ -1,12 +1,17 @@
 from rest_framework import serializers
 from .models import CharityProject, Donation
 from accounts.serializers import UserSerializer
+from .fieldsets import SparseFieldsSerializerMixin
+from .timing import TimedListSerializer, TimedSerializerMixin
 
-class CharityProjectSerializer(serializers.ModelSerializer):
+class CharityProjectSerializer(
+    SparseFieldsSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     created_by = UserSerializer(read_only=True)
     
     class Meta:
         model = CharityProject
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'title', 'description', 'goal_amount',
             'amount_raised', 'start_date', 'end_date',
@@ -36,20 +41,55 @@ class CharityProjectSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({'longitude': 'Invalid longitude value'})
         return data
     
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Set by NearFilter for ?near= queries
+        distance = getattr(instance, 'distance', None)
+        if distance is not None:
+            data['distance'] = round(distance, 3)
+        return data
+
     def create(self, validated_data):
         # Set default value for amount_raised if not provided
         validated_data['amount_raised'] = validated_data.get('amount_raised', 0.00)
         return super().create(validated_data)
     
 
-class ProjectMinimalSerializer(serializers.ModelSerializer):
+class ProjectMinimalSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CharityProject
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'title', 'goal_amount', 'amount_raised']
 
-class DonationSerializer(serializers.ModelSerializer):
+class DonationSerializer(
+    SparseFieldsSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     project = ProjectMinimalSerializer(read_only=True)
     
     class Meta:
         model = Donation
-        fields = ['id', 'amount', 'date', 'transaction_id', 'project']
\ No newline at end of file
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'amount', 'date', 'transaction_id', 'project']
+        read_only_fields = ['date']
+
+class ProjectStatsSerializer(TimedSerializerMixin, serializers.Serializer):
+    donor_count = serializers.IntegerField()
+    donation_count = serializers.IntegerField()
+    total_amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    average_gift = serializers.DecimalField(max_digits=12, decimal_places=2)
+    largest_gift = serializers.DecimalField(max_digits=10, decimal_places=2)
+    last_24h_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    updated_at = serializers.DateTimeField(allow_null=True)
+
+
+class TimeseriesBucketSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    donation_count = serializers.IntegerField()
+
+
+class ProjectTimeseriesSerializer(TimedSerializerMixin, serializers.Serializer):
+    interval = serializers.CharField()
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    results = TimeseriesBucketSerializer(many=True)
@@ -0,0 +1,350 @@
+"""
+Incrementally maintained per-project donation statistics.
+
+``record_donations`` turns new donations into one increment of the
+``ProjectStats`` row and one per touched hourly and daily bucket, so the
+stats and time series endpoints read a constant number of small rows.
+The bulk importer calls it in the transaction that inserts the
+donations; ``create_donation`` defers it with ``record_after_commit`` so
+the row locks of a hot project are held for one short transaction
+rather than the whole donation. ``donor_count`` is approximate: two
+concurrent first gifts from one donor both count as new.
+``rebuild_stats`` recomputes everything from ``Donation`` for repair;
+``backfill_rollups`` only the buckets.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Greatest, TruncDate, TruncHour
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import trending
+from .models import Donation, ProjectDailyTotal, ProjectHourlyTotal, ProjectStats
+
+CENT = Decimal('0.01')
+
+# Time series interval -> (bucket model, bucket field, truncation, bucket length)
+ROLLUPS = {
+    'hour': (ProjectHourlyTotal, 'hour', TruncHour, timedelta(hours=1)),
+    'day': (ProjectDailyTotal, 'day', TruncDate, timedelta(days=1)),
+}
+# Buckets in a time series when no start is given, and at most
+DEFAULT_BUCKETS = {'hour': 48, 'day': 30}
+MAX_BUCKETS = 1000
+
+
+def hour_of(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_of(moment):
+    return moment.astimezone(dt_timezone.utc).date()
+
+
+def new_donor_pairs(pairs):
+    """
+    The ``(project_id, user_id)`` pairs with no stored donation yet. Call
+    before inserting the donations being recorded.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return set()
+    existing = set(
+        Donation.objects.filter(
+            project_id__in={project_id for project_id, _ in pairs},
+            user_id__in={user_id for _, user_id in pairs},
+        ).values_list('project_id', 'user_id').distinct().order_by()
+    )
+    return pairs - existing
+
+
+def increment_or_create(model, lookup, increments, create_values):
+    """
+    ``UPDATE ... SET f = f + n`` on the row matching ``lookup``, creating
+    it from ``create_values`` if it does not exist yet.
+    """
+    if model.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **create_values)
+    except IntegrityError:
+        # Created concurrently; apply the increment to that row
+        model.objects.filter(**lookup).update(**increments)
+
+
+def record_donations(donations, new_donors):
+    """
+    Apply new ``donations`` to the stats tables. ``new_donors`` is the
+    result of ``new_donor_pairs`` taken before they were inserted.
+    """
+    projects = defaultdict(
+        lambda: {'count': 0, 'total': Decimal('0'), 'largest': Decimal('0'), 'scores': []}
+    )
+    hours = defaultdict(lambda: {'count': 0, 'total': Decimal('0')})
+    days = defaultdict(lambda: {'count': 0, 'total': Decimal('0')})
+
+    for donation in donations:
+        project = projects[donation.project_id]
+        project['count'] += 1
+        project['total'] += donation.amount
+        project['largest'] = max(project['largest'], donation.amount)
+        project['scores'].append(trending.log_weight(donation.amount, donation.date))
+        for bucket in (
+            hours[(donation.project_id, hour_of(donation.date))],
+            days[(donation.project_id, day_of(donation.date))],
+        ):
+            bucket['count'] += 1
+            bucket['total'] += donation.amount
+
+    donor_counts = defaultdict(int)
+    for project_id, _ in new_donors:
+        donor_counts[project_id] += 1
+
+    for project_id, values in projects.items():
+        score = trending.combine(values['scores'])
+        increment_or_create(
+            ProjectStats,
+            {'project_id': project_id},
+            {
+                'donor_count': F('donor_count') + donor_counts[project_id],
+                'donation_count': F('donation_count') + values['count'],
+                'total_amount': F('total_amount') + values['total'],
+                'largest_gift': Greatest('largest_gift', values['largest']),
+                'trending_score': trending.add_expression('trending_score', score),
+                'updated_at': timezone.now(),
+            },
+            {
+                'donor_count': donor_counts[project_id],
+                'donation_count': values['count'],
+                'total_amount': values['total'],
+                'largest_gift': values['largest'],
+                'trending_score': score,
+            }
+        )
+
+    for model, field, buckets in (
+        (ProjectHourlyTotal, 'hour', hours), (ProjectDailyTotal, 'day', days)
+    ):
+        for (project_id, bucket), values in buckets.items():
+            increment_or_create(
+                model,
+                {'project_id': project_id, field: bucket},
+                {
+                    'donation_count': F('donation_count') + values['count'],
+                    'amount': F('amount') + values['total'],
+                },
+                {'donation_count': values['count'], 'amount': values['total']}
+            )
+
+
+def record_after_commit(donations, new_donors):
+    """
+    ``record_donations`` in a transaction of its own once the current one
+    commits. A failure there is logged and leaves the donations in place;
+    ``rebuild_stats`` repairs the stats.
+    """
+    def record():
+        with transaction.atomic():
+            record_donations(donations, new_donors)
+    transaction.on_commit(record, robust=True)
+
+
+def project_stats(project_id, now=None):
+    """
+    Stats for one project, or None if it has no stats row. Two indexed
+    reads: the stats row and at most 24 hourly buckets.
+    """
+    stats = ProjectStats.objects.filter(project_id=project_id).first()
+    if stats is None:
+        return None
+
+    since = hour_of(now or timezone.now()) - timedelta(hours=23)
+    last_24h = ProjectHourlyTotal.objects.filter(
+        project_id=project_id, hour__gte=since
+    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+
+    average = (
+        (stats.total_amount / stats.donation_count).quantize(CENT)
+        if stats.donation_count else Decimal('0.00')
+    )
+    return {
+        'donor_count': stats.donor_count,
+        'donation_count': stats.donation_count,
+        'total_amount': stats.total_amount,
+        'average_gift': average,
+        'largest_gift': stats.largest_gift,
+        'last_24h_total': last_24h,
+        'updated_at': stats.updated_at,
+    }
+
+
+def empty_stats():
+    zero = Decimal('0.00')
+    return {
+        'donor_count': 0,
+        'donation_count': 0,
+        'total_amount': zero,
+        'average_gift': zero,
+        'largest_gift': zero,
+        'last_24h_total': zero,
+        'updated_at': None,
+    }
+
+
+def parse_bound(value, end=False):
+    """
+    A time series bound from an ISO 8601 datetime or date, or ``None`` if
+    ``value`` is neither. Naive values are UTC; a date ``end`` includes
+    the whole day.
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.combine(day, time.max if end else time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+def bucket_of(moment, interval):
+    """The UTC start of the ``interval`` bucket ``moment`` falls in."""
+    hour = hour_of(moment)
+    return hour if interval == 'hour' else hour.replace(hour=0)
+
+
+def bucket_count(start, end, interval):
+    step = ROLLUPS[interval][3]
+    return (bucket_of(end, interval) - bucket_of(start, interval)) // step + 1
+
+
+def default_start(end, interval):
+    return bucket_of(end, interval) - (DEFAULT_BUCKETS[interval] - 1) * ROLLUPS[interval][3]
+
+
+def timeseries(project_id, interval, start, end):
+    """
+    Donations to a project per ``interval`` ('hour' or 'day') bucket, from
+    the one holding ``start`` to the one holding ``end``. Buckets without
+    donations are included as zeros. One indexed range read of the
+    rollup table, however many donations the project has.
+    """
+    model, field, _, step = ROLLUPS[interval]
+    first, last = bucket_of(start, interval), bucket_of(end, interval)
+    if interval == 'day':
+        bounds = (first.date(), last.date())
+    else:
+        bounds = (first, last)
+    rows = model.objects.filter(
+        project_id=project_id, **{f'{field}__range': bounds}
+    ).values_list(field, 'amount', 'donation_count').order_by(field)
+    found = {}
+    for bucket, amount, count in rows:
+        if interval == 'day':
+            bucket = datetime.combine(bucket, time.min, tzinfo=dt_timezone.utc)
+        found[bucket] = (amount, count)
+
+    results = []
+    bucket = first
+    while bucket <= last:
+        amount, count = found.get(bucket, (Decimal('0'), 0))
+        results.append({'start': bucket, 'amount': amount, 'donation_count': count})
+        bucket += step
+    return results
+
+
+def rebuild_rollups(project_id):
+    """
+    Recompute one project's hourly and daily buckets from ``Donation``.
+    Call inside a transaction.
+    """
+    donations = Donation.objects.filter(project_id=project_id).order_by()
+    for model, field, trunc, _ in ROLLUPS.values():
+        model.objects.filter(project_id=project_id).delete()
+        model.objects.bulk_create(
+            model(
+                project_id=project_id,
+                **{field: row['bucket']},
+                amount=row['amount'],
+                donation_count=row['count'],
+            )
+            for row in donations.annotate(bucket=trunc('date', tzinfo=dt_timezone.utc))
+            .values('bucket')
+            .annotate(amount=Sum('amount'), count=Count('id'))
+        )
+
+
+def delete_orphans(models, project_ids=None):
+    """Delete rows of ``models`` for projects whose donations are all gone."""
+    with_donations = Donation.objects.values('project_id')
+    for model in models:
+        orphaned = model.objects.exclude(project_id__in=with_donations)
+        if project_ids is not None:
+            orphaned = orphaned.filter(project_id__in=project_ids)
+        orphaned.delete()
+
+
+def projects_with_donations(project_ids=None):
+    donations = Donation.objects.all()
+    if project_ids is not None:
+        donations = donations.filter(project_id__in=project_ids)
+    return donations.values_list('project_id', flat=True).distinct().order_by('project_id')
+
+
+def backfill_rollups(project_ids=None):
+    """
+    Recompute the hourly and daily buckets from ``Donation``, one project
+    per transaction, leaving the stats rows alone. Returns the number of
+    projects backfilled.
+    """
+    backfilled = 0
+    for project_id in projects_with_donations(project_ids).iterator():
+        with transaction.atomic():
+            rebuild_rollups(project_id)
+        backfilled += 1
+    delete_orphans([model for model, *_ in ROLLUPS.values()], project_ids)
+    return backfilled
+
+
+def rebuild_stats(project_ids=None):
+    """
+    Recompute stats rows and hourly and daily buckets from ``Donation``,
+    one project at a time. Returns the number of projects rebuilt.
+    """
+    rebuilt = 0
+    for project_id in projects_with_donations(project_ids).iterator():
+        project_donations = Donation.objects.filter(project_id=project_id)
+        with transaction.atomic():
+            totals = project_donations.aggregate(
+                donors=Count('user', distinct=True),
+                count=Count('id'),
+                total=Sum('amount'),
+                largest=Max('amount'),
+            )
+            ProjectStats.objects.update_or_create(
+                project_id=project_id,
+                defaults={
+                    'donor_count': totals['donors'],
+                    'donation_count': totals['count'],
+                    'total_amount': totals['total'],
+                    'largest_gift': totals['largest'],
+                    'trending_score': trending.combine(
+                        trending.log_weight(amount, when)
+                        for amount, when in project_donations.values_list('amount', 'date').iterator()
+                    ),
+                }
+            )
+            rebuild_rollups(project_id)
+        rebuilt += 1
+
+    delete_orphans([ProjectStats] + [model for model, *_ in ROLLUPS.values()], project_ids)
+    return rebuilt
@@ -0,0 +1,36 @@
+"""
+Campaign status of a project, as of a date.
+
+- ``upcoming``: not started yet;
+- ``active``: running and short of its goal, i.e. still asking for
+  donations;
+- ``ended``: past its end date;
+- ``funded``: goal reached (``CharityProject.goal_reached``), whatever
+  the dates.
+
+``funded`` overlaps the others. The conditions are plain ``Q`` objects on
+project fields, so they filter ``CharityProject`` and ``AnyProject`` alike
+and can be annotated onto a lookup, as ``create_donation`` does for
+``ended``. Open projects (goal not reached) are covered by the partial
+index ``project_open_created_idx`` in list order.
+"""
+from django.db.models import F, Q
+from django.utils import timezone
+
+STATUSES = {
+    'active': lambda today: Q(
+        start_date__lte=today, end_date__gte=today, amount_raised__lt=F('goal_amount')
+    ),
+    'upcoming': lambda today: Q(start_date__gt=today),
+    'ended': lambda today: Q(end_date__lt=today),
+    'funded': lambda today: Q(amount_raised__gte=F('goal_amount')),
+}
+
+
+def condition(status, today=None):
+    """``Q`` for projects in ``status`` on ``today`` (default: the local date)."""
+    return STATUSES[status](today or timezone.localdate())
+
+
+def with_status(queryset, status, today=None):
+    return queryset.filter(condition(status, today))
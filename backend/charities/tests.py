@@ -1,14 +1,69 @@
-from django.test import TestCase
-from rest_framework.test import APITestCase
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import CharityProject, Donation
-from django.urls import reverse
+from .models import (
+    AmountRaisedShard, ArchivedDonation, ArchivedProject, CharityProject, Donation, EmailOutbox,
+    ProjectDailyTotal, ProjectHourlyTotal, ProjectStats
+)
+from .serializers import CharityProjectSerializer
+from .renderers import FastJSONRenderer
+from .values import ProjectValuesSerializer
+from .views import CharityProjectViewSet
+from django.urls import resolve, reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core import mail
-from datetime import date
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from contextlib import contextmanager, nullcontext
+from unittest import mock
+from django.db import connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
 from PIL import Image
+from prometheus_client import generate_latest
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework_simplejwt.tokens import AccessToken
+from decimal import Decimal
+import base64
+import gzip
 import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time as time_module
+import uuid
+from zoneinfo import ZoneInfo
+
+from .bench import (
+    api as bench_api, auth as bench_auth, donations as bench_donations,
+    leaderboard as bench_leaderboard,
+    near as bench_near, payload as bench_payload, serialize as bench_serialize,
+    servers as bench_servers
+)
+from .bench.seed import create_users, seed_donations, seed_projects
+from . import (
+    archive, cache as response_cache, compression, exports, geo, leaderboard, metrics, renderers,
+    replicas,
+    search as search_index, stats as project_stats, status as project_status, trending
+)
+from .outbox import send_pending
+from .counters import add_to_amount_raised, current_amount_raised
 
 User = get_user_model()
 
@@ -137,7 +192,7 @@ class CharityProjectTests(APITestCase):
         """Test listing all charities"""
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_retrieve_charity(self):
         """Test retrieving a specific charity"""
@@ -176,7 +231,7 @@ class CharityProjectTests(APITestCase):
         """Test searching charities"""
         response = self.client.get(f'{self.list_url}?search=Test')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
 
 class DonationTests(APITestCase):
@@ -291,7 +346,7 @@ class DonationTests(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
 
     def test_donation_updates_project_amount(self):
         """Test that donation properly updates project amount_raised"""
@@ -323,4 +378,3355 @@ class EmailTest(TestCase):
             fail_silently=False,
         )
         self.assertEqual(len(mail.outbox), 1)
-        self.assertEqual(mail.outbox[0].subject, 'Test Subject')
\ No newline at end of file
+        self.assertEqual(mail.outbox[0].subject, 'Test Subject')
+
+
+class WorkerCrash(BaseException):
+    """Stands in for the worker process dying mid-batch"""
+
+
+class FlakyEmailBackend(LocmemEmailBackend):
+    """
+    locmem backend that counts connections, can be told to fail or to
+    crash after ``crash_after`` messages, and records whether each send
+    ran inside a transaction
+    """
+    opened = 0
+    fail = False
+    crash_after = None
+    in_transaction = []
+
+    def open(self):
+        FlakyEmailBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        FlakyEmailBackend.in_transaction.append(connection.in_atomic_block)
+        if FlakyEmailBackend.fail:
+            raise ConnectionError('SMTP unavailable')
+        if FlakyEmailBackend.crash_after is not None and len(mail.outbox) >= self.crash_after:
+            raise WorkerCrash()
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='charities.tests.FlakyEmailBackend',
+    OUTBOX_MAX_ATTEMPTS=3,
+    OUTBOX_RETRY_BASE_SECONDS=60,
+)
+class EmailOutboxTests(APITestCase):
+    def setUp(self):
+        FlakyEmailBackend.opened = 0
+        FlakyEmailBackend.fail = False
+        FlakyEmailBackend.crash_after = None
+        self.user = User.objects.create_user(
+            username='outboxdonor',
+            email='donor@example.com',
+            password='TestPass123!',
+            first_name='Outbox',
+            last_name='Donor'
+        )
+        self.charity = CharityProject.objects.create(
+            title='Outbox Project',
+            description='Test Description',
+            goal_amount=100.00,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.user
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def donate(self, amount):
+        return self.client.post(
+            reverse('create-donation'),
+            {'amount': amount, 'project': self.charity.id}
+        )
+
+    def test_donation_queues_email_without_sending(self):
+        """Test that a donation writes to the outbox instead of calling SMTP"""
+        response = self.donate('50.00')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(FlakyEmailBackend.opened, 0)
+
+        queued = EmailOutbox.objects.get()
+        self.assertEqual(queued.recipient, 'donor@example.com')
+        self.assertEqual(queued.status, EmailOutbox.STATUS_PENDING)
+
+    def test_goal_reached_email_queued(self):
+        """Test that reaching the goal queues a second email for the owner"""
+        self.donate('150.00')
+        subjects = set(EmailOutbox.objects.values_list('subject', flat=True))
+        self.assertEqual(subjects, {
+            'Thank you for your donation!',
+            'Goal Reached for Outbox Project!'
+        })
+
+    def test_worker_drains_batch_over_one_connection(self):
+        """Test that the worker sends a whole batch over one connection"""
+        for _ in range(3):
+            self.donate('10.00')
+
+        call_command('send_queued_emails', stdout=io.StringIO())
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(FlakyEmailBackend.opened, 1)
+        self.assertFalse(EmailOutbox.objects.due().exists())
+        self.assertEqual(
+            EmailOutbox.objects.filter(status=EmailOutbox.STATUS_SENT).count(), 3
+        )
+
+    def test_failed_send_is_retried_with_backoff(self):
+        """Test that failures are rescheduled and eventually marked failed"""
+        self.donate('10.00')
+        FlakyEmailBackend.fail = True
+
+        before = timezone.now()
+        call_command('send_queued_emails', stdout=io.StringIO())
+        queued = EmailOutbox.objects.get()
+        self.assertEqual(queued.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('SMTP unavailable', queued.last_error)
+        self.assertGreaterEqual(
+            queued.next_attempt_at, before + timedelta(seconds=60)
+        )
+
+        # Not due yet, so a second run does nothing
+        call_command('send_queued_emails', stdout=io.StringIO())
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 1)
+
+        for _ in range(2):
+            EmailOutbox.objects.update(next_attempt_at=timezone.now())
+            call_command('send_queued_emails', stdout=io.StringIO())
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, EmailOutbox.STATUS_FAILED)
+        self.assertEqual(queued.attempts, 3)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_retry_succeeds_after_outage(self):
+        """Test that a message queued during an outage is delivered later"""
+        self.donate('10.00')
+        FlakyEmailBackend.fail = True
+        call_command('send_queued_emails', stdout=io.StringIO())
+
+        FlakyEmailBackend.fail = False
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        call_command('send_queued_emails', stdout=io.StringIO())
+
+        queued = EmailOutbox.objects.get()
+        self.assertEqual(queued.status, EmailOutbox.STATUS_SENT)
+        self.assertIsNotNone(queued.sent_at)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_crash_mid_batch_keeps_sent_messages(self):
+        """Test that a worker dying mid-batch only retries unsent messages, after the lease"""
+        for _ in range(3):
+            self.donate('10.00')
+        FlakyEmailBackend.crash_after = 1
+
+        with self.assertRaises(WorkerCrash):
+            send_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            EmailOutbox.objects.filter(status=EmailOutbox.STATUS_SENT).count(), 1
+        )
+        # The rest stay claimed until their lease runs out
+        self.assertFalse(EmailOutbox.objects.due().exists())
+        self.assertEqual(send_pending(), (0, 0))
+
+        FlakyEmailBackend.crash_after = None
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_pending(), (2, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+
+@override_settings(EMAIL_BACKEND='charities.tests.FlakyEmailBackend')
+class EmailOutboxTransactionTests(TransactionTestCase):
+    def test_sends_outside_a_transaction(self):
+        """Test that no transaction, and so no database lock, is held while sending"""
+        FlakyEmailBackend.in_transaction = []
+        for i in range(3):
+            EmailOutbox.objects.enqueue('Subject', '<p>Hi</p>', f'donor{i}@example.com')
+
+        self.assertEqual(send_pending(), (3, 0))
+        self.assertEqual(FlakyEmailBackend.in_transaction, [False] * 3)
+
+
+class AmountRaisedCounterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='counterdonor',
+            email='counter@example.com',
+            password='TestPass123!',
+            first_name='Counter',
+            last_name='Donor'
+        )
+        self.charity = CharityProject.objects.create(
+            title='Counter Project',
+            description='Test Description',
+            goal_amount=100.00,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.user
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def donate(self, amount):
+        return self.client.post(
+            reverse('create-donation'),
+            {'amount': amount, 'project': self.charity.id}
+        )
+
+    def test_donation_does_not_overwrite_concurrent_update(self):
+        """Test that the increment is applied in SQL, not from a stale read"""
+        # Simulate another donation committing after this project was loaded
+        stale = CharityProject.objects.get(pk=self.charity.pk)
+        CharityProject.objects.filter(pk=self.charity.pk).update(amount_raised=30)
+        add_to_amount_raised(stale.pk, Decimal('20.00'))
+
+        self.charity.refresh_from_db()
+        self.assertEqual(self.charity.amount_raised, Decimal('50.00'))
+
+    @override_settings(AMOUNT_RAISED_SHARDS=4)
+    def test_sharded_donations_roll_up(self):
+        """Test that sharded amounts are visible after a rollup"""
+        for _ in range(10):
+            self.assertEqual(self.donate('15.00').status_code, status.HTTP_201_CREATED)
+
+        self.charity.refresh_from_db()
+        self.assertEqual(self.charity.amount_raised, Decimal('0.00'))
+        self.assertEqual(current_amount_raised(self.charity.pk), Decimal('150.00'))
+        self.assertLessEqual(AmountRaisedShard.objects.count(), 4)
+
+        call_command('rollup_amount_raised', stdout=io.StringIO())
+        self.charity.refresh_from_db()
+        self.assertEqual(self.charity.amount_raised, Decimal('150.00'))
+        self.assertFalse(AmountRaisedShard.objects.exclude(amount=0).exists())
+
+    @override_settings(AMOUNT_RAISED_SHARDS=4)
+    def test_goal_email_counts_pending_shards(self):
+        """Test that the goal check sees amounts not yet rolled up"""
+        self.donate('60.00')
+        self.donate('60.00')
+        self.assertTrue(
+            EmailOutbox.objects.filter(subject__startswith='Goal Reached').exists()
+        )
+
+
+class DonationStressTests(TransactionTestCase):
+    """Multi-threaded donations to one project; see charities.bench.donations"""
+
+    def assertNothingLost(self, result):
+        self.assertEqual(result['accepted'], result['attempted'])
+        self.assertEqual(result['donation_rows'], result['accepted'])
+        self.assertEqual(result['amount_raised'], result['expected_amount'])
+        self.assertEqual(result['lost_amount'], '0.00')
+
+    def test_concurrent_donations_are_not_lost(self):
+        """Test that no donation is lost under concurrent donors"""
+        result = bench_donations.run(threads=4, donations=10, lock_retries=200)
+        self.assertNothingLost(result)
+
+    def test_concurrent_sharded_donations_are_not_lost(self):
+        """Test that no donation is lost with sharded counters"""
+        result = bench_donations.run(threads=4, donations=10, shards=4, lock_retries=200)
+        self.assertNothingLost(result)
+
+    @override_settings(AMOUNT_RAISED_SHARDS=4)
+    def test_sharded_donation_commits_while_stats_are_locked(self):
+        """Test that a donation does not wait on the project's stats row"""
+        if connection.vendor != 'postgresql':
+            self.skipTest('SQLite locks the whole database, not rows')
+        donor = User.objects.create_user(
+            username='lockeddonor',
+            email='locked@example.com',
+            password='TestPass123!',
+            first_name='Locked',
+            last_name='Donor'
+        )
+        project = CharityProject.objects.create(
+            title='Locked Stats Project',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=donor
+        )
+        ProjectStats.objects.create(project=project)
+        responses = []
+
+        def donate():
+            client = APIClient()
+            client.force_authenticate(user=donor)
+            try:
+                responses.append(client.post(
+                    reverse('create-donation'), {'amount': '10.00', 'project': project.id}
+                ))
+            finally:
+                connections.close_all()
+
+        donor_thread = threading.Thread(target=donate)
+        with transaction.atomic():
+            # Stand in for another donor's transaction updating the stats
+            ProjectStats.objects.select_for_update().get(project=project)
+            donor_thread.start()
+            deadline = time_module.monotonic() + 5
+            committed = False
+            while not committed and time_module.monotonic() < deadline:
+                time_module.sleep(0.05)
+                committed = Donation.objects.filter(project=project).exists()
+        donor_thread.join()
+
+        self.assertTrue(committed, 'The donation waited for the stats row lock')
+        self.assertEqual(responses[0].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ProjectStats.objects.get(project=project).donation_count, 1)
+
+
+class ApiLoadBenchmarkTests(TransactionTestCase):
+    """The mixed-endpoint load scenario; see charities.bench.api"""
+
+    def assertAllServed(self, result):
+        self.assertEqual(result['errors'], 0, result['endpoints'])
+        self.assertEqual(set(result['endpoints']), set(bench_api.ENDPOINTS))
+        self.assertEqual(sum(e['requests'] for e in result['endpoints'].values()), 40)
+        for endpoint in result['endpoints'].values():
+            self.assertIsNotNone(endpoint['latency_ms']['p99'])
+
+    def test_test_client_driver(self):
+        """Test that every endpoint in the mix is exercised in process"""
+        result = bench_api.run(
+            users=3, projects=20, donations=50, workers=1, requests=40,
+            mix='list=1,search=1,detail=1,user_donations=1,donate=1'
+        )
+        self.assertAllServed(result)
+        self.assertEqual(
+            Donation.objects.count(), 50 + result['endpoints']['donate']['requests']
+        )
+
+    def test_wsgi_driver(self):
+        """Test the same load over HTTP to a local WSGI server"""
+        result = bench_api.run(
+            users=3, projects=20, donations=50, workers=1, requests=40, driver='wsgi',
+            mix='list=1,search=1,detail=1,user_donations=1,donate=1', auth_reads=True
+        )
+        self.assertAllServed(result)
+
+    def test_mix_is_validated(self):
+        """Test that unknown endpoints in --mix are rejected"""
+        self.assertEqual(bench_api.parse_mix('list=3,donate'), {'list': 3, 'donate': 1})
+        with self.assertRaises(ValueError):
+            bench_api.parse_mix('list=1,export=2')
+
+
+class ServerCapacityBenchmarkTests(TransactionTestCase):
+    """WSGI vs ASGI connection capacity; see charities.bench.servers"""
+
+    def test_both_servers_serve_every_request(self):
+        """Test that both servers answer every read over keep-alive connections"""
+        # Reads only: the in-memory test database locks tables on concurrent writes
+        result = bench_servers.run(
+            users=3, projects=20, donations=50, connections=[1, 6], requests=5, threads=2,
+            auth_reads=True
+        )
+        self.assertEqual(set(result['servers']), {'wsgi', 'asgi'})
+        for levels in result['servers'].values():
+            self.assertEqual([level['connections'] for level in levels], [1, 6])
+            for level in levels:
+                self.assertEqual(level['errors'], 0, level)
+                self.assertEqual(level['requests'], level['connections'] * 5)
+
+    def test_options_are_validated(self):
+        """Test that unknown servers and bad connection counts are rejected"""
+        self.assertEqual(bench_servers.parse_levels('8,64'), [8, 64])
+        with self.assertRaises(ValueError):
+            bench_servers.parse_levels('8,0')
+        with self.assertRaises(CommandError):
+            bench_servers.run(servers='wsgi,gunicorn')
+
+
+class SerializeBenchmarkTests(TransactionTestCase):
+    """Serializer vs .values() per-row cost; see charities.bench.serialize"""
+
+    def test_paths_render_identical_json(self):
+        """Test that both paths are timed and produce the same document"""
+        result = bench_serialize.run(rows=30, users=3, repeat=2)
+        self.assertEqual(result['rows'], 30)
+        self.assertTrue(result['identical_json'])
+        for path in ('serializer', 'values'):
+            self.assertGreater(result[path]['total_us_per_row'], 0)
+
+
+class PayloadBenchmarkTests(TransactionTestCase):
+    """List payload rendering and compression; see charities.bench.payload"""
+
+    def test_reports_each_page_size(self):
+        """Test that renderers agree and every coding is measured"""
+        result = bench_payload.run(projects=30, users=3, page_sizes=[5, 20], repeat=2)
+        self.assertEqual([page['items'] for page in result['pages']], [5, 20])
+        for page in result['pages']:
+            self.assertTrue(page['identical_json'])
+            self.assertEqual(set(page['encodings']), set(compression.encoders()))
+            for coding in page['encodings'].values():
+                self.assertLess(coding['bytes'], page['bytes'])
+
+
+class AuthBenchmarkTests(TransactionTestCase):
+    """JWT authentication overhead; see charities.bench.auth"""
+
+    def test_warm_cache_skips_user_queries(self):
+        """Test that only the first request of each user loads it once the cache is warm"""
+        result = bench_auth.run(users=10, requests=20)
+        self.assertEqual(result['active_users'], 5)
+        self.assertEqual(result['authenticate']['uncached']['queries_per_call'], 1)
+        self.assertEqual(result['authenticate']['cold']['queries_per_call'], 1)
+        # At most one load per distinct user
+        self.assertLessEqual(result['authenticate']['warm']['queries_per_call'], 0.25)
+        self.assertLessEqual(
+            result['request']['warm']['queries_per_call'],
+            result['request']['cold']['queries_per_call'] - 0.75
+        )
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='pageowner',
+            email='pages@example.com',
+            password='TestPass123!',
+            first_name='Page',
+            last_name='Owner'
+        )
+        self.projects = [
+            CharityProject.objects.create(
+                title=f'Project {i}',
+                description='Test Description',
+                goal_amount=100 + i,
+                start_date=date.today(),
+                end_date=date.today(),
+                created_by=self.user
+            )
+            for i in range(7)
+        ]
+        # Several rows share a created_at so the id tiebreaker matters
+        tied = timezone.now()
+        CharityProject.objects.filter(
+            pk__in=[p.pk for p in self.projects[2:5]]
+        ).update(created_at=tied)
+        self.list_url = reverse('charity-list')
+
+    def collect(self, url):
+        ids = []
+        for _ in range(20):
+            if not url:
+                break
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_cover_all_rows_once_in_order(self):
+        """Test walking next links returns every project exactly once"""
+        expected = list(
+            CharityProject.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(self.collect(f'{self.list_url}?page_size=2'), expected)
+
+    def test_previous_link_returns_prior_page(self):
+        """Test that previous links walk back to the same pages"""
+        first = self.client.get(f'{self.list_url}?page_size=3')
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']]
+        )
+
+    def test_ordering_parameter_is_paginated(self):
+        """Test that ?ordering= is used as the keyset"""
+        expected = list(
+            CharityProject.objects.order_by('goal_amount', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(
+            self.collect(f'{self.list_url}?page_size=3&ordering=goal_amount'), expected
+        )
+
+    def test_seek_without_offset_or_count(self):
+        """Test that pages use a WHERE seek and skip COUNT(*) by default"""
+        first = self.client.get(f'{self.list_url}?page_size=2')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(first.data['next'])
+        self.assertNotIn('count', response.data)
+        sql = ' '.join(q['sql'] for q in queries.captured_queries).upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    def test_count_on_request(self):
+        """Test that ?count=true adds the total"""
+        response = self.client.get(f'{self.list_url}?page_size=2&count=true')
+        self.assertEqual(response.data['count'], 7)
+        self.assertNotIn('count=', response.data['next'])
+
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is rejected"""
+        response = self.client.get(f'{self.list_url}?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_values_of_the_wrong_type(self):
+        """Test that a well-formed cursor holding values of the wrong type is rejected"""
+        for values, ordering in [
+            (['garbage', 1], ''),
+            ([{'a': 1}, 1], ''),
+            (['2024-01-01T00:00:00', 'x'], ''),
+            ([None, 1], ''),
+            ([[1], 1], '&ordering=goal_amount'),
+        ]:
+            token = json.dumps({'v': values, 'r': False}).encode()
+            cursor = base64.urlsafe_b64encode(token).decode().rstrip('=')
+            with self.subTest(values=values):
+                response = self.client.get(f'{self.list_url}?cursor={cursor}{ordering}')
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+                self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+    def test_user_donations_paginated(self):
+        """Test that user donations are paginated by -date, -id"""
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            Donation.objects.create(
+                user=self.user,
+                project=self.projects[0],
+                amount=10,
+                transaction_id=f'page_txn_{i}'
+            )
+        Donation.objects.update(date=timezone.now())
+        url = reverse('user-donations', args=[self.user.id])
+        expected = list(
+            Donation.objects.order_by('-date', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(self.collect(f'{url}?page_size=2'), expected)
+
+    def test_user_projects_paginated(self):
+        """Test that user projects are paginated"""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('user-projects', args=[self.user.id])
+        response = self.client.get(f'{url}?page_size=5')
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(len(self.collect(f'{url}?page_size=5')), 7)
+
+
+class FullTextSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='searchowner',
+            email='search@example.com',
+            password='TestPass123!',
+            first_name='Search',
+            last_name='Owner'
+        )
+        self.list_url = reverse('charity-list')
+
+    def create(self, title, description='Helping the community', location=''):
+        return CharityProject.objects.create(
+            title=title,
+            description=description,
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            location=location,
+            created_by=self.user
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(self.list_url, {'search': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_matches_title_description_and_location(self):
+        """Test that every indexed field is searchable"""
+        by_title = self.create('Clean Water Wells')
+        by_description = self.create('Village Fund', description='Digging water wells')
+        by_location = self.create('School Supplies', location='Waterford')
+        self.create('Animal Shelter')
+
+        self.assertCountEqual(self.search('water'), [by_title.id, by_description.id, by_location.id])
+
+    def test_title_matches_rank_first(self):
+        """Test that results are ordered by relevance"""
+        in_description = self.create('Village Fund', description='Books for the library')
+        in_title = self.create('Library Books')
+        self.assertEqual(self.search('library books'), [in_title.id, in_description.id])
+
+    def test_all_terms_required(self):
+        """Test that every search term must match"""
+        both = self.create('Food Bank', location='Springfield')
+        self.create('Food Drive')
+        self.assertEqual(self.search('food springfield'), [both.id])
+
+    def test_explicit_ordering_overrides_rank(self):
+        """Test that ?ordering= still applies to search results"""
+        first = self.create('Garden Project')
+        second = self.create('Garden Project')
+        self.assertEqual(self.search('garden', ordering='created_at'), [first.id, second.id])
+
+    def test_punctuation_is_ignored(self):
+        """Test that query syntax characters cannot break the search"""
+        project = self.create('Kids Coding Camp')
+        self.assertEqual(self.search('"coding" (camp*'), [project.id])
+        self.assertEqual(self.search('*"'), [])
+
+    def test_index_follows_update_and_delete(self):
+        """Test that the index is kept in sync on save and delete"""
+        project = self.create('Old Title')
+        project.title = 'Renamed Project'
+        project.save()
+        self.assertEqual(self.search('old'), [])
+        self.assertEqual(self.search('renamed'), [project.id])
+
+        project.delete()
+        self.assertEqual(self.search('renamed'), [])
+
+    def test_search_results_paginate_by_rank(self):
+        """Test that keyset pagination walks ranked search results"""
+        ids = {self.create(f'Shelter {i}').id for i in range(5)}
+        seen = []
+        url = f'{self.list_url}?search=shelter&page_size=2'
+        for _ in range(5):
+            response = self.client.get(url)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+            if not url:
+                break
+        self.assertIsNone(url)
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(set(seen), ids)
+
+
+class NearFilterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='geoowner',
+            email='geo@example.com',
+            password='TestPass123!',
+            first_name='Geo',
+            last_name='Owner'
+        )
+        self.list_url = reverse('charity-list')
+        self.manhattan = self.create('Manhattan', 40.7128, -74.0060)
+        self.brooklyn = self.create('Brooklyn', 40.6782, -73.9442)
+        self.philadelphia = self.create('Philadelphia', 39.9526, -75.1652)
+        self.nowhere = self.create('No Location', None, None)
+
+    def create(self, title, lat, lng):
+        return CharityProject.objects.create(
+            title=title,
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            latitude=lat,
+            longitude=lng,
+            created_by=self.user
+        )
+
+    def near(self, **params):
+        return self.client.get(self.list_url, params)
+
+    def test_radius_filters_projects(self):
+        """Test that only projects inside the radius are returned"""
+        response = self.near(near='40.7128,-74.0060', radius_km=20)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            [item['id'] for item in response.data['results']],
+            [self.manhattan.id, self.brooklyn.id]
+        )
+
+        response = self.near(near='40.7128,-74.0060', radius_km=200)
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_ordering_by_distance(self):
+        """Test ?ordering=distance and the distance in the response"""
+        response = self.near(near='40.0,-75.0', radius_km=200, ordering='distance')
+        results = response.data['results']
+        self.assertEqual(
+            [item['id'] for item in results],
+            [self.philadelphia.id, self.manhattan.id, self.brooklyn.id]
+        )
+        distances = [item['distance'] for item in results]
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(distances[0], 14.9, delta=0.5)
+
+    def test_distance_ordering_needs_near(self):
+        """Test that ?ordering=distance is ignored without ?near="""
+        response = self.client.get(self.list_url, {'ordering': 'distance'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertNotIn('distance', response.data['results'][0])
+
+    def test_invalid_parameters(self):
+        """Test that malformed coordinates and radii are rejected"""
+        for params in (
+            {'near': 'abc'},
+            {'near': '91,0'},
+            {'near': '40,-74', 'radius_km': '-1'},
+            {'near': '40,-74', 'radius_km': 'far'},
+        ):
+            response = self.near(**params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_antimeridian(self):
+        """Test that the bounding box wraps around longitude 180"""
+        fiji = self.create('Fiji East', -17.0, 179.9)
+        self.create('Fiji West', -17.0, -179.9)
+        response = self.near(near='-17.0,179.95', radius_km=50)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIn(fiji.id, [item['id'] for item in response.data['results']])
+
+    def test_bounding_box_matches_full_scan(self):
+        """Test that the index prefilter never drops a match"""
+        result = bench_near.run(projects=500, queries=10, radius_km=1000)
+        self.assertGreater(result['bounding_box']['mean_results'], 0)
+        self.assertEqual(
+            result['bounding_box']['mean_results'], result['full_scan']['mean_results']
+        )
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        response_cache.reset_stats()
+        self.user = User.objects.create_user(
+            username='cacheowner',
+            email='cache@example.com',
+            password='TestPass123!',
+            first_name='Cache',
+            last_name='Owner'
+        )
+        self.charity = CharityProject.objects.create(
+            title='Cached Project',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.user
+        )
+        self.other = CharityProject.objects.create(
+            title='Other Project',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.user
+        )
+        self.list_url = reverse('charity-list')
+        self.detail_url = reverse('charity-detail', args=[self.charity.id])
+
+    def test_anonymous_list_is_cached(self):
+        """Test that a repeated anonymous list is served without queries"""
+        first = self.client.get(self.list_url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(self.list_url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(response_cache.stats()['hits'], 1)
+        self.assertEqual(response_cache.stats()['misses'], 1)
+
+    def test_query_string_is_part_of_key(self):
+        """Test that search and ordering get their own cache entries"""
+        self.client.get(self.list_url, {'ordering': 'created_at'})
+        response = self.client.get(self.list_url, {'ordering': '-created_at'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = self.client.get(self.list_url, {'search': 'cached'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_save_invalidates_list_and_detail(self):
+        """Test that saving a project bumps its version and the catalog"""
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        self.charity.title = 'Renamed Project'
+        self.charity.save()
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Renamed Project')
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_detail_key_uses_the_numeric_id(self):
+        """Test that a zero-padded pk is invalidated with the project"""
+        padded_url = reverse('charity-detail', args=[f'0{self.charity.id}'])
+        self.client.get(padded_url)
+
+        self.charity.title = 'Renamed Project'
+        self.charity.save()
+
+        response = self.client.get(padded_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Renamed Project')
+
+        response = self.client.get(reverse('charity-detail', args=['abc']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_project_save_keeps_detail_cached(self):
+        """Test that detail entries are versioned per project"""
+        self.client.get(self.detail_url)
+        self.other.title = 'Changed'
+        self.other.save()
+        self.assertEqual(self.client.get(self.detail_url)['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'MISS')
+
+    def test_creator_save_invalidates_their_projects(self):
+        """Test that renaming the creator refreshes the embedded created_by"""
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        self.user.first_name = 'Renamed'
+        self.user.save()
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['created_by']['first_name'], 'Renamed')
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['created_by']['first_name'], 'Renamed')
+
+    def test_unrelated_user_fields_keep_projects_cached(self):
+        """Test that saving fields projects do not embed keeps the entries"""
+        self.client.get(self.detail_url)
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(self.detail_url)['X-Cache'], 'HIT')
+
+    def test_delete_invalidates_list(self):
+        """Test that deleting a project removes it from the cached list"""
+        self.client.get(self.list_url)
+        self.other.delete()
+        response = self.client.get(self.list_url)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_donation_invalidates_detail(self):
+        """Test that a donation shows up in the cached amount_raised"""
+        self.client.get(self.detail_url)
+        self.client.force_authenticate(user=self.user)
+        self.client.post(reverse('create-donation'), {'amount': '25.00', 'project': self.charity.id})
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['amount_raised'], '25.00')
+
+    def test_authenticated_requests_bypass_cache(self):
+        """Test that only anonymous reads use the cache"""
+        self.client.force_authenticate(user=self.user)
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url)
+        self.assertNotIn('X-Cache', response)
+
+    def test_stats_endpoint_is_admin_only(self):
+        """Test that hit/miss counters are exposed to staff"""
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        url = reverse('cache-stats')
+
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.user = User.objects.create_user(
+            username='etagowner',
+            email='etag@example.com',
+            password='TestPass123!',
+            first_name='Etag',
+            last_name='Owner'
+        )
+        self.charity = CharityProject.objects.create(
+            title='Polled Project',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.user
+        )
+        self.list_url = reverse('charity-list')
+        self.detail_url = reverse('charity-detail', args=[self.charity.id])
+
+    def test_detail_not_modified(self):
+        """Test that a matching If-None-Match gets 304 from one query"""
+        first = self.client.get(self.detail_url)
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', first)
+
+        response_cache.get_cache().clear()
+        with mock.patch.object(
+            CharityProjectSerializer, 'to_representation'
+        ) as to_representation, self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(to_representation.called)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_etag_changes_with_amount_raised(self):
+        """Test that a donation changes the project validators"""
+        etag = self.client.get(self.detail_url)['ETag']
+        add_to_amount_raised(self.charity.id, Decimal('10.00'))
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['amount_raised'], '10.00')
+
+    def test_detail_if_modified_since(self):
+        """Test that If-Modified-Since is honoured"""
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        CharityProject.objects.filter(pk=self.charity.pk).update(
+            updated_at=timezone.now() + timedelta(minutes=1)
+        )
+        response_cache.bump_project(self.charity.pk)
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_creator_change_modifies_their_projects(self):
+        """Test that renaming the creator changes the detail and list validators"""
+        detail = self.client.get(self.detail_url)
+        listing = self.client.get(self.list_url)
+
+        self.user.first_name = 'Renamed'
+        # A minute later, so Last-Modified advances by more than its resolution
+        later = timezone.now() + timedelta(minutes=1)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.user.save()
+        response_cache.get_cache().clear()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created_by']['first_name'], 'Renamed')
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=detail['Last-Modified']
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_not_modified(self):
+        """Test the catalog-level validator on the list"""
+        etag = self.client.get(self.list_url)['ETag']
+        response_cache.get_cache().clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # The probe result is remembered until the next write
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_on_create_and_delete(self):
+        """Test that adding or removing a project changes the catalog ETag"""
+        etag = self.client.get(self.list_url)['ETag']
+        other = CharityProject.objects.create(
+            title='Another',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.user
+        )
+        created_etag = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)['ETag']
+        self.assertNotEqual(created_etag, etag)
+
+        other.delete()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=created_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_has_no_last_modified(self):
+        """Test that If-Modified-Since cannot hide a deleted project from the list"""
+        other = CharityProject.objects.create(
+            title='Another',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.user
+        )
+        response = self.client.get(self.list_url)
+        self.assertNotIn('Last-Modified', response)
+
+        other.delete()
+        response = self.client.get(
+            self.list_url, HTTP_IF_MODIFIED_SINCE=http_date((timezone.now() + timedelta(minutes=1)).timestamp())
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [self.charity.id])
+
+    def test_missing_project_still_404(self):
+        """Test that validators do not mask a missing project"""
+        url = reverse('charity-detail', args=[99999])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"anything"')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AsyncReadTests(APITestCase):
+    # Headers that must not depend on which path served the request
+    COMPARED_HEADERS = (
+        'Content-Type', 'Allow', 'Vary', 'ETag', 'Last-Modified', 'X-Cache', 'WWW-Authenticate'
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='asyncowner',
+            email='async@example.com',
+            password='TestPass123!',
+            first_name='Async',
+            last_name='Owner'
+        )
+        self.other = User.objects.create_user(
+            username='asyncother',
+            email='asyncother@example.com',
+            password='TestPass123!',
+            first_name='Async',
+            last_name='Other'
+        )
+        self.projects = [
+            CharityProject.objects.create(
+                title=f'Async Well {i}',
+                description='Clean water for a village',
+                location='Nairobi' if i % 2 else 'Lagos',
+                goal_amount=100 * (i + 1),
+                start_date=date.today(),
+                end_date=date.today(),
+                latitude=-1.29 if i % 2 else 6.52,
+                longitude=36.82 if i % 2 else 3.37,
+                created_by=self.user
+            )
+            for i in range(5)
+        ]
+        for project in self.projects[:3]:
+            Donation.objects.create(
+                user=self.user, project=project, amount=Decimal('10.00'),
+                transaction_id=f'async-{project.id}'
+            )
+        self.token = str(AccessToken.for_user(self.user))
+        self.list_url = reverse('charity-list')
+
+    def get_both(self, path, token=None, **headers):
+        """GET ``path`` through the sync and the ASGI URLconf, cache cleared."""
+        if token:
+            headers['Authorization'] = f'JWT {token}'
+        response_cache.get_cache().clear()
+        sync_response = self.client.get(path, headers=headers)
+        response_cache.get_cache().clear()
+        # Anonymous reads must not need a thread at all
+        no_threads = nullcontext() if token else mock.patch(
+            'charities.async_read.sync_to_async', side_effect=AssertionError('left the event loop')
+        )
+        with override_settings(ROOT_URLCONF='backend.asgi_urls'), no_threads:
+            async_response = async_to_sync(self.async_client.get)(path, headers=headers)
+            # resolver_match is resolved lazily, against the current URLconf
+            self.assertTrue(
+                iscoroutinefunction(async_response.resolver_match.func),
+                f'{path} was not routed to an async view'
+            )
+        return sync_response, async_response
+
+    def assertSameResponse(self, path, token=None, **headers):
+        sync_response, async_response = self.get_both(path, token, **headers)
+        self.assertEqual(async_response.status_code, sync_response.status_code, path)
+        self.assertEqual(async_response.content, sync_response.content, path)
+        for header in self.COMPARED_HEADERS:
+            self.assertEqual(async_response.get(header), sync_response.get(header), (path, header))
+        return async_response
+
+    def test_project_reads_match_sync(self):
+        """Test that async list, search, near and detail responses equal the sync ones"""
+        first_page = self.client.get(self.list_url, {'page_size': 2}).data
+        paths = [
+            self.list_url,
+            f'{self.list_url}?page_size=2&count=true',
+            first_page['next'],
+            f'{self.list_url}?search=water',
+            f'{self.list_url}?search=nairobi&ordering=-goal_amount',
+            f'{self.list_url}?near=-1.29,36.82&radius=50&ordering=distance',
+            f'{self.list_url}?near=oops',
+            f'{self.list_url}?status=active',
+            f'{self.list_url}?cursor=not-a-cursor',
+            reverse('charity-detail', args=[self.projects[0].id]),
+            reverse('charity-detail', args=[99999]),
+        ]
+        for path in paths:
+            response = self.assertSameResponse(path)
+            self.assertIn(response.status_code, (200, 400, 404), path)
+        for path in paths[:2]:
+            self.assertSameResponse(path, token=self.token)
+
+    def test_sparse_fieldsets_match_sync(self):
+        """Test that ?fields= and ?omit= are applied the same way on the async path"""
+        user_projects = reverse('user-projects', args=[self.user.id])
+        user_donations = reverse('user-donations', args=[self.user.id])
+        for path in [
+            f'{self.list_url}?fields=id,title&page_size=2',
+            f'{self.list_url}?omit=description,created_by&ordering=goal_amount',
+            f'{self.list_url}?fields=bogus',
+            reverse('charity-detail', args=[self.projects[0].id]) + '?fields=title',
+            f'{user_projects}?fields=id,created_by',
+            f'{user_donations}?omit=project',
+            f'{user_donations}?fields=bogus',
+        ]:
+            response = self.assertSameResponse(path, token=self.token)
+            self.assertIn(response.status_code, (200, 400), path)
+
+    def test_dashboards_match_sync(self):
+        """Test that async user dashboards keep their responses and permissions"""
+        for name in ('user-donations', 'user-projects'):
+            own = reverse(name, args=[self.user.id])
+            self.assertEqual(self.assertSameResponse(own, token=self.token).status_code, 200)
+            self.assertSameResponse(f'{own}?page_size=1&count=true', token=self.token)
+            forbidden = reverse(name, args=[self.other.id])
+            self.assertEqual(
+                self.assertSameResponse(forbidden, token=self.token).status_code, 403
+            )
+            self.assertEqual(self.assertSameResponse(own).status_code, 401)
+            self.assertEqual(self.assertSameResponse(own, token='garbage').status_code, 401)
+
+    def test_conditional_get(self):
+        """Test that the async views answer 304 to a matching ETag"""
+        detail_url = reverse('charity-detail', args=[self.projects[0].id])
+        etag = self.client.get(detail_url)['ETag']
+        _, response = self.get_both(detail_url, **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_response_cache(self):
+        """Test that anonymous async reads fill and hit the shared response cache"""
+        response_cache.get_cache().clear()
+        with override_settings(ROOT_URLCONF='backend.asgi_urls'):
+            first = async_to_sync(self.async_client.get)(self.list_url)
+            second = async_to_sync(self.async_client.get)(self.list_url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    def test_writes_and_browsable_api_use_sync_views(self):
+        """Test that writes and HTML requests on async routes still work"""
+        with override_settings(ROOT_URLCONF='backend.asgi_urls'):
+            response = async_to_sync(self.async_client.patch)(
+                reverse('charity-detail', args=[self.projects[0].id]),
+                {'title': 'Renamed Well'}, content_type='application/json',
+                headers={'Authorization': f'JWT {self.token}'}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content)['title'], 'Renamed Well')
+
+            response = async_to_sync(self.async_client.get)(
+                self.list_url, headers={'Accept': 'text/html'}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+            # Non-numeric ids and actions fall through to the router
+            response = async_to_sync(self.async_client.get)(reverse('charity-leaderboard'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0, ROOT_URLCONF='backend.asgi_urls')
+    def test_queries_are_observed(self):
+        """Test that Server-Timing counts queries made through the async ORM"""
+        response_cache.get_cache().clear()
+        with self.assertLogs('charities.timing'):
+            response = async_to_sync(self.async_client.get)(
+                self.list_url, headers={'Authorization': f'JWT {self.token}'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+        self.assertIn('render;dur=', response['Server-Timing'])
+
+    def test_asgi_application_uses_async_urls(self):
+        """Test that the ASGI entry point resolves against the async URLconf"""
+        from backend.asgi import application
+
+        request, _ = application.create_request(
+            {'type': 'http', 'method': 'GET', 'path': self.list_url, 'query_string': b'',
+             'headers': [], 'server': ('testserver', 80)},
+            io.BytesIO()
+        )
+        self.assertEqual(request.urlconf, 'backend.asgi_urls')
+        self.assertTrue(iscoroutinefunction(resolve(self.list_url, request.urlconf).func))
+
+
+class ValuesParityTests(APITestCase):
+    """ProjectValuesSerializer must render exactly what CharityProjectSerializer does"""
+
+    def setUp(self):
+        self.owners = [
+            User.objects.create_user(
+                username=f'values{i}',
+                email=f'values{i}@example.com',
+                password='TestPass123!',
+                first_name='Válues' if i else '',
+                last_name=f'Owner {i}'
+            )
+            for i in range(2)
+        ]
+        cases = [
+            (Decimal('0'), Decimal('0.00'), 40.7128, -74.006, 'New York'),
+            (Decimal('1234.5'), Decimal('17.25'), None, None, ''),
+            (Decimal('99999999.99'), Decimal('99999999.99'), -33.8688, 151.2093, 'Sydney'),
+            (Decimal('0.01'), Decimal('0.1'), 0, 0, 'Null Island'),
+            (Decimal('250'), Decimal('3'), 51.5074, -0.1278, 'London "water" well'),
+        ]
+        self.projects = [
+            CharityProject.objects.create(
+                title=f'Values well {i}',
+                description='Clean water\nfor everyone',
+                goal_amount=goal,
+                amount_raised=raised,
+                start_date=date(2024, 1, 1) + timedelta(days=i),
+                end_date=date(2025, 12, 31),
+                location=location,
+                latitude=lat,
+                longitude=lng,
+                created_by=self.owners[i % 2]
+            )
+            for i, (goal, raised, lat, lng, location) in enumerate(cases)
+        ]
+        self.list_url = reverse('charity-list')
+
+    def render_both(self, queryset):
+        queryset = queryset.select_related('created_by').order_by('id')
+        expected = JSONRenderer().render(CharityProjectSerializer(list(queryset), many=True).data)
+        rows = list(ProjectValuesSerializer.values(queryset))
+        return expected, JSONRenderer().render(ProjectValuesSerializer(rows).data)
+
+    def test_rows_render_identical_json(self):
+        """Test byte-identical JSON for plain, near- and search-annotated querysets"""
+        expected, actual = self.render_both(CharityProject.objects.all())
+        self.assertEqual(actual, expected)
+        self.assertEqual(len(json.loads(actual)), 5)
+
+        near = geo.near(CharityProject.objects.all(), 40.0, -74.0, 20000)
+        expected, actual = self.render_both(near)
+        self.assertEqual(actual, expected)
+        self.assertIn('distance', json.loads(actual)[0])
+
+        matches = search_index.search(CharityProject.objects.all(), ['water'])
+        if matches is not None:
+            expected, actual = self.render_both(matches)
+            self.assertEqual(actual, expected)
+            self.assertEqual(len(json.loads(actual)), 5)
+
+    def test_timezone_is_applied(self):
+        """Test that datetimes are converted to the active timezone like DRF does"""
+        with timezone.override('America/New_York'):
+            expected, actual = self.render_both(CharityProject.objects.all())
+        self.assertEqual(actual, expected)
+        self.assertIn('-0', json.loads(actual)[0]['created_at'][19:])
+
+    def get_pages(self, path, params, **headers):
+        response_cache.get_cache().clear()
+        response = self.client.get(path, params, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pages = [response]
+        while pages[-1].data['next']:
+            pages.append(self.client.get(pages[-1].data['next'], headers=headers))
+        return pages
+
+    def test_list_matches_serializer(self):
+        """Test list pages, cursors, ordering, near and search against the serializer path"""
+        for params in [
+            {},
+            {'page_size': 2},
+            {'ordering': 'goal_amount'},
+            {'ordering': '-end_date', 'page_size': 2},
+            {'near': '40.0,-74.0', 'radius_km': 20000, 'ordering': 'distance', 'page_size': 2},
+            {'search': 'water', 'page_size': 2},
+        ]:
+            with self.subTest(params=params):
+                values_pages = self.get_pages(self.list_url, params)
+                with mock.patch.object(CharityProjectViewSet, 'values_serializer_class', None):
+                    serializer_pages = self.get_pages(self.list_url, params)
+                self.assertEqual(
+                    [page.content for page in values_pages],
+                    [page.content for page in serializer_pages]
+                )
+
+    def test_user_projects_match_serializer(self):
+        """Test that the user projects endpoint renders its rows as the serializer would"""
+        owner = self.owners[0]
+        pages = self.get_pages(
+            reverse('user-projects', args=[owner.id]), {'page_size': 1},
+            Authorization=f'JWT {AccessToken.for_user(owner)}'
+        )
+        projects = CharityProject.objects.filter(created_by=owner).order_by('-created_at', '-id')
+        self.assertEqual(
+            [JSONRenderer().render(page.data['results']) for page in pages],
+            [
+                JSONRenderer().render(CharityProjectSerializer([project], many=True).data)
+                for project in projects
+            ]
+        )
+
+    def test_unsupported_fields_are_rejected(self):
+        """Test that fields a row cannot supply fail when the plan is compiled"""
+        class MethodSerializer(CharityProjectSerializer):
+            owner_name = serializers.SerializerMethodField()
+
+            class Meta(CharityProjectSerializer.Meta):
+                fields = CharityProjectSerializer.Meta.fields + ['owner_name']
+
+            def get_owner_name(self, obj):
+                return obj.created_by.username
+
+        class MethodValuesSerializer(ProjectValuesSerializer):
+            serializer_class = MethodSerializer
+
+        with self.assertRaises(ImproperlyConfigured):
+            MethodValuesSerializer.values(CharityProject.objects.all())
+
+    def test_custom_formats_fall_back_to_fields(self):
+        """Test that non-ISO formats use the DRF field instead of a fast converter"""
+        class FormattedSerializer(CharityProjectSerializer):
+            start_date = serializers.DateField(format='%d/%m/%Y')
+            goal_amount = serializers.DecimalField(
+                max_digits=10, decimal_places=2, coerce_to_string=False
+            )
+
+        class FormattedValuesSerializer(ProjectValuesSerializer):
+            serializer_class = FormattedSerializer
+
+        queryset = CharityProject.objects.select_related('created_by').order_by('id')
+        expected = JSONRenderer().render(FormattedSerializer(list(queryset), many=True).data)
+        rows = list(FormattedValuesSerializer.values(queryset))
+        self.assertEqual(JSONRenderer().render(FormattedValuesSerializer(rows).data), expected)
+        self.assertEqual(json.loads(expected)[0]['start_date'], '01/01/2024')
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='sparseowner',
+            email='sparse@example.com',
+            password='TestPass123!',
+            first_name='Sparse',
+            last_name='Owner'
+        )
+        self.projects = [
+            CharityProject.objects.create(
+                title=f'Sparse project {i}',
+                description='A very long description ' * 20,
+                goal_amount=100 * (i + 1),
+                start_date=date.today(),
+                end_date=date.today() + timedelta(days=i),
+                created_by=self.user
+            )
+            for i in range(5)
+        ]
+        for project in self.projects[:3]:
+            Donation.objects.create(
+                user=self.user, project=project, amount=Decimal('10.00'),
+                transaction_id=f'sparse-{project.id}'
+            )
+        self.list_url = reverse('charity-list')
+        self.client.force_authenticate(self.user)
+
+    def get(self, path, params):
+        response_cache.get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, params)
+        sql = [query['sql'] for query in queries.captured_queries]
+        return response, [statement for statement in sql if 'charities_charityproject' in statement]
+
+    def assertItemKeys(self, items, keys):
+        for item in items:
+            self.assertEqual(list(item), keys)
+
+    def test_fields_trim_output_and_columns(self):
+        """Test that ?fields= returns only those keys and selects neither other columns nor joins"""
+        response, sql = self.get(self.list_url, {'fields': 'title,id,goal_amount,amount_raised'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertItemKeys(response.data['results'], ['id', 'title', 'goal_amount', 'amount_raised'])
+        page_query = sql[-1]
+        self.assertNotIn('description', page_query)
+        self.assertNotIn('JOIN', page_query)
+
+    def test_omit(self):
+        """Test that ?omit= drops fields and the join behind a nested serializer"""
+        response, sql = self.get(self.list_url, {'omit': 'description,created_by'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertNotIn('created_by', response.data['results'][0])
+        self.assertIn('title', response.data['results'][0])
+        self.assertNotIn('JOIN', sql[-1])
+
+        response, sql = self.get(self.list_url, {'fields': 'title,created_by', 'omit': 'title'})
+        self.assertItemKeys(response.data['results'], ['created_by'])
+        self.assertEqual(response.data['results'][0]['created_by']['username'], 'sparseowner')
+        self.assertIn('JOIN', sql[-1])
+
+    def test_cursor_pages_keep_fields(self):
+        """Test paging by columns that were not requested, with a fixed number of queries"""
+        for ordering in ('', '-goal_amount', 'end_date'):
+            params = {'fields': 'title', 'page_size': 2, 'ordering': ordering}
+            response, sql = self.get(self.list_url, params)
+            titles = [item['title'] for item in response.data['results']]
+            query_count = len(sql)
+            while response.data['next']:
+                response, sql = self.get(response.data['next'], {})
+                self.assertEqual(len(sql), query_count)
+                self.assertItemKeys(response.data['results'], ['title'])
+                titles.extend(item['title'] for item in response.data['results'])
+            self.assertCountEqual(titles, [project.title for project in self.projects])
+
+    def test_serializer_path_matches(self):
+        """Test that model instances narrowed by only() give the same JSON as values() rows"""
+        for params in ({'fields': 'id,created_by,start_date'}, {'omit': 'description'}):
+            with self.subTest(params=params):
+                values_response, _ = self.get(self.list_url, params)
+                with mock.patch.object(CharityProjectViewSet, 'values_serializer_class', None):
+                    response, sql = self.get(self.list_url, params)
+                self.assertEqual(response.content, values_response.content)
+                self.assertNotIn('description', sql[-1])
+
+    def test_detail(self):
+        """Test ?fields= on a single project"""
+        detail_url = reverse('charity-detail', args=[self.projects[0].id])
+        response, sql = self.get(detail_url, {'fields': 'id,title'})
+        self.assertEqual(response.data, {'id': self.projects[0].id, 'title': 'Sparse project 0'})
+        self.assertNotIn('description', sql[-1])
+        self.assertNotIn('JOIN', sql[-1])
+
+    def test_user_endpoints(self):
+        """Test ?fields= and ?omit= on the user projects and donations endpoints"""
+        response, sql = self.get(
+            reverse('user-projects', args=[self.user.id]), {'fields': 'id,amount_raised'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertItemKeys(response.data['results'], ['id', 'amount_raised'])
+        self.assertNotIn('description', sql[-1])
+
+        donations_url = reverse('user-donations', args=[self.user.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(donations_url, {'omit': 'project,transaction_id'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertItemKeys(response.data['results'], ['id', 'amount', 'date'])
+        self.assertNotIn('charities_charityproject', queries.captured_queries[-1]['sql'])
+
+        response = self.client.get(donations_url, {'fields': 'project'})
+        self.assertEqual(
+            response.data['results'][0]['project'],
+            {'id': self.projects[2].id, 'title': 'Sparse project 2',
+             'goal_amount': '300.00', 'amount_raised': '0.00'}
+        )
+
+    def test_unknown_fields_are_rejected(self):
+        """Test that unknown names in ?fields= or ?omit= are a 400 on every endpoint"""
+        requests = [
+            (self.list_url, {'fields': 'title,secret'}, 'fields'),
+            (self.list_url, {'omit': 'password'}, 'omit'),
+            (reverse('charity-detail', args=[self.projects[0].id]), {'fields': 'nope'}, 'fields'),
+            (reverse('user-projects', args=[self.user.id]), {'fields': 'user'}, 'fields'),
+            (reverse('user-donations', args=[self.user.id]), {'omit': 'title'}, 'fields'),
+        ]
+        for path, params, param in requests:
+            with self.subTest(path=path, params=params):
+                response = self.client.get(path, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(next(iter(params)), response.data)
+
+
+class FastJSONRendererTests(TestCase):
+    def render_both(self, data, accepted_media_type=None):
+        return (
+            JSONRenderer().render(data, accepted_media_type),
+            FastJSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_matches_drf_renderer(self):
+        """Test byte-identical output for the types DRF's encoder handles"""
+        data = ReturnDict({
+            'decimal': Decimal('1234.50'),
+            'aware': timezone.make_aware(datetime(2025, 1, 2, 3, 4, 5, 678901), dt_timezone.utc),
+            'offset': datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=-5))),
+            'naive': datetime(2025, 1, 2, 3, 4, 5, 600000),
+            'date': date(2025, 1, 2),
+            'time': time(3, 4, 5, 123456),
+            'timedelta': timedelta(days=1, seconds=3),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'lazy': gettext_lazy('Not found.'),
+            'error': ErrorDetail('Invalid cursor', code='not_found'),
+            'text': 'Água potável \u2028 para todos \u2029 \U0001F30A "quoted" \\ \n',
+            'numbers': [0, -1, 2 ** 62, 1.5, 40.7128, None, True, False],
+            'nested': [{'tuple': (1, 2)}, []],
+        }, serializer=None)
+        drf, fast = self.render_both(data)
+        self.assertEqual(fast, drf)
+        self.assertEqual(self.render_both(None), (b'', b''))
+
+    def test_falls_back_to_drf_renderer(self):
+        """Test indented output, big integers and a missing orjson go through DRF"""
+        data = {'id': 1, 'items': [1, 2]}
+        drf, fast = self.render_both(data, 'application/json; indent=4')
+        self.assertEqual(fast, drf)
+        self.assertIn(b'\n    ', fast)
+
+        drf, fast = self.render_both({'big': 2 ** 70, 1: 'int key'})
+        self.assertEqual(fast, drf)
+
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_registered_for_the_api(self):
+        """Test that API responses are rendered by FastJSONRenderer"""
+        response = self.client.get(reverse('charity-list'))
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+        response = self.client.get(reverse('charity-list'), HTTP_ACCEPT='text/html')
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+
+
+class CompressionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='gzipowner',
+            email='gzip@example.com',
+            password='TestPass123!',
+            first_name='Gzip',
+            last_name='Owner'
+        )
+        self.projects = [
+            CharityProject.objects.create(
+                title=f'Compressed project {i}',
+                description='Clean water for every village in the valley. ' * 10,
+                goal_amount=1000,
+                start_date=date.today(),
+                end_date=date.today(),
+                created_by=self.user
+            )
+            for i in range(5)
+        ]
+        self.list_url = reverse('charity-list')
+        response_cache.get_cache().clear()
+
+    def get(self, path, encoding=None, **headers):
+        if encoding is not None:
+            headers['Accept-Encoding'] = encoding
+        return self.client.get(path, headers=headers)
+
+    def test_gzip(self):
+        """Test that large JSON responses are gzipped for clients that accept it"""
+        plain = self.get(self.list_url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response_cache.get_cache().clear()
+        response = self.get(self.list_url, 'deflate, gzip;q=0.8')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) / 3)
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_not_compressed(self):
+        """Test small responses, refused codings and streaming responses"""
+        with override_settings(COMPRESSION_MIN_SIZE=10 ** 6):
+            response = self.get(self.list_url, 'gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('Accept-Encoding', response.get('Vary', ''))
+
+        with mock.patch.object(compression, 'brotli', None):
+            for encoding in ('gzip;q=0', 'identity', 'gzip;q=0, *;q=1', 'compress'):
+                response_cache.get_cache().clear()
+                response = self.get(self.list_url, encoding)
+                self.assertFalse(response.has_header('Content-Encoding'), encoding)
+
+        self.client.force_authenticate(self.user)
+        response = self.get(
+            reverse('charity-export', args=[self.projects[0].id]) + '?type=csv', 'gzip'
+        )
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_negotiation(self):
+        """Test q-values, wildcards and the brotli preference when brotli is installed"""
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(compression.negotiate('gzip, br'), 'gzip')
+            self.assertEqual(compression.negotiate('*'), 'gzip')
+            self.assertIsNone(compression.negotiate('br'))
+            self.assertIsNone(compression.negotiate(''))
+        with mock.patch.object(compression, 'brotli', mock.Mock()):
+            self.assertEqual(compression.negotiate('gzip, br'), 'br')
+            self.assertEqual(compression.negotiate('gzip, br;q=0.5'), 'gzip')
+            self.assertEqual(compression.negotiate('GZIP;q=0.2, br;q=bogus'), 'gzip')
+            self.assertEqual(compression.negotiate('*;q=0.1'), 'br')
+
+    def test_brotli(self):
+        """Test a real brotli round trip"""
+        if compression.brotli is None:
+            self.skipTest('brotli is not installed')
+        plain = self.get(self.list_url)
+        response_cache.get_cache().clear()
+        response = self.get(self.list_url, 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) / 3)
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
+
+    def test_breach_mitigations(self):
+        """Test that HTML is left alone and gzip bodies are randomly padded"""
+        with override_settings(COMPRESSION_MIN_SIZE=100):
+            response = self.get(self.list_url, 'gzip, br', Accept='text/html')
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        content = self.get(self.list_url).content
+        padded = [compression.encoders()['gzip'](content) for _ in range(10)]
+        self.assertGreater(len({len(body) for body in padded}), 1)
+        self.assertEqual(gzip.decompress(padded[0]), content)
+
+    def test_weak_etag(self):
+        """Test that compressed responses carry a weak ETag that still validates"""
+        plain = self.get(reverse('charity-detail', args=[self.projects[0].id]))
+        with override_settings(COMPRESSION_MIN_SIZE=100):
+            response_cache.get_cache().clear()
+            response = self.get(reverse('charity-detail', args=[self.projects[0].id]), 'gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+
+            response = self.get(
+                reverse('charity-detail', args=[self.projects[0].id]), 'gzip',
+                **{'If-None-Match': response['ETag']}
+            )
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_precompressed_cache_hits(self):
+        """Test that cached responses reuse their compressed body until a write"""
+        with mock.patch.object(
+            compression, 'compress_string', wraps=compression.compress_string
+        ) as compress:
+            first = self.get(self.list_url, 'gzip')
+            second = self.get(self.list_url, 'gzip')
+            self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(compress.call_count, 1)
+
+            # Another media type renders differently, so it is compressed apart
+            self.get(self.list_url, 'gzip', Accept='application/json; indent=2')
+            self.assertEqual(compress.call_count, 2)
+
+            self.client.force_authenticate(self.user)
+            self.client.patch(
+                reverse('charity-detail', args=[self.projects[0].id]),
+                {'title': 'Renamed project'}, format='json'
+            )
+            self.client.force_authenticate(None)
+            response = self.get(self.list_url, 'gzip')
+            self.assertEqual(response['X-Cache'], 'MISS')
+            self.assertEqual(compress.call_count, 3)
+            self.assertIn(b'Renamed project', gzip.decompress(response.content))
+
+    def test_async_path(self):
+        """Test that ASGI responses are compressed and reuse precompressed bodies"""
+        with override_settings(ROOT_URLCONF='backend.asgi_urls'), mock.patch.object(
+            compression, 'compress_string', wraps=compression.compress_string
+        ) as compress:
+            get = async_to_sync(self.async_client.get)
+            first = get(self.list_url, headers={'Accept-Encoding': 'gzip'})
+            second = get(self.list_url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(compress.call_count, 1)
+
+
+@contextmanager
+def stand_in_replica(alias):
+    """
+    Register ``alias`` for the block: a second, migrated test database
+    with the default one's settings, standing in for a read replica.
+    """
+    default = connections['default'].settings_dict
+    replica = {**default, 'TEST': {**default['TEST'], 'NAME': None}}
+    # connections.settings is settings.DATABASES, which create_test_db() updates
+    connections.settings[alias] = replica
+    old_name = connections[alias].creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connections[alias].creation.destroy_test_db(old_name, verbosity=0)
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReadReplicaTests(TransactionTestCase):
+    # Resolved in setUpClass(), once the replica exists; naming it here would
+    # have the test runner look for it first
+    databases = '__all__'
+    client_class = APIClient
+
+    @classmethod
+    def setUpClass(cls):
+        cls.enterClassContext(stand_in_replica('replica'))
+        super().setUpClass()
+
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.user, self.other = [
+            User.objects.create_user(
+                username=f'replica{i}',
+                email=f'replica{i}@example.com',
+                password='TestPass123!',
+                first_name='Replica',
+                last_name=f'User {i}'
+            )
+            for i in range(2)
+        ]
+        self.project = CharityProject.objects.create(
+            title='Primary title',
+            description='Clean water',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            created_by=self.user
+        )
+        self.donation = Donation.objects.create(
+            user=self.user, project=self.project, amount=Decimal('10.00'),
+            transaction_id='replica-1'
+        )
+        # The replica has the same rows, but has not seen the last title change
+        for user in (self.user, self.other):
+            user.save(using='replica')
+        self.project.title = 'Replica title'
+        self.project.save(using='replica')
+        self.donation.save(using='replica')
+        self.project.title = 'Primary title'
+
+        self.detail_url = reverse('charity-detail', args=[self.project.id])
+        self.list_url = reverse('charity-list')
+
+    def get(self, path, user=None):
+        self.client.force_authenticate(user)
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_safe_reads_use_the_replica(self):
+        """Test that authenticated project and dashboard reads come from the replica"""
+        self.assertEqual(self.get(self.list_url, self.user)['results'][0]['title'], 'Replica title')
+        self.assertEqual(self.get(self.detail_url, self.other)['title'], 'Replica title')
+        projects = self.get(reverse('user-projects', args=[self.user.id]), self.user)
+        self.assertEqual(projects['results'][0]['title'], 'Replica title')
+        donations = self.get(reverse('user-donations', args=[self.user.id]), self.user)
+        self.assertEqual(donations['results'][0]['project']['title'], 'Replica title')
+
+        with override_settings(REPLICA_DATABASES=[]):
+            self.assertEqual(self.get(self.detail_url, self.user)['title'], 'Primary title')
+
+    def test_cached_responses_are_filled_from_the_primary(self):
+        """Test that anonymous reads cached under the current version never come from a replica"""
+        self.assertEqual(self.get(self.list_url)['results'][0]['title'], 'Primary title')
+        self.assertEqual(self.get(self.detail_url)['title'], 'Primary title')
+
+    def test_writes_pin_the_writer_to_the_primary(self):
+        """Test read-your-writes after a donation and an update, for the writer only"""
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('create-donation'), {'project': self.project.id, 'amount': '25.00'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Donation.objects.using('default').count(), 2)
+        self.assertEqual(Donation.objects.using('replica').count(), 1)
+
+        donations_url = reverse('user-donations', args=[self.user.id])
+        self.assertEqual(len(self.get(donations_url, self.user)['results']), 2)
+        self.assertEqual(self.get(self.detail_url, self.user)['title'], 'Primary title')
+        self.assertEqual(self.get(self.detail_url, self.other)['title'], 'Replica title')
+
+        self.client.force_authenticate(self.other)
+        response = self.client.patch(self.detail_url, {'title': 'Not the owner'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.user)
+        response = self.client.patch(self.detail_url, {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(CharityProject.objects.using('default').get().title, 'Renamed')
+        self.assertEqual(self.get(self.detail_url, self.user)['title'], 'Renamed')
+
+        # Once the pin expires, reads go back to the (lagging) replica
+        response_cache.get_cache().delete(replicas.PIN_KEY.format(self.user.id))
+        self.assertEqual(len(self.get(donations_url, self.user)['results']), 1)
+
+    def test_async_reads_use_the_replica(self):
+        """Test that the async read path routes the same way"""
+        headers = {'Authorization': f'JWT {AccessToken.for_user(self.user)}'}
+        with override_settings(ROOT_URLCONF='backend.asgi_urls'):
+            get = async_to_sync(self.async_client.get)
+            response = get(self.detail_url, headers=headers)
+            self.assertEqual(response.json()['title'], 'Replica title')
+            response = get(reverse('user-donations', args=[self.user.id]), headers=headers)
+            self.assertEqual(response.json()['results'][0]['project']['title'], 'Replica title')
+
+            replicas.pin(self.user.id)
+            response = get(self.detail_url, headers=headers)
+            self.assertEqual(response.json()['title'], 'Primary title')
+
+    def test_router(self):
+        """Test that writes, transactions and a request's own writes use the primary"""
+        router = replicas.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(CharityProject))
+        self.assertEqual(router.db_for_write(CharityProject), 'default')
+
+        state = replicas.RoutingState()
+        state.replica = 'replica'
+        token = replicas._state.set(state)
+        try:
+            self.assertEqual(router.db_for_read(CharityProject), 'replica')
+            with replicas.primary():
+                self.assertIsNone(router.db_for_read(CharityProject))
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(CharityProject))
+            self.assertEqual(router.db_for_read(CharityProject), 'replica')
+            self.assertEqual(router.db_for_write(CharityProject), 'default')
+            self.assertIsNone(router.db_for_read(CharityProject))
+        finally:
+            replicas._state.reset(token)
+
+        replica_project = CharityProject.objects.using('replica').get()
+        self.assertTrue(router.allow_relation(replica_project, self.user))
+
+
+class QueryBudgetMixin:
+    """
+    Per-endpoint query budgets that must hold whatever the row count.
+    Subclasses set ``rows``; every project and donation has its own
+    creator so a per-row relation fetch would blow the budget.
+    """
+    rows = 10
+    page_size = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            username='budgetowner',
+            email='budget@example.com',
+            password='TestPass123!',
+            first_name='Budget',
+            last_name='Owner'
+        )
+        creators = User.objects.bulk_create([
+            User(
+                username=f'budget-creator-{i}',
+                email=f'budget-creator-{i}@example.com',
+                first_name='Budget',
+                last_name='Creator',
+                password='!'
+            )
+            for i in range(cls.rows)
+        ])
+        projects = CharityProject.objects.bulk_create([
+            CharityProject(
+                title=f'Budget Project {i}',
+                description='Test Description',
+                goal_amount=1000,
+                start_date=date.today(),
+                end_date=date.today(),
+                latitude=40 + i / cls.rows,
+                longitude=-74,
+                created_by=creators[i]
+            )
+            for i in range(cls.rows)
+        ])
+        cls.owned = CharityProject.objects.bulk_create([
+            CharityProject(
+                title=f'Owned Project {i}',
+                description='Test Description',
+                goal_amount=1000,
+                start_date=date.today(),
+                end_date=date.today(),
+                created_by=cls.owner
+            )
+            for i in range(cls.rows)
+        ])
+        Donation.objects.bulk_create([
+            Donation(
+                user=cls.owner,
+                project=projects[i],
+                amount=5,
+                transaction_id=f'budget_txn_{i}'
+            )
+            for i in range(cls.rows)
+        ])
+        search_index.rebuild_index()
+
+    def setUp(self):
+        response_cache.get_cache().clear()
+
+    def assertQueryBudget(self, budget, method, url, data=None, user=None, **extra):
+        self.client.force_authenticate(user=user)
+        response_cache.get_cache().clear()
+        with CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, **extra)
+        self.assertLess(response.status_code, 400, response.data)
+        self.assertLessEqual(
+            len(queries), budget,
+            '\n'.join(q['sql'] for q in queries.captured_queries)
+        )
+        return response
+
+    def test_project_list(self):
+        """Test the project list query budget"""
+        # ETag probe + page
+        response = self.assertQueryBudget(
+            2, 'get', reverse('charity-list'), {'page_size': self.page_size}
+        )
+        self.assertEqual(len(response.data['results']), min(self.page_size, 2 * self.rows))
+
+    def test_project_search(self):
+        """Test the project search query budget"""
+        self.assertQueryBudget(
+            2, 'get', reverse('charity-list'), {'search': 'budget', 'page_size': self.page_size}
+        )
+
+    def test_project_near(self):
+        """Test the ?near= query budget"""
+        response = self.assertQueryBudget(
+            2, 'get', reverse('charity-list'),
+            {'near': '40.5,-74', 'radius_km': 100, 'page_size': self.page_size}
+        )
+        self.assertTrue(response.data['results'])
+
+    def test_project_detail(self):
+        """Test the project detail query budget"""
+        self.assertQueryBudget(2, 'get', reverse('charity-detail', args=[self.owned[0].id]))
+
+    def test_project_update(self):
+        """Test the owner update query budget"""
+        # fetch + UPDATE + FTS5 delete/insert on SQLite
+        self.assertQueryBudget(
+            4, 'patch', reverse('charity-detail', args=[self.owned[0].id]),
+            {'title': 'Updated'}, user=self.owner, format='json'
+        )
+
+    def test_user_projects(self):
+        """Test the user projects query budget"""
+        self.assertQueryBudget(
+            1, 'get', reverse('user-projects', args=[self.owner.id]),
+            {'page_size': self.page_size}, user=self.owner
+        )
+
+    def test_user_donations(self):
+        """Test the user donations query budget"""
+        response = self.assertQueryBudget(
+            1, 'get', reverse('user-donations', args=[self.owner.id]),
+            {'page_size': self.page_size}, user=self.owner
+        )
+        self.assertEqual(len(response.data['results']), min(self.page_size, self.rows))
+
+    def test_create_donation(self):
+        """Test the donation write path query budget"""
+        # The first donation creates the stats rows; measure the steady state
+        self.client.force_authenticate(user=self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('create-donation'), {'amount': '5.00', 'project': self.owned[0].id}
+            )
+        # savepoint, project, donor check, donation, increment, total (2),
+        # outbox, release; then savepoint, stats, hourly bucket, daily
+        # bucket, release after commit
+        self.assertQueryBudget(
+            14, 'post', reverse('create-donation'),
+            {'amount': '5.00', 'project': self.owned[0].id}, user=self.owner
+        )
+
+
+class QueryBudget10RowsTests(QueryBudgetMixin, APITestCase):
+    rows = 10
+
+
+class QueryBudget1000RowsTests(QueryBudgetMixin, APITestCase):
+    rows = 1000
+
+
+class QueryPlanTests(APITestCase):
+    """
+    ``EXPLAIN`` every query an endpoint runs, with enough rows that a
+    missing index shows. A plan fails if it reads a table of more than
+    ``threshold`` rows without an index, or sorts more than ``threshold``
+    rows. Endpoints are requested twice and the second request checked, so
+    cached probes (the list ETag's ``COUNT(*)``) are left out.
+    """
+    threshold = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        owners = create_users(100, prefix='plan-owner')
+        donors = create_users(200, prefix='plan-donor')
+        cls.owner = owners[0]
+        cls.donor = donors[0]
+        seed_projects(4 * cls.threshold, owners)
+        project_ids = list(CharityProject.objects.values_list('id', flat=True))
+        seed_donations(8 * cls.threshold, project_ids, donors, prefix='plan')
+        # A term only a few projects match, so ranking them is a small sort
+        CharityProject.objects.filter(pk__in=project_ids[:20]).update(title='Lighthouse Appeal')
+        search_index.rebuild_index()
+        # bulk_create skips the running stats; fill the ones trending reads
+        log_scores = {}
+        donations = Donation.objects.values_list('project_id', 'amount', 'date')
+        for project_id, amount, when in donations.iterator():
+            log_scores.setdefault(project_id, []).append(trending.log_weight(amount, when))
+        ProjectStats.objects.bulk_create(
+            ProjectStats(
+                project_id=project_id, donation_count=len(logs),
+                trending_score=trending.combine(logs)
+            )
+            for project_id, logs in log_scores.items()
+        )
+        cls.project = CharityProject.objects.filter(created_by=cls.owner).first()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.tables = {}
+
+    def table_rows(self, table):
+        if table not in self.tables:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                self.tables[table] = cursor.fetchone()[0]
+        return self.tables[table]
+
+    def fetch(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def postgresql_problems(self, sql):
+        [[plan]] = self.fetch(f'EXPLAIN (FORMAT JSON) {sql}')
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        problems = []
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get('Plans', []))
+            if node['Node Type'] == 'Seq Scan':
+                table = node['Relation Name']
+                if self.table_rows(table) > self.threshold:
+                    problems.append(f'Seq Scan on {table}')
+            elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+                if node['Plan Rows'] > self.threshold:
+                    problems.append(f"{node['Node Type']} of ~{node['Plan Rows']} rows")
+        return problems
+
+    def sqlite_problems(self, sql):
+        # SQLite names aliased tables by their alias (U0, T3)
+        aliases = dict(
+            (alias, table) for table, alias in re.findall(r'"(\w+)" (?:AS )?"?([A-Z]\d+)\b', sql)
+        )
+        problems = []
+        for *_, detail in self.fetch(f'EXPLAIN QUERY PLAN {sql}'):
+            scan = re.fullmatch(r'SCAN (\w+)', detail)
+            if scan:
+                table = aliases.get(scan[1], scan[1])
+                if self.table_rows(table) > self.threshold:
+                    problems.append(f'SCAN {table}')
+            elif detail.startswith('USE TEMP B-TREE'):
+                # No row estimates: count what the query yields before its LIMIT
+                unlimited = re.sub(r' LIMIT \d+( OFFSET \d+)?$', '', sql)
+                [[rows]] = self.fetch(f'SELECT COUNT(*) FROM ({unlimited})')
+                if rows > self.threshold:
+                    problems.append(f'{detail} of {rows} rows')
+        return problems
+
+    def assertIndexedPlans(self, url, data=None, user=None):
+        self.client.force_authenticate(user=user or self.owner)
+        self.client.get(url, data)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+            # Streamed responses run their queries as they are read
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        selects = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        problems = getattr(self, f'{connection.vendor}_problems', None)
+        if problems is None:
+            self.skipTest(f'No plan checks for {connection.vendor}')
+        for sql in selects:
+            self.assertEqual(problems(sql), [], sql)
+        return response
+
+    def test_project_list(self):
+        """Test that the project list and its next page read an index for every ordering"""
+        url = reverse('charity-list')
+        for field in CharityProjectViewSet.ordering_fields:
+            if field == 'distance':
+                continue
+            for ordering in (field, f'-{field}'):
+                with self.subTest(ordering=ordering):
+                    response = self.assertIndexedPlans(url, {'ordering': ordering})
+                    self.assertIndexedPlans(response.data['next'])
+        response = self.assertIndexedPlans(url)
+        self.assertIndexedPlans(response.data['next'])
+
+    def test_project_search(self):
+        """Test that ?search= reads the full-text index"""
+        url = reverse('charity-list')
+        response = self.assertIndexedPlans(url, {'search': 'lighthouse'})
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIndexedPlans(url, {'search': 'lighthouse', 'ordering': 'goal_amount'})
+
+    def test_project_near(self):
+        """Test that ?near= reads the bounding-box index, in every ordering"""
+        url = reverse('charity-list')
+        near = {'near': '10,20', 'radius_km': 500}
+        response = self.assertIndexedPlans(url, near)
+        self.assertTrue(response.data['results'])
+        for field in CharityProjectViewSet.ordering_fields:
+            for ordering in (field, f'-{field}'):
+                with self.subTest(ordering=ordering):
+                    self.assertIndexedPlans(url, {**near, 'ordering': ordering})
+
+    def test_project_detail(self):
+        """Test that project detail, stats and time series are index lookups"""
+        self.assertIndexedPlans(reverse('charity-detail', args=[self.project.id]))
+        self.assertIndexedPlans(reverse('charity-stats', args=[self.project.id]))
+        self.assertIndexedPlans(reverse('charity-timeseries', args=[self.project.id]))
+
+    def test_leaderboard(self):
+        """Test that every leaderboard ranking reads its index"""
+        for by in leaderboard.RANKINGS:
+            with self.subTest(by=by):
+                self.assertIndexedPlans(reverse('charity-leaderboard'), {'by': by})
+
+    def test_user_projects(self):
+        """Test that a user's projects are read in order from the owner index"""
+        url = reverse('user-projects', args=[self.owner.id])
+        response = self.assertIndexedPlans(url, {'page_size': 10})
+        self.assertIndexedPlans(response.data['next'])
+
+    def test_user_donations(self):
+        """Test that a user's donations are read in order from the donor index"""
+        url = reverse('user-donations', args=[self.donor.id])
+        response = self.assertIndexedPlans(url, {'page_size': 10}, user=self.donor)
+        self.assertIndexedPlans(response.data['next'], user=self.donor)
+
+    def test_export(self):
+        """Test that a donation export reads the project's donations by index"""
+        self.assertIndexedPlans(reverse('charity-export', args=[self.project.id]))
+
+    def test_status_filters(self):
+        """Test that every ?status= list avoids full scans and large sorts"""
+        for value in project_status.STATUSES:
+            self.assertIndexedPlans(reverse('charity-list'), {'status': value})
+
+
+class ImportDonationsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='importer',
+            email='import@example.com',
+            password='TestPass123!',
+            first_name='Import',
+            last_name='Donor'
+        )
+        self.projects = [
+            CharityProject.objects.create(
+                title=f'Import Project {i}',
+                description='Test Description',
+                goal_amount=1000,
+                start_date=date.today(),
+                end_date=date.today(),
+                created_by=self.user
+            )
+            for i in range(2)
+        ]
+        Donation.objects.create(
+            user=self.user,
+            project=self.projects[0],
+            amount=1,
+            transaction_id='already-there'
+        )
+        CharityProject.objects.filter(pk=self.projects[0].pk).update(amount_raised=1)
+
+    def write(self, name, content):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_donations', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import(self):
+        """Test that a CSV import creates donations and updates totals"""
+        p0, p1 = self.projects
+        u = self.user.id
+        path = self.write('donations.csv', (
+            'transaction_id,project_id,user_id,amount,date\n'
+            f'a1,{p0.id},{u},10.00,2024-01-15T10:00:00Z\n'
+            f'a2,{p0.id},{u},15.50,\n'
+            f'a3,{p1.id},{u},7,2024-02-01T08:30:00\n'
+        ))
+        out, err = self.run_import(path, '--chunk-size', '2')
+
+        self.assertIn('Imported 3 of 3 rows', out)
+        self.assertEqual(err, '')
+        p0.refresh_from_db()
+        p1.refresh_from_db()
+        self.assertEqual(p0.amount_raised, Decimal('26.50'))
+        self.assertEqual(p1.amount_raised, Decimal('7.00'))
+        imported = Donation.objects.get(transaction_id='a1')
+        self.assertEqual(imported.date.year, 2024)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_duplicates_and_invalid_rows_are_skipped(self):
+        """Test that duplicate transaction ids and bad rows are reported"""
+        p0 = self.projects[0]
+        u = self.user.id
+        path = self.write('donations.csv', (
+            'transaction_id,project_id,user_id,amount\n'
+            f'already-there,{p0.id},{u},10\n'
+            f'b1,{p0.id},{u},10\n'
+            f'b1,{p0.id},{u},10\n'
+            f'b2,{p0.id},{u},-5\n'
+            f'b3,99999,{u},5\n'
+            f'b4,{p0.id},{u},lots\n'
+        ))
+        out, err = self.run_import(path)
+
+        self.assertIn('Imported 1 of 6 rows', out)
+        self.assertIn('2 duplicate(s), 3 invalid', out)
+        self.assertIn('line 5: amount must be greater than 0', err)
+        self.assertIn('project 99999 does not exist', err)
+        p0.refresh_from_db()
+        self.assertEqual(p0.amount_raised, Decimal('11.00'))
+
+    def test_ndjson_import(self):
+        """Test that NDJSON input is detected from the extension"""
+        p1 = self.projects[1]
+        rows = [
+            {'transaction_id': f'n{i}', 'project_id': p1.id, 'user_id': self.user.id, 'amount': '2.50'}
+            for i in range(5)
+        ]
+        path = self.write('donations.ndjson', '\n'.join(json.dumps(r) for r in rows) + '\nnot json\n')
+        out, err = self.run_import(path)
+
+        self.assertIn('Imported 5 of 6 rows', out)
+        self.assertIn('invalid JSON', err)
+        p1.refresh_from_db()
+        self.assertEqual(p1.amount_raised, Decimal('12.50'))
+
+    def test_one_total_update_per_project_per_chunk(self):
+        """Test that totals are aggregated per project within a chunk"""
+        p0, p1 = self.projects
+        lines = ['transaction_id,project_id,user_id,amount']
+        lines += [f'c{i},{(p0, p1)[i % 2].id},{self.user.id},1' for i in range(40)]
+        path = self.write('donations.csv', '\n'.join(lines) + '\n')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.run_import(path, '--chunk-size', '20')
+        updates = [
+            q for q in queries.captured_queries
+            if q['sql'].startswith('UPDATE "charities_charityproject"')
+        ]
+        self.assertEqual(len(updates), 4)  # 2 chunks x 2 projects
+
+    def test_dry_run_writes_nothing(self):
+        """Test that --dry-run only validates"""
+        path = self.write('donations.csv', (
+            'transaction_id,project_id,user_id,amount\n'
+            f'd1,{self.projects[0].id},{self.user.id},10\n'
+        ))
+        out, _ = self.run_import(path, '--dry-run')
+        self.assertIn('Validated 1 of 1 rows', out)
+        self.assertFalse(Donation.objects.filter(transaction_id='d1').exists())
+
+
+class ProjectStatsTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='statsowner',
+            email='stats@example.com',
+            password='TestPass123!',
+            first_name='Stats',
+            last_name='Owner'
+        )
+        self.donors = [
+            User.objects.create_user(
+                username=f'statsdonor{i}',
+                email=f'statsdonor{i}@example.com',
+                password='TestPass123!',
+                first_name='Stats',
+                last_name='Donor'
+            )
+            for i in range(2)
+        ]
+        self.project = CharityProject.objects.create(
+            title='Stats Project',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.owner
+        )
+        self.url = reverse('charity-stats', args=[self.project.id])
+
+    def donate(self, user, amount):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('create-donation'), {'amount': amount, 'project': self.project.id}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.force_authenticate(user=None)
+
+    def test_stats_follow_donations(self):
+        """Test that each donation updates the project stats"""
+        self.donate(self.donors[0], '10.00')
+        self.donate(self.donors[0], '30.00')
+        self.donate(self.donors[1], '5.00')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['donor_count'], 2)
+        self.assertEqual(response.data['donation_count'], 3)
+        self.assertEqual(response.data['total_amount'], '45.00')
+        self.assertEqual(response.data['average_gift'], '15.00')
+        self.assertEqual(response.data['largest_gift'], '30.00')
+        self.assertEqual(response.data['last_24h_total'], '45.00')
+
+    def test_last_24h_excludes_older_donations(self):
+        """Test that the recent total only sums the last 24 hourly buckets"""
+        old = Donation.objects.create(
+            user=self.donors[0],
+            project=self.project,
+            amount=100,
+            transaction_id='old-stats-txn',
+            date=timezone.now() - timedelta(days=3)
+        )
+        project_stats.record_donations([old], {(self.project.id, self.donors[0].id)})
+        self.donate(self.donors[0], '20.00')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['donor_count'], 1)
+        self.assertEqual(response.data['total_amount'], '120.00')
+        self.assertEqual(response.data['last_24h_total'], '20.00')
+        self.assertEqual(ProjectHourlyTotal.objects.filter(project=self.project).count(), 2)
+
+    def test_reads_do_not_scan_donations(self):
+        """Test that reading stats takes the same queries for any donation count"""
+        Donation.objects.bulk_create([
+            Donation(
+                user=self.donors[i % 2],
+                project=self.project,
+                amount=1,
+                transaction_id=f'stats-bulk-{i}'
+            )
+            for i in range(200)
+        ])
+        call_command('rebuild_project_stats', stdout=io.StringIO())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('charities_donation' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(response.data['donation_count'], 200)
+
+    def test_project_without_donations(self):
+        """Test that a project with no donations reports zeros"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['donor_count'], 0)
+        self.assertEqual(response.data['average_gift'], '0.00')
+        self.assertIsNone(response.data['updated_at'])
+
+        response = self.client.get(reverse('charity-stats', args=[99999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('charity-stats', args=['abc']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rebuild_matches_incremental(self):
+        """Test that rebuilding from donations reproduces the running stats"""
+        self.donate(self.donors[0], '12.50')
+        self.donate(self.donors[1], '7.25')
+        self.donate(self.donors[1], '1.00')
+        before = self.client.get(self.url).data
+
+        ProjectStats.objects.update(donor_count=0, total_amount=0)
+        ProjectHourlyTotal.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_project_stats', '--project', str(self.project.id), stdout=out)
+
+        self.assertIn('Rebuilt stats for 1 project(s)', out.getvalue())
+        after = self.client.get(self.url).data
+        for key in ('donor_count', 'donation_count', 'total_amount', 'average_gift',
+                    'largest_gift', 'last_24h_total'):
+            self.assertEqual(after[key], before[key], key)
+
+    def test_import_updates_stats(self):
+        """Test that bulk imports count new donors once per project"""
+        self.donate(self.donors[0], '5.00')
+        rows = [
+            {'transaction_id': f's{i}', 'project_id': self.project.id,
+             'user_id': self.donors[i % 2].id, 'amount': '2.00'}
+            for i in range(6)
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as f:
+            f.write('\n'.join(json.dumps(r) for r in rows) + '\n')
+        self.addCleanup(os.unlink, f.name)
+        call_command('import_donations', f.name, stdout=io.StringIO(), stderr=io.StringIO())
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['donor_count'], 2)
+        self.assertEqual(response.data['donation_count'], 7)
+        self.assertEqual(response.data['total_amount'], '17.00')
+
+
+class ProjectTimeseriesTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='seriesowner',
+            email='series@example.com',
+            password='TestPass123!',
+            first_name='Series',
+            last_name='Owner'
+        )
+        self.donor = User.objects.create_user(
+            username='seriesdonor',
+            email='seriesdonor@example.com',
+            password='TestPass123!',
+            first_name='Series',
+            last_name='Donor'
+        )
+        self.project = CharityProject.objects.create(
+            title='Series Project',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.owner
+        )
+        self.url = reverse('charity-timeseries', args=[self.project.id])
+        self.client.force_authenticate(user=self.owner)
+
+    def donate(self, amount, when):
+        donation = Donation.objects.create(
+            user=self.donor,
+            project=self.project,
+            amount=Decimal(amount),
+            transaction_id=f'series-{uuid.uuid4()}',
+            date=when
+        )
+        project_stats.record_donations([donation], set())
+        return donation
+
+    def seed(self):
+        utc = dt_timezone.utc
+        self.donate('10.00', datetime(2026, 3, 1, 9, 15, tzinfo=utc))
+        self.donate('5.00', datetime(2026, 3, 1, 9, 45, tzinfo=utc))
+        self.donate('2.50', datetime(2026, 3, 1, 23, 59, tzinfo=utc))
+        # 00:30 on 3 March in UTC, still 2 March in New York
+        self.donate('7.00', datetime(2026, 3, 2, 19, 30, tzinfo=ZoneInfo('America/New_York')))
+
+    def series(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_daily_buckets(self):
+        """Test zero-filled UTC day buckets between start and end"""
+        self.seed()
+        data = self.series(interval='day', start='2026-03-01', end='2026-03-03')
+        self.assertEqual(data['interval'], 'day')
+        self.assertEqual(data['start'], '2026-03-01T00:00:00Z')
+        self.assertEqual(data['end'], '2026-03-04T00:00:00Z')
+        self.assertEqual(
+            [(b['start'], b['amount'], b['donation_count']) for b in data['results']],
+            [
+                ('2026-03-01T00:00:00Z', '17.50', 3),
+                ('2026-03-02T00:00:00Z', '0.00', 0),
+                ('2026-03-03T00:00:00Z', '7.00', 1),
+            ]
+        )
+
+    def test_hourly_buckets(self):
+        """Test hour buckets, with datetime bounds truncated to their hour"""
+        self.seed()
+        data = self.series(
+            interval='hour', start='2026-03-01T08:59:00Z', end='2026-03-01T10:00:00Z'
+        )
+        self.assertEqual(
+            [(b['start'], b['amount'], b['donation_count']) for b in data['results']],
+            [
+                ('2026-03-01T08:00:00Z', '0.00', 0),
+                ('2026-03-01T09:00:00Z', '15.00', 2),
+                ('2026-03-01T10:00:00Z', '0.00', 0),
+            ]
+        )
+
+    def test_default_range_and_donation_path(self):
+        """Test that donations through the API land in the last default bucket"""
+        self.client.force_authenticate(user=self.donor)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('create-donation'), {'amount': '12.00', 'project': self.project.id}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.force_authenticate(user=self.owner)
+
+        for interval in ('hour', 'day'):
+            results = self.series(interval=interval)['results']
+            self.assertEqual(len(results), project_stats.DEFAULT_BUCKETS[interval])
+            self.assertEqual(results[-1]['amount'], '12.00')
+            self.assertEqual(sum(b['donation_count'] for b in results), 1)
+
+    def test_reads_do_not_scan_donations(self):
+        """Test that a time series takes the same queries for any donation count"""
+        Donation.objects.bulk_create([
+            Donation(
+                user=self.donor,
+                project=self.project,
+                amount=1,
+                transaction_id=f'series-bulk-{i}',
+                date=timezone.now() - timedelta(hours=i)
+            )
+            for i in range(200)
+        ])
+        call_command('backfill_donation_rollups', stdout=io.StringIO())
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.series(interval='day', start=(date.today() - timedelta(days=9)).isoformat())
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('charities_donation' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(sum(b['donation_count'] for b in data['results']), 200)
+
+    def test_backfill_matches_incremental(self):
+        """Test that the backfill command reproduces the incrementally written buckets"""
+        self.seed()
+        buckets = {
+            model: list(model.objects.values_list('project_id', field, 'amount', 'donation_count'))
+            for model, field, *_ in project_stats.ROLLUPS.values()
+        }
+        ProjectDailyTotal.objects.all().delete()
+        ProjectHourlyTotal.objects.update(amount=0)
+
+        out = io.StringIO()
+        call_command('backfill_donation_rollups', '--project', str(self.project.id), stdout=out)
+        self.assertIn('Backfilled donation rollups for 1 project(s)', out.getvalue())
+        for model, field, *_ in project_stats.ROLLUPS.values():
+            self.assertEqual(
+                list(model.objects.values_list('project_id', field, 'amount', 'donation_count')),
+                buckets[model]
+            )
+        self.assertEqual(ProjectStats.objects.count(), 1)
+
+        Donation.objects.all().delete()
+        call_command('backfill_donation_rollups', stdout=io.StringIO())
+        self.assertFalse(ProjectDailyTotal.objects.exists())
+
+    def test_validation_and_permissions(self):
+        """Test bad parameters, and that only the owner sees the series"""
+        for params, field in [
+            ({'interval': 'week'}, 'interval'),
+            ({'start': 'yesterday'}, 'start'),
+            ({'end': '2026-02-30'}, 'end'),
+            ({'start': '2026-03-02', 'end': '2026-03-01'}, 'start'),
+            ({'interval': 'hour', 'start': '2025-01-01', 'end': '2026-01-01'}, 'start'),
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+            self.assertIn(field, response.data)
+
+        self.client.force_authenticate(user=self.donor)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ProjectStatusTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='statusowner',
+            email='status@example.com',
+            password='TestPass123!',
+            first_name='Status',
+            last_name='Owner'
+        )
+        today = date.today()
+        day = timedelta(days=1)
+        self.upcoming = self.create_project('Upcoming', today + day, today + 30 * day)
+        self.active = self.create_project('Active', today - 5 * day, today)
+        self.funded = self.create_project('Funded', today - 5 * day, today + day, raised=1000)
+        self.ended = self.create_project('Ended', today - 30 * day, today - day)
+        self.ended_funded = self.create_project(
+            'Ended funded', today - 30 * day, today - day, raised=1500
+        )
+        self.list_url = reverse('charity-list')
+        self.client.force_authenticate(user=self.owner)
+
+    def create_project(self, title, start_date, end_date, raised=0):
+        return CharityProject.objects.create(
+            title=title,
+            description='Test Description',
+            goal_amount=1000,
+            amount_raised=raised,
+            start_date=start_date,
+            end_date=end_date,
+            created_by=self.owner
+        )
+
+    def ids(self, params):
+        response = self.client.get(self.list_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {item['id'] for item in response.data['results']}
+
+    def test_status_filters(self):
+        """Test that ?status= selects projects by dates and goal"""
+        expected = {
+            'active': {self.active.id},
+            'upcoming': {self.upcoming.id},
+            'ended': {self.ended.id, self.ended_funded.id},
+            'funded': {self.funded.id, self.ended_funded.id},
+        }
+        for value, ids in expected.items():
+            self.assertEqual(self.ids({'status': value}), ids, value)
+        self.assertEqual(len(self.ids({})), 5)
+
+        response = self.client.get(self.list_url, {'status': 'open'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['status'], 'Must be one of: active, upcoming, ended, funded.'
+        )
+
+    def test_status_on_a_given_day(self):
+        """Test that the status conditions are evaluated for the date given"""
+        tomorrow = date.today() + timedelta(days=1)
+        active = project_status.with_status(CharityProject.objects, 'active', tomorrow)
+        self.assertEqual(set(active.values_list('id', flat=True)), {self.upcoming.id})
+
+    def test_status_etag_changes_daily(self):
+        """Test that a ?status= list is not answered with 304 on a later day"""
+        etag = self.client.get(self.list_url, {'status': 'active'})['ETag']
+        self.assertNotEqual(etag, self.client.get(self.list_url)['ETag'])
+        response = self.client.get(
+            self.list_url, {'status': 'active'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with mock.patch('charities.conditional.timezone.localdate', return_value=tomorrow):
+            response = self.client.get(
+                self.list_url, {'status': 'active'}, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_donations_to_ended_projects_are_rejected(self):
+        """Test that create_donation refuses ended projects and accepts the last day"""
+        url = reverse('create-donation')
+        response = self.client.post(url, {'amount': '5.00', 'project': self.ended.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('has ended', response.data['message'])
+        self.assertFalse(Donation.objects.filter(project=self.ended).exists())
+        self.ended.refresh_from_db()
+        self.assertEqual(self.ended.amount_raised, 0)
+
+        response = self.client.post(url, {'amount': '5.00', 'project': self.active.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(url, {'amount': '5.00', 'project': self.funded.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='leaderowner',
+            email='leader@example.com',
+            password='TestPass123!',
+            first_name='Leader',
+            last_name='Owner'
+        )
+        self.projects = [
+            CharityProject.objects.create(
+                title=f'Leaderboard Project {i}',
+                description='Test Description',
+                goal_amount=goal,
+                start_date=date.today(),
+                end_date=date.today(),
+                created_by=self.user
+            )
+            for i, goal in enumerate([100, 1000, 50])
+        ]
+        self.url = reverse('charity-leaderboard')
+
+    def record(self, project, amount, age):
+        donation = Donation.objects.create(
+            user=self.user,
+            project=project,
+            amount=amount,
+            transaction_id=f'leader-{project.id}-{amount}-{age.total_seconds()}',
+            date=timezone.now() - age
+        )
+        project_stats.record_donations([donation], set())
+
+    def test_recent_donations_outrank_older_larger_ones(self):
+        """Test that trending scores decay with donation age"""
+        old, recent, _ = self.projects
+        self.record(old, 400, timedelta(days=3))  # three half-lives ago: worth 50
+        self.record(recent, 60, timedelta(minutes=5))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['by'], 'trending')
+        self.assertEqual([p['id'] for p in response.data['results']], [recent.id, old.id])
+        self.assertAlmostEqual(response.data['results'][1]['score'], 50, delta=0.1)
+
+    def test_scores_accumulate(self):
+        """Test that the incremental update sums decayed donations"""
+        project = self.projects[0]
+        self.record(project, 10, timedelta(hours=24))
+        self.record(project, 10, timedelta(0))
+        self.record(project, 20, timedelta(hours=48))
+
+        stats = ProjectStats.objects.get(project=project)
+        self.assertAlmostEqual(trending.current_score(stats.trending_score), 20, delta=0.01)
+
+        # The rebuilt score matches the incremental one
+        call_command('rebuild_project_stats', stdout=io.StringIO())
+        rebuilt = ProjectStats.objects.get(project=project)
+        self.assertAlmostEqual(rebuilt.trending_score, stats.trending_score, places=6)
+
+    def test_funded_ranking(self):
+        """Test ordering by the indexed percent-funded column"""
+        CharityProject.objects.filter(pk=self.projects[0].pk).update(amount_raised=50)
+        CharityProject.objects.filter(pk=self.projects[1].pk).update(amount_raised=900)
+        CharityProject.objects.filter(pk=self.projects[2].pk).update(amount_raised=10)
+
+        response = self.client.get(self.url, {'by': 'funded', 'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(p['id'], p['score']) for p in response.data['results']],
+            [(self.projects[1].id, 90.0), (self.projects[0].id, 50.0)]
+        )
+
+    def test_funded_ranking_follows_donations(self):
+        """Test that percent funded is recomputed when amount_raised changes"""
+        self.client.force_authenticate(user=self.user)
+        self.client.post(reverse('create-donation'), {'amount': '40.00', 'project': self.projects[2].id})
+
+        response = self.client.get(self.url, {'by': 'funded', 'limit': 1})
+        self.assertEqual(response.data['results'][0]['id'], self.projects[2].id)
+        self.assertEqual(response.data['results'][0]['score'], 80.0)
+
+    def test_reads_are_one_query(self):
+        """Test that both rankings are a single query"""
+        for project in self.projects:
+            self.record(project, 5, timedelta(hours=1))
+        for by in ('trending', 'funded'):
+            with self.assertNumQueries(1):
+                self.client.get(self.url, {'by': by})
+
+    def test_invalid_parameters(self):
+        """Test that unknown rankings and bad limits are rejected"""
+        for params in ({'by': 'newest'}, {'limit': 'ten'}, {'limit': 0}, {'limit': 101}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_benchmark_scenario(self):
+        """Test that the leaderboard benchmark runs and reports both paths"""
+        result = bench_leaderboard.run(projects=30, donations=200, queries=2, limit=5)
+        self.assertIsNotNone(result['trending']['precomputed_ms']['p50'])
+        self.assertIn('live_aggregate_ms', result['funded'])
+
+
+class DonationExportTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='exportowner',
+            email='export@example.com',
+            password='TestPass123!',
+            first_name='Export',
+            last_name='Owner'
+        )
+        self.other = User.objects.create_user(
+            username='exportother',
+            email='exportother@example.com',
+            password='TestPass123!',
+            first_name='Export',
+            last_name='Other'
+        )
+        self.project = CharityProject.objects.create(
+            title='Export Project',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.owner
+        )
+        start = timezone.now() - timedelta(days=1)
+        Donation.objects.bulk_create([
+            Donation(
+                user=(self.owner, self.other)[i % 2],
+                project=self.project,
+                amount=Decimal('1.50') + i,
+                transaction_id=f'export-{i}',
+                date=start + timedelta(minutes=i)
+            )
+            for i in range(25)
+        ])
+        self.url = reverse('charity-export', args=[self.project.id])
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        """Test that the owner can stream donations as CSV, oldest first"""
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'project-{self.project.id}-donations.csv', response['Content-Disposition'])
+        lines = self.read(response).splitlines()
+        self.assertEqual(lines[0], ','.join(exports.COLUMNS))
+        self.assertEqual(len(lines), 26)
+        self.assertTrue(lines[1].startswith('export-0,'))
+        self.assertIn(',1.50,', lines[1])
+        self.assertTrue(lines[2].endswith(f',{self.other.id},exportother,exportother@example.com'))
+
+    def test_ndjson_export(self):
+        """Test the NDJSON export format"""
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(self.url, {'type': 'ndjson'})
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[-1]['transaction_id'], 'export-24')
+        self.assertEqual(rows[-1]['amount'], '25.50')
+        self.assertTrue(rows[0]['date'].endswith('Z'))
+
+    def test_only_owner_can_export(self):
+        """Test that exports are owner-only, even though they are reads"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(user=self.other)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_invalid_type(self):
+        """Test that unknown export types are rejected"""
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(self.url, {'type': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rows_are_read_in_chunks(self):
+        """Test that the export iterates the queryset rather than loading it"""
+        chunks = list(exports.stream_csv(self.project.id, chunk_size=10))
+        # header, then 25 rows in chunks of 10
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [1, 10, 10, 5])
+
+        with mock.patch('django.db.models.query.QuerySet.iterator', autospec=True,
+                        side_effect=lambda qs, chunk_size=None: iter(())) as iterator:
+            list(exports.stream_ndjson(self.project.id, chunk_size=10))
+        self.assertEqual(iterator.call_args.kwargs, {'chunk_size': 10})
+
+
+@override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.user = User.objects.create_user(
+            username='timinguser',
+            email='timing@example.com',
+            password='TestPass123!',
+            first_name='Timing',
+            last_name='User'
+        )
+        self.project = CharityProject.objects.create(
+            title='Timing Project',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.user
+        )
+
+    def metrics(self, response):
+        metrics = {}
+        for part in response['Server-Timing'].split(', '):
+            name, duration, description = part.split(';')
+            metrics[name] = (float(duration.removeprefix('dur=')), description)
+        return metrics
+
+    def test_list_timings(self):
+        """Test that a list request reports SQL, serializer, render and view time"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('charity-list'))
+
+        metrics = self.metrics(response)
+        self.assertEqual(set(metrics), {'sql', 'serialize', 'render', 'view', 'total'})
+        self.assertEqual(metrics['sql'][1], f'desc="{len(queries)} queries"')
+        self.assertGreaterEqual(metrics['total'][0], metrics['view'][0])
+
+        # A response cache hit still reports SQL, as zero queries
+        metrics = self.metrics(self.client.get(reverse('charity-list')))
+        self.assertEqual(metrics['sql'][1], 'desc="0 queries"')
+        self.assertNotIn('serialize', metrics)
+
+    def test_donation_timings(self):
+        """Test that email queueing in create_donation is timed"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse('create-donation'), {'amount': '5.00', 'project': self.project.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('email', self.metrics(response))
+
+    def test_structured_log_line(self):
+        """Test that each sampled request logs one JSON line"""
+        with self.assertLogs('charities.timing', 'INFO') as logs:
+            self.client.get(reverse('charity-detail', args=[self.project.id]))
+
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['method'], 'GET')
+        self.assertEqual(line['status'], 200)
+        self.assertEqual(line['route'], 'api/charities/projects/(?P<pk>[^/.]+)/$')
+        self.assertIn('sql_ms', line)
+        self.assertGreater(line['queries'], 0)
+
+    def test_sampling(self):
+        """Test that unsampled requests get no header and no log line"""
+        with override_settings(SERVER_TIMING_SAMPLE_RATE=0):
+            response = self.client.get(reverse('charity-list'))
+        self.assertNotIn('Server-Timing', response)
+
+        with override_settings(SERVER_TIMING_SAMPLE_RATE=0.25):
+            with mock.patch('charities.timing.random.random', return_value=0.3):
+                self.assertNotIn('Server-Timing', self.client.get(reverse('charity-list')))
+            with mock.patch('charities.timing.random.random', return_value=0.2):
+                self.assertIn('Server-Timing', self.client.get(reverse('charity-list')))
+
+
+def parse_metrics(text):
+    """Prometheus text -> {(sample name, frozenset of labels): value}"""
+    return {
+        (sample.name, frozenset(sample.labels.items())): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+@override_settings(EMAIL_BACKEND='charities.tests.FlakyEmailBackend', METRICS_TOKEN='scrape-secret')
+class MetricsTests(APITestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        FlakyEmailBackend.fail = False
+        self.user = User.objects.create_user(
+            username='metricsuser',
+            email='metrics@example.com',
+            password='TestPass123!',
+            first_name='Metrics',
+            last_name='User'
+        )
+        self.project = CharityProject.objects.create(
+            title='Metrics Project',
+            description='Test Description',
+            goal_amount=1000,
+            start_date=date.today(),
+            end_date=date.today(),
+            created_by=self.user
+        )
+
+    def scrape(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return parse_metrics(response.content.decode())
+
+    def value(self, scraped, name, **labels):
+        return scraped.get((name, frozenset(labels.items())), 0)
+
+    def test_request_metrics(self):
+        """Test per-route request counts, latency and query histograms"""
+        route = 'api/charities/projects/$'
+        before = self.scrape()
+        for _ in range(3):
+            self.client.get(reverse('charity-list'))
+        after = self.scrape()
+
+        def delta(name, **labels):
+            return self.value(after, name, **labels) - self.value(before, name, **labels)
+
+        self.assertEqual(
+            delta('charities_http_requests_total', route=route, method='GET', status='200'), 3
+        )
+        self.assertEqual(
+            delta('charities_http_request_duration_seconds_count', route=route, method='GET'), 3
+        )
+        # The first request ran 2 queries, the cached ones none
+        self.assertEqual(delta('charities_http_request_db_queries_sum', route=route), 2)
+        self.assertEqual(delta('charities_http_request_db_queries_bucket', route=route, le='0.0'), 2)
+
+    def test_donation_and_email_metrics(self):
+        """Test that committed donations and outbox deliveries are counted"""
+        before = self.scrape()
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('create-donation'), {'amount': '12.50', 'project': self.project.id}
+            )
+        send_pending()
+        FlakyEmailBackend.fail = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('create-donation'), {'amount': '2.50', 'project': self.project.id}
+            )
+        send_pending()
+        after = self.scrape()
+
+        def delta(name, **labels):
+            return self.value(after, name, **labels) - self.value(before, name, **labels)
+
+        self.assertEqual(delta('charities_donations_total', source='api'), 2)
+        self.assertEqual(delta('charities_donation_amount_total', source='api'), 15.0)
+        self.assertEqual(delta('charities_emails_queued_total', kind='thank_you'), 2)
+        self.assertEqual(delta('charities_email_deliveries_total', outcome='sent'), 1)
+        self.assertEqual(delta('charities_email_deliveries_total', outcome='failed'), 1)
+
+    def test_rolled_back_donations_are_not_counted(self):
+        """Test that donations are only counted on commit"""
+        before = self.scrape()
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('create-donation'), {'amount': '-1', 'project': self.project.id})
+        after = self.scrape()
+        self.assertEqual(
+            self.value(after, 'charities_donations_total', source='api'),
+            self.value(before, 'charities_donations_total', source='api')
+        )
+
+    def test_token(self):
+        """Test that a configured token is required to scrape"""
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_no_token_is_closed_outside_debug(self):
+        """Test that without a token only a DEBUG server serves /metrics"""
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_200_OK)
+
+    def test_multiprocess_mode(self):
+        """Test that samples from separate processes are merged from the shared directory"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        script = (
+            'import django; django.setup(); '
+            'from charities import metrics; '
+            'metrics.DONATIONS.labels("api").inc(); '
+            'metrics.DONATION_AMOUNT.labels("api").inc(2.5); '
+            'metrics.REQUEST_LATENCY.labels("r", "GET").observe(0.02)'
+        )
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'backend.settings',
+            'PROMETHEUS_MULTIPROC_DIR': directory.name,
+        }
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, '-c', script], env=env, check=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            )
+
+        scraped = parse_metrics(generate_latest(metrics.registry(directory.name)).decode())
+        self.assertEqual(self.value(scraped, 'charities_donations_total', source='api'), 2)
+        self.assertEqual(self.value(scraped, 'charities_donation_amount_total', source='api'), 5.0)
+        self.assertEqual(
+            self.value(scraped, 'charities_http_request_duration_seconds_count', route='r', method='GET'),
+            2
+        )
+
+
+class ArchiveTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='archiveowner',
+            email='archive@example.com',
+            password='TestPass123!',
+            first_name='Archive',
+            last_name='Owner'
+        )
+        today = timezone.localdate()
+        self.old = [
+            self.create_project(f'Old Well {i}', today - timedelta(days=400 + i))
+            for i in range(3)
+        ]
+        self.recent = self.create_project('Recent Well', today - timedelta(days=10))
+        self.running = self.create_project('Running Well', today + timedelta(days=30))
+        for i, project in enumerate([*self.old, self.recent, self.running]):
+            for j in range(2):
+                Donation.objects.create(
+                    user=self.owner, project=project, amount=Decimal('5.00'),
+                    transaction_id=f'archive-{i}-{j}'
+                )
+        self.client.force_authenticate(user=self.owner)
+        self.list_url = reverse('charity-list')
+
+    def create_project(self, title, end_date):
+        return CharityProject.objects.create(
+            title=title,
+            description='Clean water for a village',
+            goal_amount=1000,
+            start_date=end_date - timedelta(days=30),
+            end_date=end_date,
+            created_by=self.owner
+        )
+
+    def run_archive(self, *args):
+        out = io.StringIO()
+        call_command('archive_projects', *args, stdout=out)
+        return out.getvalue()
+
+    def ids(self, response):
+        return {item['id'] for item in response.data['results']}
+
+    def test_moves_only_projects_past_the_cutoff(self):
+        """Test that projects ended over ARCHIVE_AFTER_DAYS ago move with their donations"""
+        expected = self.client.get(
+            reverse('charity-detail', args=[self.old[0].id]), {'fields': 'id,title,amount_raised'}
+        ).data
+        self.assertIn('Would archive 3 project(s)', self.run_archive('--dry-run'))
+        self.assertEqual(ArchivedProject.objects.count(), 0)
+
+        out = self.run_archive()
+
+        self.assertIn('Archived 3 project(s) and 6 donation(s)', out)
+        self.assertEqual(
+            set(CharityProject.objects.values_list('id', flat=True)),
+            {self.recent.id, self.running.id}
+        )
+        self.assertEqual(
+            set(ArchivedProject.objects.values_list('id', flat=True)),
+            {project.id for project in self.old}
+        )
+        self.assertFalse(Donation.objects.filter(project_id__in=[p.id for p in self.old]).exists())
+        self.assertEqual(ArchivedDonation.objects.count(), 6)
+        archived = ArchivedProject.objects.get(pk=self.old[0].id)
+        self.assertEqual(archived.title, self.old[0].title)
+        self.assertEqual(archived.created_at, self.old[0].created_at)
+        self.assertIsNotNone(archived.archived_at)
+
+        self.assertIn('Archived 0 project(s)', self.run_archive('--days', '20'))
+        self.assertIn('Archived 1 project(s)', self.run_archive('--days', '5'))
+        response = self.client.get(
+            reverse('charity-detail', args=[self.old[0].id]),
+            {'fields': 'id,title,amount_raised', 'include_archived': 'true'}
+        )
+        self.assertEqual(response.data, expected)
+
+    def test_resumes_in_batches(self):
+        """Test that --limit and --batch-size stop part way and a rerun finishes the job"""
+        self.assertIn('Archived 2 project(s)', self.run_archive('--limit', '2', '--batch-size', '1'))
+        self.assertEqual(CharityProject.objects.count(), 3)
+        result = archive.archive_projects(archive.cutoff(), batch_size=1)
+        self.assertEqual((result.projects, result.donations, result.batches), (1, 2, 1))
+        self.assertEqual(ArchivedProject.objects.count(), 3)
+
+    def test_pending_shards_are_folded_in(self):
+        """Test that an archived project keeps donations still held in amount shards"""
+        with override_settings(AMOUNT_RAISED_SHARDS=4):
+            add_to_amount_raised(self.old[0].id, Decimal('7.00'))
+        archive.archive_projects(archive.cutoff())
+        self.assertEqual(
+            ArchivedProject.objects.get(pk=self.old[0].id).amount_raised, Decimal('7.00')
+        )
+        self.assertFalse(AmountRaisedShard.objects.filter(project_id=self.old[0].id).exists())
+
+    def test_reads_hide_archived_by_default(self):
+        """Test that list, detail, search and the dashboards only show archived data on request"""
+        self.run_archive()
+        old_id = self.old[0].id
+        hot = {self.recent.id, self.running.id}
+        every = hot | {project.id for project in self.old}
+        detail_url = reverse('charity-detail', args=[old_id])
+        user_projects = reverse('user-projects', args=[self.owner.id])
+        user_donations = reverse('user-donations', args=[self.owner.id])
+
+        self.assertEqual(self.ids(self.client.get(self.list_url)), hot)
+        self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.ids(self.client.get(user_projects)), hot)
+        self.assertEqual(len(self.client.get(user_donations).data['results']), 4)
+        self.assertEqual(self.ids(self.client.get(self.list_url, {'search': 'old'})), set())
+
+        params = {'include_archived': 'true'}
+        self.assertEqual(self.ids(self.client.get(self.list_url, params)), every)
+        response = self.client.get(detail_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], self.old[0].title)
+        self.assertEqual(response.data['created_by']['id'], self.owner.id)
+        self.assertEqual(self.ids(self.client.get(user_projects, params)), every)
+        donations = self.client.get(user_donations, params).data['results']
+        self.assertEqual(len(donations), 10)
+        self.assertIn(old_id, {donation['project']['id'] for donation in donations})
+        self.assertEqual(
+            self.ids(self.client.get(self.list_url, {**params, 'search': 'old'})),
+            {project.id for project in self.old}
+        )
+        oldest = self.client.get(self.list_url, {**params, 'ordering': 'end_date'})
+        self.assertEqual(oldest.data['results'][0]['id'], self.old[2].id)
+
+    def test_export_includes_archived_donations(self):
+        """Test that the owner can still export an archived project's donations"""
+        self.run_archive()
+        url = reverse('charity-export', args=[self.old[0].id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(url, {'include_archived': '1', 'type': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(
+            {row['transaction_id'] for row in rows}, {'archive-0-0', 'archive-0-1'}
+        )
+
+    def test_import_skips_archived_transactions(self):
+        """Test that re-importing an archived donation counts it as a duplicate"""
+        self.run_archive()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'donations.csv')
+        with open(path, 'w') as f:
+            f.write(
+                'transaction_id,project_id,user_id,amount,date\n'
+                f'archive-0-0,{self.recent.id},{self.owner.id},5.00,\n'
+            )
+        out = io.StringIO()
+        call_command('import_donations', path, stdout=out, stderr=io.StringIO())
+        self.assertIn('Imported 0 of 1 rows', out.getvalue())
+        self.assertFalse(Donation.objects.filter(transaction_id='archive-0-0').exists())
+
+    def test_async_reads_match_sync(self):
+        """Test that the ASGI path applies include_archived like the sync views"""
+        self.run_archive()
+        token = str(AccessToken.for_user(self.owner))
+        self.client.force_authenticate(user=None)
+        paths = [
+            f'{self.list_url}?include_archived=true',
+            reverse('charity-detail', args=[self.old[0].id]) + '?include_archived=true',
+            reverse('user-projects', args=[self.owner.id]) + '?include_archived=true',
+            reverse('user-donations', args=[self.owner.id]) + '?include_archived=true',
+        ]
+        headers = {'Authorization': f'JWT {token}'}
+        for path in paths:
+            response_cache.get_cache().clear()
+            sync_response = self.client.get(path, headers=headers)
+            response_cache.get_cache().clear()
+            with override_settings(ROOT_URLCONF='backend.asgi_urls'):
+                async_response = async_to_sync(self.async_client.get)(path, headers=headers)
+            self.assertEqual(sync_response.status_code, status.HTTP_200_OK, path)
+            self.assertEqual(async_response.content, sync_response.content, path)
+
+
+class MigrationBackfillTests(TransactionTestCase):
+    """
+    Migrations that add derived tables fill them from the donations that
+    already exist. Each test migrates back to before the table existed,
+    seeds donations through the historical models and migrates forward.
+    """
+    before = ('charities', '0015_donation_date_default')
+
+    def setUp(self):
+        self.addCleanup(self.migrate, None)
+        self.apps = self.migrate(self.before)
+        Project = self.apps.get_model('charities', 'CharityProject')
+        Donation = self.apps.get_model('charities', 'Donation')
+        # accounts is not migrated back, so its current model applies
+        self.donors = create_users(2, prefix='backfill')
+        self.project = Project.objects.create(
+            title='Backfill Project', description='Test Description', goal_amount=1000,
+            start_date=date.today(), end_date=date.today(), created_by_id=self.donors[0].id
+        )
+        utc = dt_timezone.utc
+        for i, (amount, when) in enumerate([
+            ('10.00', datetime(2026, 3, 1, 9, 15, tzinfo=utc)),
+            ('5.00', datetime(2026, 3, 1, 9, 45, tzinfo=utc)),
+            ('2.50', datetime(2026, 3, 2, 23, 59, tzinfo=utc)),
+        ]):
+            Donation.objects.create(
+                user_id=self.donors[i % 2].id, project=self.project, amount=Decimal(amount),
+                transaction_id=f'backfill-{i}', date=when
+            )
+
+    def migrate(self, target):
+        """Migrate ``charities`` to ``target`` (``None``: latest); return the historical apps."""
+        executor = MigrationExecutor(connection)
+        targets = [target] if target else executor.loader.graph.leaf_nodes('charities')
+        executor.migrate(targets)
+        executor.loader.build_graph()
+        return executor.loader.project_state(targets).apps
+
+    def test_project_stats(self):
+        """Test that 0016 creates stats rows and hourly buckets for existing donations"""
+        apps = self.migrate(('charities', '0016_project_stats'))
+        stats = apps.get_model('charities', 'ProjectStats').objects.get(project_id=self.project.id)
+        self.assertEqual(
+            (stats.donor_count, stats.donation_count, stats.total_amount, stats.largest_gift),
+            (2, 3, Decimal('17.50'), Decimal('10.00'))
+        )
+        hourly = apps.get_model('charities', 'ProjectHourlyTotal').objects.filter(
+            project_id=self.project.id
+        ).order_by('hour')
+        self.assertEqual(
+            [(row.hour.hour, row.amount, row.donation_count) for row in hourly],
+            [(9, Decimal('15.00'), 2), (23, Decimal('2.50'), 1)]
+        )
+
+    def test_trending_scores(self):
+        """Test that 0017 scores the stats rows backfilled by 0016"""
+        apps = self.migrate(('charities', '0017_leaderboard'))
+        stats = apps.get_model('charities', 'ProjectStats').objects.get(project_id=self.project.id)
+        Donation = apps.get_model('charities', 'Donation')
+        expected = trending.combine(
+            trending.log_weight(amount, when)
+            for amount, when in Donation.objects.values_list('amount', 'date')
+        )
+        self.assertAlmostEqual(stats.trending_score, expected)
+
+    def test_daily_totals(self):
+        """Test that 0018 creates daily buckets for existing donations"""
+        apps = self.migrate(('charities', '0018_project_daily_totals'))
+        daily = apps.get_model('charities', 'ProjectDailyTotal').objects.filter(
+            project_id=self.project.id
+        ).order_by('day')
+        self.assertEqual(
+            [(row.day, row.amount, row.donation_count) for row in daily],
+            [(date(2026, 3, 1), Decimal('15.00'), 2), (date(2026, 3, 2), Decimal('2.50'), 1)]
+        )
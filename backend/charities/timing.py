@@ -0,0 +1,229 @@
+"""
+Per-request timing: SQL, serialization, rendering and view time.
+
+``ServerTimingMiddleware`` samples a fraction of requests
+(``SERVER_TIMING_SAMPLE_RATE``). For those it activates a ``RequestTimer``
+that observes every query (see ``observe_queries``) and that ``span()``
+blocks elsewhere (serializers, email queueing, compression) add to. The
+totals go out as a ``Server-Timing`` header and one JSON log line on the
+``charities.timing`` logger. Unsampled requests pay for one
+``random.random()`` call and ``span()`` is a no-op.
+
+Spans overlap: SQL run while serializing counts towards both.
+
+Query observers hang off one ``execute_wrapper`` that every connection
+gets when it is created, and are looked up through a context variable.
+Wrapping ``connections.all()`` per request would miss queries that the
+async ORM runs on another thread's connection; a context variable follows
+the request into ``sync_to_async`` threads.
+"""
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework import serializers
+
+logger = logging.getLogger('charities.timing')
+
+_current = ContextVar('charities_request_timer', default=None)
+_query_observers = ContextVar('charities_query_observers', default=())
+
+# Server-Timing metric name -> description
+METRICS = {
+    'sql': 'SQL',
+    'serialize': 'Serializers',
+    'render': 'Render',
+    'compress': 'Compression',
+    'email': 'Email queueing',
+    'view': 'View',
+    'total': 'Total',
+}
+
+
+def _observe(execute, sql, params, many, context):
+    observers = _query_observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        for observer in observers:
+            observer(elapsed)
+
+
+def install_query_observer(sender, connection, **kwargs):
+    """``connection_created`` receiver; see ``CharitiesConfig.ready()``."""
+    if _observe not in connection.execute_wrappers:
+        # Outermost, and at the bottom of the list so that an
+        # execute_wrapper() block open while the connection was created
+        # still pops its own wrapper
+        connection.execute_wrappers.insert(0, _observe)
+
+
+@contextmanager
+def observe_queries(observer):
+    """Call ``observer(seconds)`` after every query run inside the block."""
+    token = _query_observers.set(_query_observers.get() + (observer,))
+    try:
+        yield
+    finally:
+        _query_observers.reset(token)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float, sql=0.0)
+        self.query_count = 0
+        self._depth = defaultdict(int)
+
+    def add(self, name, seconds):
+        self.durations[name] += seconds
+
+    @contextmanager
+    def span(self, name):
+        # Only the outermost of nested spans with the same name counts
+        self._depth[name] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[name] -= 1
+            if not self._depth[name]:
+                self.add(name, time.perf_counter() - start)
+
+    def __call__(self, seconds):
+        # observe_queries() hook
+        self.query_count += 1
+        self.add('sql', seconds)
+
+    def header(self):
+        parts = []
+        for name, description in METRICS.items():
+            if name not in self.durations:
+                continue
+            if name == 'sql':
+                description = f'{self.query_count} queries'
+            parts.append(f'{name};dur={self.durations[name] * 1000:.1f};desc="{description}"')
+        return ', '.join(parts)
+
+
+@contextmanager
+def span(name):
+    """Time the block towards ``name`` if this request is being sampled."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.span(name):
+        yield
+
+
+class TimedSerializerMixin:
+    """Counts ``serializer.data`` towards the ``serialize`` metric."""
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # A sync hook would cost every async request a thread hop
+            self.process_view = self.aprocess_view
+
+    def sampled(self):
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        request._timing_view_start = None
+        token = _current.set(timer)
+        try:
+            with observe_queries(timer):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        timer = RequestTimer()
+        request._timing_view_start = None
+        token = _current.set(timer)
+        try:
+            with observe_queries(timer):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timer)
+
+    def finish(self, request, response, timer):
+        now = time.perf_counter()
+        if request._timing_view_start is not None and 'view' not in timer.durations:
+            timer.add('view', now - request._timing_view_start)
+        timer.add('total', now - timer.started)
+
+        response['Server-Timing'] = timer.header()
+        self.log(request, response, timer)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.view_started(request)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.view_started(request)
+
+    def view_started(self, request):
+        if _current.get() is not None:
+            request._timing_view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timer = _current.get()
+        if timer is None:
+            return response
+        render_start = time.perf_counter()
+        if request._timing_view_start is not None:
+            timer.add('view', render_start - request._timing_view_start)
+
+        def rendered(response):
+            timer.add('render', time.perf_counter() - render_start)
+        response.add_post_render_callback(rendered)
+        return response
+
+    def log(self, request, response, timer):
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'status': response.status_code,
+            'queries': timer.query_count,
+            **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in timer.durations.items()},
+        }))
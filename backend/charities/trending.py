@@ -0,0 +1,60 @@
+"""
+Exponentially time-decayed donation scores for the trending leaderboard.
+
+A donation of ``amount`` at time ``t`` is worth ``amount * 2 ** -(age / half-life)``
+now. Rather than decaying every project's score as time passes, each donation
+is stored with the weight it has relative to a fixed epoch,
+``amount * e ** ((t - EPOCH) / tau)``; every score then shrinks by the same
+factor as time passes, so the stored values rank projects exactly as their
+current decayed scores would. Scores are kept as natural logarithms so the
+growing exponent never overflows a float.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Coalesce, Exp, Greatest, Ln
+from django.utils import timezone
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def tau_hours():
+    return settings.TRENDING_HALF_LIFE_HOURS / math.log(2)
+
+
+def log_weight(amount, when):
+    """The stored (log) score of a single donation."""
+    hours = (when - EPOCH).total_seconds() / 3600
+    return math.log(float(amount)) + hours / tau_hours()
+
+
+def combine(log_scores):
+    """log(sum(exp(s))) of stored scores, without overflowing."""
+    log_scores = list(log_scores)
+    if not log_scores:
+        return None
+    peak = max(log_scores)
+    return peak + math.log(sum(math.exp(s - peak) for s in log_scores))
+
+
+def add_expression(field, log_score):
+    """
+    An update expression adding ``log_score`` to the stored score in
+    ``field``; a NULL score becomes ``log_score``.
+    """
+    value = Value(log_score)
+    return Coalesce(
+        Greatest(F(field), value) + Ln(Value(1.0) + Exp(-Abs(F(field) - value))),
+        value
+    )
+
+
+def current_score(log_score, now=None):
+    """The decayed score, in currency units, that ``log_score`` is worth at ``now``."""
+    if log_score is None:
+        return 0.0
+    hours = ((now or timezone.now()) - EPOCH).total_seconds() / 3600
+    exponent = log_score - hours / tau_hours()
+    return math.exp(exponent) if exponent > -700 else 0.0
@@ -12,4 +12,5 @@ urlpatterns = [
     path('donations/user/<int:user_id>/', views.user_donations, name='user-donations'),
     
     path('projects/user/<int:user_id>/', views.user_projects, name='user-projects'),
+    path('cache/stats/', views.cache_stats, name='cache-stats'),
 ]
\ No newline at end of file
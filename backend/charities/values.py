@@ -0,0 +1,220 @@
+"""
+Fast path for list responses: serialise ``.values()`` rows directly.
+
+A ``ModelSerializer`` builds a model instance per row and then walks one
+DRF field object per attribute. ``ValuesSerializer`` walks its
+``serializer_class``'s fields once, into a flat plan of
+``(key, column, converter)`` entries: ``str``/``int``/``float`` for plain
+fields, and Decimal, date and datetime converters precompiled from the
+field's settings. Each row is a single pass over that plan. Fields without
+a precompiled converter use the DRF field's own ``to_representation``, so
+output matches the serializer; ``ValuesParityTests`` compares the JSON
+byte for byte.
+"""
+import decimal
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+
+from . import timing
+from .fieldsets import SparseFieldsMixin
+from .serializers import CharityProjectSerializer
+
+SIMPLE_CONVERTERS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+    serializers.FloatField.to_representation: float,
+}
+
+
+def decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.normalize_output or field.decimal_places is None:
+        return field.to_representation
+
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return '{:f}'.format(value.quantize(exponent, rounding=rounding, context=context))
+    return convert
+
+
+def date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        return value if isinstance(value, str) else value.isoformat()
+    return convert
+
+
+def datetime_converter(field, tz):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = getattr(field, 'timezone', tz)
+    if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def converter_for(field, tz):
+    method = type(field).to_representation
+    if method in SIMPLE_CONVERTERS:
+        return SIMPLE_CONVERTERS[method]
+    if method is serializers.DecimalField.to_representation:
+        return decimal_converter(field)
+    if method is serializers.DateTimeField.to_representation:
+        return datetime_converter(field, tz)
+    if method is serializers.DateField.to_representation:
+        return date_converter(field)
+    return field.to_representation
+
+
+def compile_plan(serializer, tz, prefix=''):
+    """
+    ``[(key, column, converter, nested_plan)]`` for ``serializer``'s
+    readable fields. For a nested serializer, ``column`` is its foreign
+    key, which is ``None`` exactly when the serializer would output ``None``.
+    """
+    plan = []
+    for field in serializer._readable_fields:
+        if field.source == '*' or '.' in field.source:
+            raise ImproperlyConfigured(
+                f'{field.field_name!r} has source {field.source!r}; only model '
+                'fields and foreign keys can be read from .values() rows'
+            )
+        column = prefix + field.source
+        if isinstance(field, serializers.BaseSerializer):
+            if type(field).to_representation is not serializers.Serializer.to_representation:
+                raise ImproperlyConfigured(
+                    f'Nested serializer {field.field_name!r} customises to_representation()'
+                )
+            plan.append((field.field_name, column, None, compile_plan(field, tz, column + '__')))
+        else:
+            plan.append((field.field_name, column, converter_for(field, tz), None))
+    return plan
+
+
+def select(plan, fields):
+    """The entries of ``plan`` for the top-level ``fields``, or all of it."""
+    if fields is None:
+        return plan
+    return [entry for entry in plan if entry[0] in fields]
+
+
+def plan_columns(plan):
+    columns = []
+    for _, column, _, nested in plan:
+        columns.append(column)
+        if nested:
+            columns.extend(plan_columns(nested))
+    return columns
+
+
+def represent(row, plan):
+    data = {}
+    for key, column, convert, nested in plan:
+        value = row[column]
+        if value is None:
+            data[key] = None
+        elif nested:
+            data[key] = represent(row, nested)
+        else:
+            data[key] = convert(value)
+    return data
+
+
+class ValuesSerializer:
+    """
+    Serialise ``.values()`` rows exactly as ``serializer_class`` serialises
+    model instances. Build the rows with ``values(queryset)``, passing the
+    same ``fields`` (see ``charities.fieldsets``) to both.
+    """
+    serializer_class = None
+
+    def __init__(self, rows, context=None, fields=None):
+        self.rows = rows
+        self.context = context or {}
+        self.fields = fields
+
+    @classmethod
+    def get_plan(cls, tz):
+        # One plan per class and timezone; DRF fields are walked once
+        plans = cls.__dict__.get('_plans')
+        if plans is None:
+            plans = {}
+            setattr(cls, '_plans', plans)
+        if tz not in plans:
+            plans[tz] = compile_plan(cls.serializer_class(), tz)
+        return plans[tz]
+
+    @classmethod
+    def values(cls, queryset, fields=None):
+        """
+        ``queryset.values()`` with the columns the plan reads for ``fields``,
+        plus its annotations (``distance``, ``search_rank``) so cursors can
+        use them. Relations outside ``fields`` are not joined.
+        """
+        columns = plan_columns(select(cls.get_plan(timezone.get_current_timezone()), fields))
+        return queryset.values(*columns, *queryset.query.annotations)
+
+    def to_representation(self, row, plan):
+        return represent(row, plan)
+
+    @property
+    def data(self):
+        with timing.span('serialize'):
+            plan = select(self.get_plan(timezone.get_current_timezone()), self.fields)
+            return [self.to_representation(row, plan) for row in self.rows]
+
+
+class ProjectValuesSerializer(ValuesSerializer):
+    serializer_class = CharityProjectSerializer
+
+    def to_representation(self, row, plan):
+        data = represent(row, plan)
+        # As CharityProjectSerializer.to_representation()
+        distance = row.get('distance')
+        if distance is not None:
+            data['distance'] = round(distance, 3)
+        return data
+
+
+class ValuesListMixin(SparseFieldsMixin):
+    """
+    Serve ``list`` from ``.values()`` rows with ``values_serializer_class``
+    instead of model instances with ``serializer_class``. Set it to
+    ``None`` to go back to the serializer. ``?fields=``/``?omit=`` select
+    the columns either way.
+    """
+    values_serializer_class = None
+
+    def uses_values(self):
+        return self.action == 'list' and self.values_serializer_class is not None
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.uses_values():
+            queryset = self.values_serializer_class.values(queryset, self.get_sparse_fields())
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and self.uses_values():
+            return self.values_serializer_class(
+                *args, context=self.get_serializer_context(), fields=self.get_sparse_fields()
+            )
+        return super().get_serializer(*args, **kwargs)
@@ -1,30 +1,58 @@
-from rest_framework import viewsets, permissions, filters, status
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import viewsets, permissions, status
+from rest_framework.parsers import JSONParser
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from .models import CharityProject, Donation
-from .serializers import CharityProjectSerializer, DonationSerializer, ProjectMinimalSerializer
-from .permissions import IsOwnerOrReadOnly
+from .serializers import (
+    CharityProjectSerializer, DonationSerializer, ProjectStatsSerializer,
+    ProjectTimeseriesSerializer
+)
+from .permissions import IsOwner, IsOwnerOrReadOnly
+from .archive import ArchiveReadMixin
+from .async_read import AsyncReadMixin
+from .cache import CachedReadMixin
+from .conditional import ConditionalReadMixin
+from .replicas import ReplicaReadMixin, replica_reads
+from . import archive, async_read, cache, exports, fieldsets, leaderboard, metrics, stats, timing
+from .status import condition as status_condition
+from .counters import add_to_amount_raised, current_amount_raised
+from .filters import (
+    FullTextSearchFilter, NearFilter, ProjectOrderingFilter, ProjectStatusFilter
+)
+from .pagination import DonationCursorPagination, ProjectCursorPagination
+from .values import ProjectValuesSerializer, ValuesListMixin
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from django.utils import timezone
 import uuid
 from decimal import Decimal
 
 
-class CharityProjectViewSet(viewsets.ModelViewSet):
-    queryset = CharityProject.objects.all()
+class CharityProjectViewSet(
+    ReplicaReadMixin, ConditionalReadMixin, CachedReadMixin, AsyncReadMixin, ValuesListMixin,
+    ArchiveReadMixin, viewsets.ModelViewSet
+):
+    queryset = CharityProject.objects.select_related('created_by')
     serializer_class = CharityProjectSerializer
+    values_serializer_class = ProjectValuesSerializer
+    pagination_class = ProjectCursorPagination
     parser_classes = [JSONParser] 
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [
+        FullTextSearchFilter, NearFilter, ProjectStatusFilter, ProjectOrderingFilter
+    ]
     search_fields = ['title', 'description', 'location']
-    ordering_fields = ['created_at', 'goal_amount', 'end_date']
+    ordering_fields = ['created_at', 'goal_amount', 'end_date', 'distance']
     
     def get_permissions(self):
         if self.action == 'create':
             permission_classes = [permissions.IsAuthenticated]
         elif self.action in ['update', 'partial_update', 'destroy']:
             permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
+        elif self.action in ['export', 'timeseries']:
+            permission_classes = [permissions.IsAuthenticated, IsOwner]
         else:
             permission_classes = [permissions.AllowAny]
         return [permission() for permission in permission_classes]
@@ -33,8 +61,8 @@ class CharityProjectViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
     def perform_update(self, serializer):
-        instance = self.get_object()
-            
+        # serializer.instance was already fetched and permission-checked
+        # by get_object() in update()
         serializer.save()
 
     def get_serializer_context(self):
@@ -42,31 +70,164 @@ class CharityProjectViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise Http404
+        data = stats.project_stats(pk)
+        if data is None:
+            # No donations yet; still 404 for unknown projects
+            get_object_or_404(CharityProject, pk=pk)
+            data = stats.empty_stats()
+        return Response(ProjectStatsSerializer(data).data)
+
+    @action(detail=True, methods=['get'])
+    def timeseries(self, request, pk=None):
+        interval = request.query_params.get('interval', 'day')
+        if interval not in stats.ROLLUPS:
+            raise ValidationError({'interval': f"Must be one of: {', '.join(stats.ROLLUPS)}."})
+        bounds = {}
+        for param in ('start', 'end'):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            bounds[param] = stats.parse_bound(value, end=param == 'end')
+            if bounds[param] is None:
+                raise ValidationError({param: 'Must be an ISO 8601 date or datetime.'})
+        end = bounds.get('end') or timezone.now()
+        start = bounds.get('start') or stats.default_start(end, interval)
+        if start > end:
+            raise ValidationError({'start': 'Must not be after end.'})
+        if stats.bucket_count(start, end, interval) > stats.MAX_BUCKETS:
+            raise ValidationError(
+                {'start': f'At most {stats.MAX_BUCKETS} {interval} buckets per request.'}
+            )
+        project = self.get_object()
+
+        results = stats.timeseries(project.id, interval, start, end)
+        return Response(ProjectTimeseriesSerializer({
+            'interval': interval,
+            'start': results[0]['start'],
+            'end': results[-1]['start'] + stats.ROLLUPS[interval][3],
+            'results': results,
+        }).data)
+
+    @action(detail=False, methods=['get'])
+    def leaderboard(self, request):
+        by = request.query_params.get('by', 'trending')
+        if by not in leaderboard.RANKINGS:
+            raise ValidationError({'by': f"Must be one of: {', '.join(leaderboard.RANKINGS)}."})
+        try:
+            limit = int(request.query_params.get('limit', leaderboard.DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+        if not 1 <= limit <= leaderboard.MAX_LIMIT:
+            raise ValidationError({'limit': f'Must be between 1 and {leaderboard.MAX_LIMIT}.'})
+
+        results = []
+        for project, score in leaderboard.top_projects(by, limit):
+            data = self.get_serializer(project).data
+            data['score'] = round(score, 2)
+            results.append(data)
+        return Response({'by': by, 'results': results})
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        # ?format= is taken by DRF's content negotiation
+        fmt = request.query_params.get('type', 'csv')
+        if fmt not in exports.FORMATS:
+            raise ValidationError({'type': f"Must be one of: {', '.join(exports.FORMATS)}."})
+        project = self.get_object()
+
+        response = StreamingHttpResponse(
+            exports.stream_donations(
+                project.id, fmt, model=archive.donations(request)
+            ),
+            content_type=exports.FORMATS[fmt]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="project-{project.id}-donations.{fmt}"'
+        )
+        return response
+
+def forbidden(what):
+    return Response(
+        {"error": f"Not authorized to view these {what}"},
+        status=status.HTTP_403_FORBIDDEN
+    )
+
+
+def user_donations_listing(request, user_id):
+    """
+    ``(queryset, paginator, serialize)`` for a page of ``user_id``'s
+    donations. ``user_donations`` and ``async_user_donations`` differ only
+    in how they fetch the page.
+    """
+    fields = fieldsets.requested_fields(request, DonationSerializer)
+    donations = fieldsets.narrow(
+        archive.donations(request).objects.filter(user_id=user_id).select_related('project'),
+        DonationSerializer, fields
+    )
+    return (
+        donations, DonationCursorPagination(),
+        lambda page: DonationSerializer(page, many=True, fields=fields).data
+    )
+
+
+def user_projects_listing(request, user_id):
+    """``user_donations_listing()`` for the projects ``user_id`` created."""
+    fields = fieldsets.requested_fields(request, CharityProjectSerializer)
+    projects = ProjectValuesSerializer.values(
+        archive.projects(request).objects.filter(created_by_id=user_id), fields
+    )
+    return (
+        projects, ProjectCursorPagination(),
+        lambda page: ProjectValuesSerializer(page, fields=fields).data
+    )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def user_donations(request, user_id):
     if request.user.id != user_id:
-        return Response(
-            {"error": "Not authorized to view these donations"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    donations = Donation.objects.filter(user_id=user_id)
-    serializer = DonationSerializer(donations, many=True)
-    return Response(serializer.data)
+        return forbidden('donations')
+    donations, paginator, serialize = user_donations_listing(request, user_id)
+    page = paginator.paginate_queryset(donations, request)
+    return paginator.get_paginated_response(serialize(page))
+
+
+@async_read.api_view(user_donations)
+@replica_reads
+async def async_user_donations(request, user_id):
+    if request.user.id != user_id:
+        return forbidden('donations')
+    donations, paginator, serialize = user_donations_listing(request, user_id)
+    page = await paginator.apaginate_queryset(donations, request)
+    return paginator.get_paginated_response(serialize(page))
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def user_projects(request, user_id):
     if request.user.id != user_id:
-        return Response(
-            {"error": "Not authorized to view these projects"}, 
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    projects = CharityProject.objects.filter(created_by_id=user_id)
-    serializer = CharityProjectSerializer(projects, many=True)
-    return Response(serializer.data)
+        return forbidden('projects')
+    projects, paginator, serialize = user_projects_listing(request, user_id)
+    page = paginator.paginate_queryset(projects, request)
+    return paginator.get_paginated_response(serialize(page))
+
+
+@async_read.api_view(user_projects)
+@replica_reads
+async def async_user_projects(request, user_id):
+    if request.user.id != user_id:
+        return forbidden('projects')
+    projects, paginator, serialize = user_projects_listing(request, user_id)
+    page = await paginator.apaginate_queryset(projects, request)
+    return paginator.get_paginated_response(serialize(page))
 
 
 @api_view(['POST'])
@@ -76,7 +237,17 @@ def create_donation(request):
         
         
         with transaction.atomic():
-            project = get_object_or_404(CharityProject, id=request.data.get('project'))
+            # Whether the project has ended comes back with the project row
+            project = get_object_or_404(
+                CharityProject.objects.select_related('created_by')
+                .annotate(has_ended=status_condition('ended')),
+                id=request.data.get('project')
+            )
+            if project.has_ended:
+                return Response(
+                    {"message": "This project has ended and no longer accepts donations"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             amount = Decimal(request.data.get('amount'))
 
             # Validate amount
@@ -86,6 +257,8 @@ def create_donation(request):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+            new_donors = stats.new_donor_pairs([(project.id, request.user.id)])
+
             # Create donation
             donation = Donation.objects.create(
                 user=request.user,
@@ -94,21 +267,18 @@ def create_donation(request):
                 transaction_id=str(uuid.uuid4())
             )
 
-            # Update project amount raised
-            project.amount_raised = project.amount_raised + amount
-            project.save()
-
-            # Send thank you email
-            try:
-                donation.send_thank_you_email()
-            except Exception as e:
-                print(f"Failed to send thank you email: {e}")
+            # Update project amount raised in the database rather than
+            # read-modify-write, so concurrent donations are never lost
+            add_to_amount_raised(project.id, amount)
+            project.amount_raised = current_amount_raised(project.id)
+            stats.record_after_commit([donation], new_donors)
+            metrics.record_donations(1, amount, source='api')
 
-            # Check if goal reached and notify
-            try:
-                donation.check_and_notify_goal_reached()
-            except Exception as e:
-                print(f"Failed to send goal reached notification: {e}")
+            # Queue notification emails; they are delivered by the
+            # send_queued_emails worker after this transaction commits
+            with timing.span('email'):
+                donation.queue_thank_you_email()
+                donation.queue_goal_reached_email()
 
             serializer = DonationSerializer(donation)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -117,4 +287,11 @@ def create_donation(request):
         return Response(
             {"message": str(e)},
             status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    return Response(cache.stats())
+
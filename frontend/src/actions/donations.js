@@ -1,4 +1,4 @@
-import axiosInstance from '../utils/axiosConfig';
+import { getAllPages } from '../utils/pagination';
 import { 
     GET_USER_DONATIONS,
     DONATION_ERROR
@@ -6,11 +6,11 @@ import {
 
 export const getUserDonations = (userId) => async dispatch => {
     try {
-        const res = await axiosInstance.get(`/api/charities/donations/user/${userId}/`);
+        const donations = await getAllPages(`/api/charities/donations/user/${userId}/`);
 
         dispatch({
             type: GET_USER_DONATIONS,
-            payload: res.data
+            payload: donations
         });
     } catch (err) {
         dispatch({
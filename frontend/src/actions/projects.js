@@ -1,5 +1,6 @@
 // src/actions/projects.js
 import axiosInstance from '../utils/axiosConfig';
+import { getAllPages } from '../utils/pagination';
 import {
     GET_PROJECT,
     CREATE_PROJECT,
@@ -15,11 +16,11 @@ import {
 // Get all projects
 export const getProjects = () => async dispatch => {
     try {
-        const res = await axiosInstance.get('/api/charities/projects/');
-        
+        const projects = await getAllPages('/api/charities/projects/');
+
         dispatch({
             type: GET_PROJECTS_SUCCESS,
-            payload: res.data || [] 
+            payload: projects
         });
     } catch (err) {
         dispatch({
@@ -117,11 +118,11 @@ export const deleteProject = (id, navigate) => async dispatch => {
 
 export const getUserProjects = (userId) => async dispatch => {
     try {
-        const res = await axiosInstance.get(`/api/charities/projects/user/${userId}/`);
+        const projects = await getAllPages(`/api/charities/projects/user/${userId}/`);
 
         dispatch({
             type: GET_USER_PROJECTS,
-            payload: res.data
+            payload: projects
         });
     } catch (err) {
         dispatch({
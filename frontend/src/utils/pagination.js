@@ -0,0 +1,14 @@
+import axiosInstance from './axiosConfig';
+
+// Fetch every page of a cursor-paginated list by following `next`
+export const getAllPages = async (url, params = { page_size: 100 }) => {
+    const results = [];
+    let res = await axiosInstance.get(url, { params });
+    results.push(...res.data.results);
+    while (res.data.next) {
+        // `next` already carries the cursor and page size
+        res = await axiosInstance.get(res.data.next);
+        results.push(...res.data.results);
+    }
+    return results;
+};